@@ -0,0 +1,307 @@
+"""
+Offline batch processing: summarize (T5) or expand (GPT-2) a file of inputs.
+
+Reads JSONL or CSV as a stream, groups inputs of similar length into
+batches and fans them out to N worker processes, each holding one copy
+of the model. Results are written to a JSONL file in the original input
+order as soon as they are ready, so the output doubles as the checkpoint:
+`--resume` skips every input that already has an output line.
+
+Usage:
+    python batch_process.py summarize reviews.csv summaries.jsonl --field Text --workers 2
+    python batch_process.py expand summaries.jsonl expanded.jsonl --field summary --resume
+    python batch_process.py summarize requests.jsonl out.jsonl --field body --id-field request_id
+
+Each output line: {"index", "id" (with --id-field), "summary" | "generated_text", "error"}.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROJECTS = {
+    "summarize": os.path.join(ROOT_DIR, "summarization"),
+    "expand": os.path.join(ROOT_DIR, "text_generator"),
+}
+OUTPUT_FIELDS = {"summarize": "summary", "expand": "generated_text"}
+DEFAULT_FIELDS = {"summarize": "text", "expand": "summary"}
+
+# Set in each worker process by _init_worker
+_run_batch = None
+
+
+# ─── Worker side ─────────────────────────────────────────────────
+def _init_worker(task, threads, params):
+    """Load one model copy for this process from the task's project."""
+    global _run_batch
+
+    # Both projects ship a package named `src`; each worker only imports one
+    sys.path.insert(0, PROJECTS[task])
+
+    import torch
+    torch.set_num_threads(threads)
+
+    if task == "summarize":
+        from src.inference.generate import Summarizer
+
+        summarizer = Summarizer.load(device=params["device"], num_threads=threads)
+        summarizer.warmup()
+
+        def run(items):
+            results = summarizer.summarize_sorted(
+                [text for _, text in items],
+                batch_size=len(items),
+                max_length=params["max_length"],
+                num_beams=params["num_beams"],
+            )
+            return [(index, r["summary"], r["error"]) for (index, _), r in zip(items, results)]
+
+    else:
+        from src.inference.generate import generate_text, load_model
+
+        tokenizer, model = load_model()
+
+        def run(items):
+            results = []
+            for index, text in items:
+                try:
+                    output = generate_text(
+                        text, tokenizer, model,
+                        # Seeded per input so reruns and resumes give the same text
+                        seed=params["seed"] + index,
+                        max_length=params["max_length"],
+                        num_beams=params["num_beams"],
+                    )
+                    results.append((index, output, None))
+                except Exception as e:
+                    results.append((index, None, str(e)))
+            return results
+
+    _run_batch = run
+
+
+def _process(items):
+    return _run_batch(items)
+
+
+# ─── Input / output ──────────────────────────────────────────────
+def iter_inputs(path, field, id_field=None):
+    """Yield (id, text) per record of a JSONL or CSV file, streaming."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            text = record.get(field)
+            yield (record.get(id_field) if id_field else None), ("" if text is None else str(text))
+
+
+def count_inputs(path):
+    """Number of records (one streaming pass, used for the ETA)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            return sum(1 for _ in csv.DictReader(f))
+        return sum(1 for line in f if line.strip())
+
+
+def completed_outputs(path):
+    """
+    Count complete output lines, truncating a partially written last line.
+
+    Outputs are written in input order, so this is also the number of
+    inputs to skip on resume.
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+    return data[:complete].count(b"\n")
+
+
+def iter_batches(records, start_index, batch_size, window):
+    """
+    Group records into length-sorted batches.
+
+    Records are read `window` at a time, sorted by text length and cut into
+    batches of `batch_size`, so padding stays small without reading the
+    whole file. Yields (batch, skipped): `batch` is a list of
+    (index, text), `skipped` lists the indices of empty inputs.
+    """
+    pending = []
+    for index, (_, text) in enumerate(records, start=start_index):
+        pending.append((index, text))
+        if len(pending) >= window:
+            yield from _window_batches(pending, batch_size)
+            pending = []
+    if pending:
+        yield from _window_batches(pending, batch_size)
+
+
+def _window_batches(items, batch_size):
+    skipped = [index for index, text in items if not text.strip()]
+    if skipped:
+        yield [], skipped
+    items = sorted((item for item in items if item[1].strip()), key=lambda item: len(item[1]))
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size], []
+
+
+def _format_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+# ─── Driver ──────────────────────────────────────────────────────
+def run(args):
+    field = args.field or DEFAULT_FIELDS[args.task]
+    output_field = OUTPUT_FIELDS[args.task]
+
+    if os.path.exists(args.output) and not (args.resume or args.overwrite):
+        print(f"❌ {args.output} exists — use --resume to continue or --overwrite to start over.")
+        sys.exit(1)
+    if args.overwrite and not args.resume and os.path.exists(args.output):
+        os.remove(args.output)
+
+    done = completed_outputs(args.output)
+    total = count_inputs(args.input)
+    print(f"Inputs: {total} | already done: {done} | workers: {args.workers}")
+    if done >= total:
+        print("✅ Nothing left to do.")
+        return
+
+    # Ids are needed again when writing, in input order
+    records = iter_inputs(args.input, field, args.id_field)
+    for _ in range(done):
+        next(records)
+    ids = {}
+
+    def remember_ids(stream):
+        for index, (record_id, text) in enumerate(stream, start=done):
+            ids[index] = record_id
+            yield record_id, text
+
+    threads = args.threads or max(1, os.cpu_count() // args.workers)
+    params = {
+        "device": args.device,
+        "max_length": args.max_length,
+        "num_beams": args.num_beams,
+        "seed": args.seed,
+    }
+    window = args.batch_size * args.workers * 4
+    max_in_flight = args.workers * 2
+
+    buffered = {}
+    next_index = done
+    start_time = last_log = time.time()
+
+    with open(args.output, "a", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(args.task, threads, params),
+    ) as pool:
+
+        def flush(results):
+            nonlocal next_index
+            for index, output, error in results:
+                buffered[index] = (output, error)
+            wrote = False
+            while next_index in buffered:
+                output, error = buffered.pop(next_index)
+                record = {"index": next_index}
+                if args.id_field:
+                    record["id"] = ids.pop(next_index)
+                else:
+                    ids.pop(next_index, None)
+                record[output_field] = output
+                record["error"] = error
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                next_index += 1
+                wrote = True
+            if wrote:
+                out.flush()
+                os.fsync(out.fileno())
+
+        def log_progress(force=False):
+            nonlocal last_log
+            now = time.time()
+            if not force and now - last_log < args.log_every:
+                return
+            last_log = now
+            processed = next_index - done
+            rate = processed / max(now - start_time, 1e-9)
+            eta = (total - next_index) / rate if rate > 0 else float("inf")
+            print(
+                f"{next_index}/{total} ({next_index / total:.1%}) | "
+                f"{rate:.2f} items/s | ETA {_format_eta(eta) if rate > 0 else '--:--:--'}",
+                flush=True,
+            )
+
+        in_flight = set()
+
+        def collect(block):
+            nonlocal in_flight
+            if block:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            else:
+                finished = {f for f in in_flight if f.done()}
+                in_flight -= finished
+            for future in finished:
+                flush(future.result())
+            log_progress()
+
+        for batch, skipped in iter_batches(remember_ids(records), done, args.batch_size, window):
+            if skipped:
+                flush([(index, None, "Empty input") for index in skipped])
+            if not batch:
+                continue
+            while len(in_flight) >= max_in_flight:
+                collect(block=True)
+            in_flight.add(pool.submit(_process, batch))
+            collect(block=False)
+
+        while in_flight:
+            collect(block=True)
+
+    log_progress(force=True)
+    elapsed = time.time() - start_time
+    print(f"✅ {next_index - done} items in {elapsed:.1f}s → {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or expand a JSONL/CSV file offline")
+    parser.add_argument("task", choices=sorted(PROJECTS))
+    parser.add_argument("input", help="Input .jsonl or .csv file")
+    parser.add_argument("output", help="Output .jsonl file (also the resume checkpoint)")
+    parser.add_argument("--field", default=None,
+                        help="Input field/column (default: text for summarize, summary for expand)")
+    parser.add_argument("--id-field", default=None, help="Field copied to the output as `id`")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (one model each)")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads per worker")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--device", default=None, help="Summarizer device (default: cuda if available)")
+    parser.add_argument("--max-length", type=int, default=None)
+    parser.add_argument("--num-beams", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42, help="Base sampling seed for expand")
+    parser.add_argument("--resume", action="store_true", help="Continue after existing output lines")
+    parser.add_argument("--overwrite", action="store_true", help="Replace an existing output file")
+    parser.add_argument("--log-every", type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
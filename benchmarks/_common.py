@@ -0,0 +1,243 @@
+"""
+Shared helpers for the benchmark scripts.
+
+  - Tiny random-weight T5 / GPT-2 checkpoints, so benchmarks run offline
+    and in seconds (tokenizers come from the local fine-tuned models or
+    the HuggingFace cache).
+  - Latency statistics, environment metadata and JSON reports with a
+    run-to-run comparison.
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+TINY_MODELS_DIR = os.path.join(ROOT_DIR, "benchmarks", ".models")
+
+# Local fine-tuned checkpoint first, then the base model from the HF cache
+TOKENIZER_SOURCES = {
+    "t5": [os.path.join(ROOT_DIR, "summarization", "models", "t5-small"), "t5-small"],
+    "gpt2": [os.path.join(ROOT_DIR, "text_generator", "models", "gpt2-finetuned"), "gpt2"],
+}
+
+_WORDS = (
+    "the a coffee tea product taste flavor price value box arrived quickly fresh "
+    "dog cat food loved hated order again never always best worst sweet bitter "
+    "smell package quality brand store amazon recommend highly small large bag "
+    "city council study found people new report said year government market"
+).split()
+
+
+# ─── Models ──────────────────────────────────────────────────────
+def load_base_tokenizer(kind, fast=True):
+    """Tokenizer for "t5" or "gpt2" from the first available source."""
+    from transformers import GPT2Tokenizer, GPT2TokenizerFast, T5Tokenizer, T5TokenizerFast
+
+    if kind == "t5":
+        tokenizer_class = T5TokenizerFast if fast else T5Tokenizer
+    else:
+        tokenizer_class = GPT2TokenizerFast if fast else GPT2Tokenizer
+    errors = []
+    for source in TOKENIZER_SOURCES[kind]:
+        if source.startswith(ROOT_DIR) and not os.path.isdir(source):
+            continue
+        try:
+            return tokenizer_class.from_pretrained(source)
+        except Exception as e:
+            errors.append(f"{source}: {e}")
+    raise RuntimeError(f"No {kind} tokenizer available offline: " + "; ".join(errors))
+
+
+def make_tiny_t5(output_dir=None, seed=0):
+    """Save a 2-layer, d_model=64 random-weight T5 with the real tokenizer."""
+    import torch
+    from transformers import T5Config, T5ForConditionalGeneration
+
+    output_dir = output_dir or os.path.join(TINY_MODELS_DIR, "t5-tiny")
+    if os.path.exists(os.path.join(output_dir, "config.json")):
+        return output_dir
+
+    tokenizer = load_base_tokenizer("t5")
+    config = T5Config(
+        vocab_size=len(tokenizer),
+        d_model=64,
+        d_kv=16,
+        d_ff=128,
+        num_layers=2,
+        num_decoder_layers=2,
+        num_heads=4,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.pad_token_id,
+    )
+    torch.manual_seed(seed)
+    T5ForConditionalGeneration(config).save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def make_tiny_gpt2(output_dir=None, seed=0):
+    """Save a 2-layer, n_embd=64 random-weight GPT-2 with the <|sep|> tokenizer."""
+    import torch
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    output_dir = output_dir or os.path.join(TINY_MODELS_DIR, "gpt2-tiny")
+    if os.path.exists(os.path.join(output_dir, "config.json")):
+        return output_dir
+
+    tokenizer = load_base_tokenizer("gpt2")
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.add_special_tokens({"additional_special_tokens": ["<|sep|>"]})
+
+    config = GPT2Config(
+        vocab_size=len(tokenizer),
+        n_positions=1024,
+        n_embd=64,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    torch.manual_seed(seed)
+    GPT2LMHeadModel(config).save_pretrained(output_dir)
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+# ─── Inputs ──────────────────────────────────────────────────────
+def synthetic_texts(count, min_words, max_words, seed=0):
+    """Random word sequences with lengths uniform in [min_words, max_words]."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def replay_texts(path, field, count=None):
+    """Values of `field` from a JSONL file (e.g. requests.jsonl), in order."""
+    texts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            value = json.loads(line).get(field)
+            if value:
+                texts.append(str(value))
+            if count and len(texts) >= count:
+                break
+    return texts
+
+
+# ─── Statistics & reports ────────────────────────────────────────
+def time_call(fn, repeat=10, warmup=1):
+    """Run `fn` `warmup` times untimed, then `repeat` times; return the timings in ms."""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0–100) of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_ms(values):
+    """mean / p50 / p95 / p99 / max of a list of milliseconds (None if empty)."""
+    if not values:
+        return None
+    return {
+        "mean": round(sum(values) / len(values), 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2),
+    }
+
+
+def process_memory_mb(pid):
+    """Current (VmRSS) and peak (VmHWM) resident memory of a process in MB."""
+    memory = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    memory["peak_rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def environment():
+    """Metadata that makes two result files comparable."""
+    info = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info["git_commit"] = None
+    for module in ("torch", "transformers"):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    return info
+
+
+def write_report(report, output=None, prefix="bench"):
+    """Write the report as JSON (default: benchmarks/results/<prefix>-<time>.json)."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to: {output}")
+    return output
+
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_reports(baseline_path, report, section="results"):
+    """Print every numeric metric of `report[section]` next to the baseline file's."""
+    with open(baseline_path) as f:
+        baseline = _flatten(json.load(f).get(section, {}))
+    current = _flatten(report.get(section, {}))
+
+    print(f"\nComparison with {baseline_path}:")
+    print(f"{'metric':<60}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name], current[name]
+        change = f"{(new - old) / old:+.1%}" if old else "n/a"
+        print(f"{name:<60}{old:>12}{new:>12}{change:>10}")
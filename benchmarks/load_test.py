@@ -0,0 +1,305 @@
+"""
+Load test for the summarization and text generator APIs.
+
+Starts each API locally with uvicorn (by default on tiny random-weight
+models, so it runs offline in a few minutes), replays a JSONL file or
+synthetic traffic against it and reports latency percentiles,
+throughput, time-to-first-token (streaming endpoint) and the server's
+peak RSS as JSON.
+
+Traffic is either closed-loop (`--concurrency` requests in flight) or
+open-loop (`--rate` Poisson arrivals per second, capped at
+`--concurrency` in flight). In open-loop mode latency is measured from
+the scheduled arrival time, so queueing in the client counts too.
+
+Usage (from the repo root):
+    python -m benchmarks.load_test --requests 200 --concurrency 8
+    python -m benchmarks.load_test --rate 5 --replay requests.jsonl --field body
+    python -m benchmarks.load_test --model real --compare benchmarks/results/load-before.json
+    python -m benchmarks.load_test --summarization-url http://localhost:8000 --services summarization
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from benchmarks._common import (
+    ROOT_DIR,
+    compare_reports,
+    environment,
+    make_tiny_gpt2,
+    make_tiny_t5,
+    process_memory_mb,
+    replay_texts,
+    summarize_ms,
+    synthetic_texts,
+    write_report,
+)
+
+SERVICES = {
+    "summarization": {
+        "dir": os.path.join(ROOT_DIR, "summarization"),
+        "port": 8100,
+        "health": "/api/health",
+        "make_tiny": make_tiny_t5,
+        "min_words": 40,
+        "max_words": 300,
+        "scenarios": [
+            ("summarize", "/api/summarize", False,
+             lambda text, args: {"text": text, "max_length": args.max_length, "num_beams": args.num_beams}),
+        ],
+    },
+    "text_generator": {
+        "dir": os.path.join(ROOT_DIR, "text_generator"),
+        "port": 8101,
+        "health": "/api/generate/health",
+        "make_tiny": make_tiny_gpt2,
+        "min_words": 5,
+        "max_words": 30,
+        "scenarios": [
+            ("generate", "/api/generate", False,
+             lambda text, args: {"summary": text, "max_length": args.gen_tokens}),
+            ("generate_stream", "/api/generate/stream", True,
+             lambda text, args: {"summary": text, "max_length": args.gen_tokens}),
+        ],
+    },
+}
+
+
+# ─── Server management ───────────────────────────────────────────
+class ApiServer:
+    """One uvicorn process serving `api:app` from a project directory."""
+
+    def __init__(self, project_dir, port, health_path, model_dir=None):
+        self.project_dir = project_dir
+        self.port = port
+        self.health_path = health_path
+        self.model_dir = model_dir
+        self.process = None
+        self.load_time = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout=300):
+        env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+        if self.model_dir:
+            env["HF_MODEL_REPO"] = self.model_dir
+
+        start = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(self.port)],
+            cwd=self.project_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wait_until_ready(self.url, self.health_path, timeout, process=self.process)
+        self.load_time = round(time.perf_counter() - start, 2)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def wait_until_ready(url, health_path, timeout, process=None):
+    """Poll the health endpoint until the model is loaded."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with code {process.returncode}")
+        try:
+            status, body, _ = request("GET", url, health_path, timeout=5)
+            if status == 200 and json.loads(body).get("model_loaded"):
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become ready within {timeout}s")
+
+
+# ─── HTTP client ─────────────────────────────────────────────────
+def request(method, base_url, path, payload=None, stream=False, timeout=300):
+    """
+    Send one request; return (status, body, time_to_first_chunk_s).
+
+    For NDJSON streams the first-chunk time is taken when the first
+    {"text": ...} line arrives.
+    """
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=timeout)
+    start = time.perf_counter()
+    try:
+        body = json.dumps(payload) if payload is not None else None
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+
+        if not stream or response.status != 200:
+            return response.status, response.read(), None
+
+        first_chunk, last = None, b""
+        for line in response:
+            if first_chunk is None and line.startswith(b'{"text"'):
+                first_chunk = time.perf_counter() - start
+            if line.strip():
+                last = line
+        # A stream that fails midway ends with an {"error": ...} event
+        status = 500 if b'"error"' in last else 200
+        return status, last, first_chunk
+    finally:
+        conn.close()
+
+
+# ─── Load generation ─────────────────────────────────────────────
+def run_scenario(base_url, path, stream, payloads, concurrency, rate=None, seed=0):
+    """
+    Send all payloads and collect per-request timings.
+
+    Returns:
+        Dict with latency / TTFT statistics, throughput and status counts.
+    """
+    rng = random.Random(seed)
+    latencies, ttfts, statuses = [], [], {}
+
+    def send(payload, scheduled):
+        # Closed loop: the clock starts when a worker picks the request up
+        scheduled = scheduled if scheduled is not None else time.perf_counter()
+        try:
+            status, _, first_chunk = request("POST", base_url, path, payload, stream=stream)
+        except OSError as e:
+            status, first_chunk = type(e).__name__, None
+        done = time.perf_counter()
+        return status, (done - scheduled) * 1000, first_chunk
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = []
+        next_arrival = start
+        for payload in payloads:
+            if rate:
+                # Open loop: Poisson arrivals, independent of response times
+                next_arrival += rng.expovariate(rate)
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                scheduled = next_arrival
+            else:
+                scheduled = None
+            futures.append(pool.submit(send, payload, scheduled))
+
+        for future in futures:
+            status, latency_ms, first_chunk = future.result()
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(latency_ms)
+                if first_chunk is not None:
+                    ttfts.append(first_chunk * 1000)
+    duration = time.perf_counter() - start
+
+    ok = statuses.get("200", 0)
+    result = {
+        "requests": len(payloads),
+        "ok": ok,
+        "errors": len(payloads) - ok,
+        "status_counts": statuses,
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(ok / duration, 3) if duration else None,
+        "latency_ms": summarize_ms(latencies),
+    }
+    if stream:
+        result["ttft_ms"] = summarize_ms(ttfts)
+    return result
+
+
+def build_texts(args, service):
+    if args.replay:
+        texts = replay_texts(args.replay, args.field, args.requests)
+        if not texts:
+            raise ValueError(f"No '{args.field}' values found in {args.replay}")
+        # Cycle the log when it is shorter than the requested run
+        return [texts[i % len(texts)] for i in range(args.requests)]
+    return synthetic_texts(args.requests, service["min_words"], service["max_words"], seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the summarization / text generator APIs")
+    parser.add_argument("--services", default="summarization,text_generator",
+                        help="Comma-separated: summarization, text_generator")
+    parser.add_argument("--model", choices=["tiny", "real"], default="tiny",
+                        help="tiny: random-weight models (offline); real: configured checkpoints")
+    parser.add_argument("--summarization-url", default=None, help="Use a running server instead")
+    parser.add_argument("--text-generator-url", default=None, help="Use a running server instead")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Max requests in flight")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrivals per second")
+    parser.add_argument("--replay", default=None, help="JSONL file to replay (e.g. requests.jsonl)")
+    parser.add_argument("--field", default="body", help="JSONL field holding the input text")
+    parser.add_argument("--max-length", type=int, default=64, help="Summary max_length")
+    parser.add_argument("--num-beams", type=int, default=4)
+    parser.add_argument("--gen-tokens", type=int, default=64, help="Text generator max_length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Report path (default: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "load_test",
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": {},
+    }
+
+    for name in [s.strip() for s in args.services.split(",") if s.strip()]:
+        service = SERVICES[name]
+        external_url = getattr(args, f"{name}_url")
+        server = None
+        if external_url:
+            base_url = external_url
+            wait_until_ready(base_url, service["health"], timeout=60)
+        else:
+            model_dir = service["make_tiny"]() if args.model == "tiny" else None
+            server = ApiServer(service["dir"], service["port"], service["health"], model_dir)
+            print(f"Starting {name} API...")
+            server.start()
+            base_url = server.url
+            print(f"  ready in {server.load_time}s")
+
+        try:
+            texts = build_texts(args, service)
+            results = {"startup_s": server.load_time if server else None}
+            for scenario, path, stream, make_payload in service["scenarios"]:
+                print(f"  {scenario}: {args.requests} requests...")
+                payloads = [make_payload(text, args) for text in texts]
+                result = run_scenario(base_url, path, stream, payloads, args.concurrency, args.rate, args.seed)
+                results[scenario] = result
+                latency = result["latency_ms"] or {}
+                print(f"    {result['throughput_rps']} req/s | p50 {latency.get('p50')} ms | "
+                      f"p95 {latency.get('p95')} ms | p99 {latency.get('p99')} ms | errors {result['errors']}")
+                if result.get("ttft_ms"):
+                    print(f"    TTFT p50 {result['ttft_ms']['p50']} ms")
+            if server is not None:
+                results["server_memory"] = process_memory_mb(server.process.pid)
+            report["results"][name] = results
+        finally:
+            if server is not None:
+                server.stop()
+
+    write_report(report, args.output, prefix="load")
+    if args.compare:
+        compare_reports(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
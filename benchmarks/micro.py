@@ -0,0 +1,260 @@
+"""
+Microbenchmarks for the generation hot paths.
+
+Breaks `processing_time` down into its components, on CPU with tiny
+random-weight models by default:
+
+  - tokenizer:    encode / decode, slow (Python / SentencePiece) vs fast (Rust)
+  - t5_generate:  `model.generate` with num_beams 1/4/10 × max_length 64/128/512
+  - gpt2_generate: the sampling config with and without repetition_penalty /
+                  no_repeat_ngram_size=3
+  - clean_text:   `_clean_generated_text` regex post-processing
+
+Random weights rarely emit EOS at a sensible point, so generation is
+pinned to exactly max_length new tokens (min_new_tokens) — timings are
+comparable between runs and per-token costs are reported alongside.
+
+Usage (from the repo root):
+    python -m benchmarks.micro
+    python -m benchmarks.micro --sections tokenizer,clean_text --repeat 50
+    python -m benchmarks.micro --t5-model summarization/models/t5-small --compare benchmarks/results/micro-before.json
+"""
+
+import argparse
+import os
+import random
+import sys
+
+from benchmarks._common import (
+    ROOT_DIR,
+    compare_reports,
+    environment,
+    load_base_tokenizer,
+    make_tiny_gpt2,
+    make_tiny_t5,
+    summarize_ms,
+    synthetic_texts,
+    time_call,
+    write_report,
+)
+
+SECTIONS = ["tokenizer", "t5_generate", "gpt2_generate", "clean_text"]
+
+T5_BEAMS = [1, 4, 10]
+T5_LENGTHS = [64, 128, 512]
+GPT2_PENALTIES = {
+    "sampling": {"repetition_penalty": 1.0, "no_repeat_ngram_size": 0},
+    "repetition_penalty": {"repetition_penalty": None, "no_repeat_ngram_size": 0},
+    "no_repeat_ngram": {"repetition_penalty": 1.0, "no_repeat_ngram_size": 3},
+    "both": {"repetition_penalty": None, "no_repeat_ngram_size": 3},
+}
+
+
+def _text_generator_imports():
+    """Config and post-processing from the text generator project."""
+    # Both projects ship a package named `src`; this script only imports the text generator's
+    sys.path.insert(0, os.path.join(ROOT_DIR, "text_generator"))
+    from src.config import config
+    from src.inference.generate import _clean_generated_text
+
+    return config, _clean_generated_text
+
+
+def _per_item(timings_ms, count):
+    return summarize_ms([t / count for t in timings_ms])
+
+
+# ─── Sections ────────────────────────────────────────────────────
+def bench_tokenizer(args):
+    """Encode / decode throughput of slow vs fast tokenizers."""
+    texts = synthetic_texts(args.batch_size, 40, 300, seed=args.seed)
+    results = {}
+    for kind in ("t5", "gpt2"):
+        for fast in (False, True):
+            name = f"{kind}_{'fast' if fast else 'slow'}"
+            try:
+                tokenizer = load_base_tokenizer(kind, fast=fast)
+            except Exception as e:
+                print(f"  ⚠️ Skipping {name}: {e}")
+                continue
+
+            encoded = tokenizer(texts)["input_ids"]
+            num_tokens = sum(len(ids) for ids in encoded)
+
+            single = time_call(lambda: [tokenizer.encode(t) for t in texts], args.repeat)
+            batch = time_call(lambda: tokenizer(texts), args.repeat)
+            decode = time_call(
+                lambda: [tokenizer.decode(ids, skip_special_tokens=True) for ids in encoded], args.repeat
+            )
+            results[name] = {
+                "texts": len(texts),
+                "tokens": num_tokens,
+                "encode_ms_per_text": _per_item(single, len(texts)),
+                "batch_encode_ms_per_text": _per_item(batch, len(texts)),
+                "decode_ms_per_text": _per_item(decode, len(texts)),
+                "encode_tokens_per_s": round(num_tokens / (sum(single) / len(single) / 1000), 1),
+            }
+            print(f"  {name}: encode {results[name]['encode_ms_per_text']['p50']} ms/text | "
+                  f"decode {results[name]['decode_ms_per_text']['p50']} ms/text")
+    return results
+
+
+def bench_t5_generate(args):
+    """T5 beam search at the summarization defaults and beyond."""
+    import torch
+    from transformers import T5ForConditionalGeneration, T5TokenizerFast
+
+    model_dir = args.t5_model or make_tiny_t5()
+    tokenizer = T5TokenizerFast.from_pretrained(model_dir)
+    model = T5ForConditionalGeneration.from_pretrained(model_dir).eval()
+
+    text = "summarize: " + synthetic_texts(1, 250, 250, seed=args.seed)[0]
+    inputs = tokenizer(text, max_length=512, truncation=True, return_tensors="pt")
+
+    results = {}
+    for num_beams in T5_BEAMS:
+        for max_length in T5_LENGTHS:
+            def run():
+                with torch.no_grad():
+                    return model.generate(
+                        **inputs,
+                        max_length=max_length,
+                        min_new_tokens=max_length - 1,
+                        num_beams=num_beams,
+                        early_stopping=True,
+                    )
+
+            new_tokens = run().shape[-1] - 1  # minus decoder start token
+            timings = time_call(run, args.gen_repeat)
+            stats = summarize_ms(timings)
+            name = f"beams{num_beams}_len{max_length}"
+            results[name] = {
+                "input_tokens": inputs["input_ids"].shape[-1],
+                "new_tokens": new_tokens,
+                "latency_ms": stats,
+                "ms_per_token": round(stats["p50"] / max(new_tokens, 1), 3),
+            }
+            print(f"  {name}: {stats['p50']} ms ({results[name]['ms_per_token']} ms/token)")
+    return results
+
+
+def bench_gpt2_generate(args):
+    """GPT-2 sampling with the repetition controls toggled."""
+    import torch
+    from transformers import GPT2LMHeadModel, GPT2TokenizerFast
+
+    config, _ = _text_generator_imports()
+    model_dir = args.gpt2_model or make_tiny_gpt2()
+    tokenizer = GPT2TokenizerFast.from_pretrained(model_dir)
+    model = GPT2LMHeadModel.from_pretrained(model_dir).eval()
+
+    summary = synthetic_texts(1, 20, 20, seed=args.seed)[0]
+    prompt = config.data.prompt_prefix + summary + config.data.separator
+    input_ids = tokenizer.encode(prompt, return_tensors="pt")
+    max_new_tokens = args.gen_tokens or config.model.max_gen_length
+
+    results = {}
+    for name, overrides in GPT2_PENALTIES.items():
+        gen_kwargs = dict(
+            max_new_tokens=max_new_tokens,
+            min_new_tokens=max_new_tokens,
+            temperature=config.model.temperature,
+            top_k=config.model.top_k,
+            top_p=config.model.top_p,
+            num_beams=config.model.num_beams,
+            do_sample=config.model.do_sample,
+            repetition_penalty=overrides["repetition_penalty"] or config.model.repetition_penalty,
+            no_repeat_ngram_size=overrides["no_repeat_ngram_size"],
+            pad_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+        )
+
+        def run():
+            torch.manual_seed(args.seed)
+            with torch.no_grad():
+                return model.generate(input_ids, **gen_kwargs)
+
+        timings = time_call(run, args.gen_repeat)
+        stats = summarize_ms(timings)
+        results[name] = {
+            "repetition_penalty": gen_kwargs["repetition_penalty"],
+            "no_repeat_ngram_size": gen_kwargs["no_repeat_ngram_size"],
+            "new_tokens": max_new_tokens,
+            "latency_ms": stats,
+            "ms_per_token": round(stats["p50"] / max_new_tokens, 3),
+        }
+        print(f"  {name}: {stats['p50']} ms ({results[name]['ms_per_token']} ms/token)")
+    return results
+
+
+def bench_clean_text(args):
+    """`_clean_generated_text` on generated-looking text with stray non-ASCII."""
+    _, clean_generated_text = _text_generator_imports()
+    rng = random.Random(args.seed)
+    noise = ["é", "中文", "—", "\u200b", "Привет", " ,", "\n\n", " ."]
+
+    results = {}
+    for words in (150, 1000):
+        tokens = synthetic_texts(1, words, words, seed=args.seed)[0].split()
+        for i in range(0, len(tokens), 12):
+            tokens.insert(i, rng.choice(noise))
+        text = " ".join(tokens)
+
+        timings = time_call(lambda: [clean_generated_text(text) for _ in range(100)], args.repeat)
+        results[f"words{words}"] = {
+            "chars": len(text),
+            "us_per_call": summarize_ms([t * 10 for t in timings]),  # ms / 100 calls → µs
+        }
+        print(f"  words{words}: {results[f'words{words}']['us_per_call']['p50']} µs/call")
+    return results
+
+
+BENCHMARKS = {
+    "tokenizer": bench_tokenizer,
+    "t5_generate": bench_t5_generate,
+    "gpt2_generate": bench_gpt2_generate,
+    "clean_text": bench_clean_text,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for tokenization, generation and post-processing")
+    parser.add_argument("--sections", default=",".join(SECTIONS), help=f"Comma-separated: {', '.join(SECTIONS)}")
+    parser.add_argument("--t5-model", default=None, help="T5 checkpoint dir (default: tiny random model)")
+    parser.add_argument("--gpt2-model", default=None, help="GPT-2 checkpoint dir (default: tiny random model)")
+    parser.add_argument("--threads", type=int, default=1, help="Torch intra-op threads")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions for tokenizer / clean_text")
+    parser.add_argument("--gen-repeat", type=int, default=5, help="Repetitions per generate config")
+    parser.add_argument("--gen-tokens", type=int, default=None, help="GPT-2 new tokens (default: config)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per tokenizer run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Report path (default: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+    if {"t5_generate", "gpt2_generate"} & set(sections):
+        import torch
+        torch.set_num_threads(args.threads)
+
+    report = {
+        "benchmark": "micro",
+        "environment": environment(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": {},
+    }
+    for section in sections:
+        print(f"{section}...")
+        report["results"][section] = BENCHMARKS[section](args)
+
+    write_report(report, args.output, prefix="micro")
+    if args.compare:
+        compare_reports(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
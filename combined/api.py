@@ -0,0 +1,519 @@
+"""
+Combined FastAPI backend: the T5 summarizer and the GPT-2 generator in one process.
+
+Optional alternative to running the two services separately. Both
+models are loaded by one shared startup and run on one shared inference
+pool, with a per-model cap on admitted jobs. The routes mirror the
+separate APIs (/api/summarize, /api/summarize/batch, /api/health,
+/api/generate, /api/generate/stream, /api/generate/health,
+/debug/profiles) and run each project's own handlers (src.inference.service)
+and HTTP plumbing (src.monitoring.http), so both frontend API URLs can
+point here, plus /api/pipeline, which chains the models in memory in
+one job:
+
+  - "summarize_expand": text → T5 summary → GPT-2 expansion
+  - "expand_summarize": summary → GPT-2 text → T5 re-summary
+
+Usage (from the repository root):
+    uvicorn combined.api:app --port 8002
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+from functools import partial
+from typing import Dict, List, Literal, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from pydantic import BaseModel, Field
+from combined.config import config
+from combined.limits import ModelLimits
+from combined.projects import load_project
+
+# Lightweight modules only (no torch); the engines are imported by the loader
+summ = load_project("summarization", [
+    "src.config",
+    "src.inference.batching",
+    "src.inference.cache",
+    "src.inference.executor",
+    "src.inference.service",
+    "src.monitoring.http",
+    "src.monitoring.metrics",
+    "src.monitoring.profiling",
+])
+gen = load_project("text_generator", [
+    "src.config",
+    "src.inference.cache",
+    "src.inference.executor",
+    "src.inference.service",
+    "src.monitoring.http",
+    "src.monitoring.metrics",
+])
+QueueFullError = summ.executor.QueueFullError
+
+SUMMARIZER, GENERATOR = "summarizer", "generator"
+
+# --- App Setup ---
+app = FastAPI(
+    title="Summarize AI Combined API",
+    description="T5 summarization and GPT-2 text generation served from one process",
+    version="1.0.0",
+)
+
+# CORS — allow Next.js frontend
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# --- Global Model State ---
+summarizer = None
+summarize_engine = None
+generate_engine = None
+gen_tokenizer = None
+gen_model = None
+executor = None
+batcher = None
+# Shared by both models; enabled with PROFILING_ENABLED=1 like the separate APIs
+profiler = None
+# Each project's handler dependencies; set once both models are ready to serve
+summarize_service = None
+generate_service = None
+limits = ModelLimits(
+    {SUMMARIZER: config.summarizer_max_concurrency, GENERATOR: config.generator_max_concurrency},
+    error_factory=QueueFullError,
+    retry_after=config.retry_after_seconds,
+)
+# "loading" → "warming" → "healthy" (or "failed"); timings in seconds per phase
+startup_status = "loading"
+startup_timings = {}
+
+
+def _metrics_for(path):
+    """Each project's registry keeps its own routes; the pipeline counts as summarization."""
+    return gen.metrics if path.startswith("/api/generate") else summ.metrics
+
+
+# Both projects' QueueFullError (see _submit_generation) answer 503
+summ.http.add_request_metrics(app, _metrics_for)
+summ.http.add_queue_full_handler(app, _metrics_for)
+gen.http.add_queue_full_handler(app, _metrics_for)
+summ.http.add_profile_routes(app, lambda: profiler)
+
+
+@app.on_event("startup")
+def start_model_loading():
+    """
+    Load both models at startup.
+
+    With `background_startup` the server starts answering right away:
+    health reports "loading" / "warming" (HTTP 503) until both models
+    are loaded and warmed up, and requests get 503 meanwhile.
+    """
+    if config.background_startup:
+        threading.Thread(target=load_models, name="model-loader", daemon=True).start()
+    else:
+        load_models()
+
+
+def load_models():
+    """Import both inference stacks, load and warm up the models, then start serving."""
+    global summarizer, summarize_engine, generate_engine, gen_tokenizer, gen_model, executor, batcher
+    global profiler, summarize_service, generate_service, startup_status
+    startup_start = time.perf_counter()
+    try:
+        # torch / transformers are imported here rather than at module import,
+        # so uvicorn binds the port (and health answers) within a second
+        phase_start = time.perf_counter()
+        loaded_summarize_engine = load_project("summarization", ["src.inference.generate"]).generate
+        loaded_generate_engine = load_project("text_generator", ["src.inference.generate"]).generate
+        startup_timings["imports"] = round(time.perf_counter() - phase_start, 3)
+
+        # Both projects read ONNX_MODEL_DIR for their export, so only PyTorch is served here
+        phase_start = time.perf_counter()
+        loaded_summarizer = loaded_summarize_engine.Summarizer.load(
+            model_dir=config.summarizer_model_dir,
+            backend="pytorch",
+            num_threads=config.torch_threads,
+        )
+        startup_timings.update({f"summarizer_{k}": v for k, v in loaded_summarizer.load_timings.items()})
+        summ.metrics.MODEL_LOAD_SECONDS.set(round(time.perf_counter() - phase_start, 3))
+        print(f"✅ Summarizer loaded ({loaded_summarizer.variant}).")
+
+        phase_start = time.perf_counter()
+        generator_timings = {}
+        loaded_tokenizer, loaded_model = loaded_generate_engine.load_model(
+            model_dir=config.generator_model_dir,
+            backend="pytorch",
+            timings=generator_timings,
+        )
+        startup_timings.update({f"generator_{k}": v for k, v in generator_timings.items()})
+        gen.metrics.MODEL_LOAD_SECONDS.set(round(time.perf_counter() - phase_start, 3))
+        print("✅ GPT-2 Text Generator loaded.")
+
+        startup_status = "warming"
+        phase_start = time.perf_counter()
+        print(f"   Summarizer warmup: {loaded_summarizer.warmup()}")
+        startup_timings["summarizer_warmup"] = round(time.perf_counter() - phase_start, 3)
+        phase_start = time.perf_counter()
+        print(f"   Generator warmup: {loaded_generate_engine.warmup(loaded_tokenizer, loaded_model)}")
+        startup_timings["generator_warmup"] = round(time.perf_counter() - phase_start, 3)
+    except Exception as e:
+        startup_status = "failed"
+        print(f"❌ Failed to load models: {e}")
+        return
+
+    profiler = summ.profiling.RequestProfiler.from_config()
+
+    # Each project's cache settings (SUMMARY_CACHE_PATH / GENERATION_CACHE_PATH)
+    summ_serving, gen_serving = summ.config.config.serving, gen.config.config.serving
+    summary_cache = generation_cache = None
+    if summ_serving.cache_enabled:
+        summary_cache = summ.cache.ResultCache(
+            max_entries=summ_serving.cache_max_entries,
+            ttl_seconds=summ_serving.cache_ttl_seconds,
+            shared_path=summ_serving.cache_shared_path,
+        )
+    if gen_serving.cache_enabled:
+        generation_cache = gen.cache.ResultCache(
+            max_entries=gen_serving.cache_max_entries,
+            ttl_seconds=gen_serving.cache_ttl_seconds,
+            shared_path=gen_serving.cache_shared_path,
+        )
+
+    executor = summ.executor.InferenceExecutor(
+        num_workers=config.num_workers,
+        torch_threads=config.torch_threads,
+        max_queue_size=config.max_queue_size,
+        retry_after=config.retry_after_seconds,
+    )
+
+    if summ_serving.batching_enabled:
+        # No max_pending: every batched request already holds a summarizer slot
+        batcher = summ.batching.MicroBatcher(
+            partial(summ.service.run_batch, loaded_summarizer),
+            max_batch_size=summ_serving.max_batch_size,
+            max_wait_ms=summ_serving.max_wait_ms,
+            executor=executor,
+        )
+        batcher.start()
+    # Jobs admitted per model; pipelines count for both
+    summ.metrics.QUEUE_DEPTH.set_function(lambda: limits.in_flight()[SUMMARIZER])
+    gen.metrics.QUEUE_DEPTH.set_function(lambda: limits.in_flight()[GENERATOR])
+
+    # Published last: handlers treat a set `summarize_service` as ready to serve
+    summarize_engine, generate_engine = loaded_summarize_engine, loaded_generate_engine
+    gen_tokenizer, gen_model = loaded_tokenizer, loaded_model
+    summarizer = loaded_summarizer
+    generate_service = gen.service.GenerationService(
+        tokenizer=loaded_tokenizer,
+        model=loaded_model,
+        engine=loaded_generate_engine,
+        submit=_submit_generation,
+        revision=gen.service.model_revision(loaded_model, config.generator_model_dir, backend="pytorch"),
+        cache=generation_cache,
+        profiler=profiler,
+    )
+    summarize_service = summ.service.SummarizationService(
+        summarizer=loaded_summarizer,
+        submit=partial(_submit, [SUMMARIZER]),
+        # Each batched request holds its own summarizer slot until its result is in
+        submit_batched=partial(_admit, [SUMMARIZER], batcher.submit) if batcher is not None else None,
+        cache=summary_cache,
+        profiler=profiler,
+    )
+    startup_timings["total"] = round(time.perf_counter() - startup_start, 3)
+    for phase, seconds in startup_timings.items():
+        summ.metrics.STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+    startup_status = "healthy"
+    print(f"✅ Ready in {startup_timings['total']}s: {startup_timings}")
+
+
+@app.on_event("shutdown")
+def stop_workers():
+    """Drain the micro-batching thread and the inference workers."""
+    if batcher is not None:
+        batcher.stop()
+    if executor is not None:
+        executor.shutdown()
+
+
+def _admit(models, submit, *args, **kwargs):
+    """
+    Call `submit(*args, **kwargs) -> Future` holding one slot of each of `models`.
+
+    The slots are freed when the future is done. Raises QueueFullError
+    (→ 503) before any work is queued if a model is at its cap or
+    `submit` rejects the work (shared pool or micro-batcher full).
+    """
+    release = limits.acquire(*models)
+    try:
+        future = submit(*args, **kwargs)
+    except Exception:
+        release()
+        raise
+    future.add_done_callback(release)
+    return future
+
+
+def _submit(models, fn, *args, **kwargs):
+    """Submit a job to the shared pool holding one slot of each of `models`."""
+    return _admit(models, executor.submit, fn, *args, **kwargs)
+
+
+def _submit_generation(fn, *args, **kwargs):
+    """
+    Submit a GPT-2 job holding a generator slot.
+
+    The shared pool and the limits raise the summarization project's
+    QueueFullError; the text generator's handlers only let their own
+    through as a 503, so it is re-raised as that.
+    """
+    try:
+        return _submit([GENERATOR], fn, *args, **kwargs)
+    except QueueFullError as e:
+        raise gen.executor.QueueFullError(e.retry_after) from None
+
+
+# --- Pipeline Stages (run inside one inference job) ---
+def _summarize_stage(text, max_length, num_beams):
+    """T5 stage: token ids stay on the summarizer side until the summary is decoded."""
+    start = time.perf_counter()
+    input_ids = summarize_engine.encode_texts([text], summarizer.tokenizer)
+    output_ids = summarize_engine.generate_sorted_ids(
+        input_ids,
+        summarizer.tokenizer,
+        summarizer.model,
+        max_length=max_length,
+        num_beams=num_beams,
+        early_stopping=summ.config.config.model.early_stopping,
+    )[0]
+    with summ.metrics.STAGE_SECONDS.time(stage="decode"):
+        summary = summarizer.tokenizer.decode(output_ids, skip_special_tokens=True)
+    return summary, {
+        "stage": "summarize",
+        "model": summ.config.config.model.model_name,
+        "input_tokens": len(input_ids[0]),
+        "output_tokens": len(output_ids),
+        "output": summary,
+        "processing_time": round(time.perf_counter() - start, 3),
+    }
+
+
+def _expand_stage(summary, max_length, temperature, top_k, top_p, seed):
+    """GPT-2 stage: token counts are of the prompt text and the cleaned output."""
+    start = time.perf_counter()
+    generated = generate_engine.generate_text(
+        summary,
+        gen_tokenizer,
+        gen_model,
+        seed=seed,
+        max_length=max_length,
+        temperature=temperature,
+        top_k=top_k,
+        top_p=top_p,
+    )
+    return generated, {
+        "stage": "expand",
+        "model": "gpt2-finetuned",
+        "input_tokens": len(gen_tokenizer.encode(summary)),
+        "output_tokens": len(gen_tokenizer.encode(generated)),
+        "output": generated,
+        "processing_time": round(time.perf_counter() - start, 3),
+    }
+
+
+def _run_pipeline(request):
+    """
+    Run both stages back to back in the calling worker thread.
+
+    T5 and GPT-2 have different vocabularies, so text (not token ids)
+    crosses from one model to the other — in memory, without an HTTP hop.
+    """
+    expand_params = dict(
+        max_length=request.max_length,
+        temperature=request.temperature,
+        top_k=request.top_k,
+        top_p=request.top_p,
+        seed=request.seed,
+    )
+    if request.mode == "summarize_expand":
+        summary, first = _summarize_stage(request.text, request.summary_max_length, request.num_beams)
+        output, second = _expand_stage(summary, **expand_params)
+    else:
+        expanded, first = _expand_stage(request.text, **expand_params)
+        output, second = _summarize_stage(expanded, request.summary_max_length, request.num_beams)
+    return output, [first, second]
+
+
+# --- Request / Response Schemas ---
+class PipelineRequest(BaseModel):
+    text: str = Field(..., min_length=5, description="Text to summarize, or summary to expand")
+    mode: Literal["summarize_expand", "expand_summarize"] = Field(
+        default="summarize_expand",
+        description="Summarize then expand the summary, or expand then re-summarize",
+    )
+    summary_max_length: int = Field(default=128, ge=10, le=512, description="Max summary length")
+    num_beams: int = Field(default=4, ge=1, le=10, description="Number of beams for beam search")
+    max_length: int = Field(default=200, ge=50, le=512, description="Max tokens to generate")
+    temperature: float = Field(default=0.7, ge=0.1, le=2.0, description="Sampling temperature")
+    top_k: int = Field(default=40, ge=1, le=100, description="Top-K filtering")
+    top_p: float = Field(default=0.90, ge=0.1, le=1.0, description="Nucleus sampling probability")
+    seed: Optional[int] = Field(default=None, ge=0, description="Random seed for reproducible sampling")
+
+
+class PipelineStage(BaseModel):
+    stage: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    output: str
+    processing_time: float
+
+
+class PipelineResponse(BaseModel):
+    mode: str
+    output: str
+    stages: List[PipelineStage]
+    processing_time: float
+
+
+class HealthResponse(BaseModel):
+    status: str
+    model_loaded: bool
+    model_name: str
+    models: Dict[str, bool]
+    in_flight: Dict[str, int]
+    cache: Optional[Dict[str, Optional[dict]]] = None
+    startup: Optional[dict] = None
+
+
+def _raise_not_ready(metrics):
+    metrics.ERRORS.inc(type="ModelNotLoaded")
+    if startup_status in ("loading", "warming"):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Models are {startup_status}. Please try again shortly.",
+            headers={"Retry-After": str(config.retry_after_seconds)},
+        )
+    raise HTTPException(status_code=503, detail="Models not loaded. Please try again later.")
+
+
+# --- Endpoints ---
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint: both projects' metrics, each under its own namespace."""
+    return Response(
+        content=summ.metrics.REGISTRY.render() + gen.metrics.REGISTRY.render(),
+        media_type=summ.metrics.CONTENT_TYPE,
+    )
+
+
+@app.get("/api/health", response_model=HealthResponse)
+@app.get("/api/generate/health", response_model=HealthResponse)
+def health_check(response: Response):
+    """Check API and model status (503 until both models are loaded and warmed up)."""
+    if startup_status != "healthy":
+        response.status_code = 503
+    return HealthResponse(
+        status=startup_status,
+        model_loaded=summarizer is not None,
+        model_name=f"{summ.config.config.model.model_name} + gpt2-finetuned",
+        models={SUMMARIZER: summarizer is not None, GENERATOR: gen_model is not None},
+        in_flight=limits.in_flight(),
+        cache={
+            SUMMARIZER: _cache_stats(summarize_service),
+            GENERATOR: _cache_stats(generate_service),
+        },
+        startup=startup_timings or None,
+    )
+
+
+def _cache_stats(service):
+    return service.cache.stats() if service is not None and service.cache is not None else None
+
+
+@app.post("/api/summarize", response_model=summ.service.SummarizeResponse)
+async def summarize(request: summ.service.SummarizeRequest, http_request: Request):
+    """Generate a summary for the provided text."""
+    if summarize_service is None:
+        _raise_not_ready(summ.metrics)
+    return await summ.service.summarize(summarize_service, request, http_request.headers)
+
+
+@app.post("/api/summarize/batch", response_model=summ.service.BatchSummarizeResponse)
+async def summarize_many(request: summ.service.BatchSummarizeRequest):
+    """Summarize a list of texts with shared generation settings (one summarizer job)."""
+    if summarize_service is None:
+        _raise_not_ready(summ.metrics)
+    return await summ.service.summarize_many(summarize_service, request)
+
+
+@app.post("/api/generate", response_model=gen.service.GenerateResponse)
+async def generate(request: gen.service.GenerateRequest, http_request: Request):
+    """Generate expanded text from a summary."""
+    if generate_service is None:
+        _raise_not_ready(gen.metrics)
+    return await gen.service.generate(generate_service, request, http_request.headers)
+
+
+@app.post("/api/generate/stream")
+def generate_stream(request: gen.service.GenerateRequest):
+    """Stream expanded text as newline-delimited JSON (a generator slot is held until generation ends)."""
+    if generate_service is None:
+        _raise_not_ready(gen.metrics)
+    return gen.service.generate_stream(generate_service, request)
+
+
+@app.post("/api/pipeline", response_model=PipelineResponse)
+async def pipeline(request: PipelineRequest, http_request: Request):
+    """Chain both models in one job: summarize → expand, or expand → re-summarize."""
+    if summarize_service is None:
+        _raise_not_ready(summ.metrics)
+    if request.mode == "summarize_expand" and len(request.text) < 10:
+        raise HTTPException(status_code=422, detail="Text to summarize must be at least 10 characters")
+
+    start_time = time.time()
+
+    capture = profiler.select(http_request.headers) if profiler is not None else None
+
+    try:
+        # One job holding a slot of both models: no second queue wait between stages
+        future = _submit(
+            [SUMMARIZER, GENERATOR],
+            profiler.wrap(capture, _run_pipeline) if capture is not None else _run_pipeline,
+            request,
+        )
+        output, stages = await asyncio.wrap_future(future)
+
+        return PipelineResponse(
+            mode=request.mode,
+            output=output,
+            stages=stages,
+            processing_time=round(time.time() - start_time, 3),
+        )
+
+    except QueueFullError:
+        raise
+
+    except Exception as e:
+        summ.metrics.ERRORS.inc(type=type(e).__name__)
+        raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
+
+    finally:
+        if capture is not None:
+            profiler.finish(capture, "/api/pipeline", time.time() - start_time)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8002)
@@ -0,0 +1,27 @@
+from dataclasses import dataclass
+import os
+
+
+@dataclass
+class CombinedConfig:
+    # Model sources. Both projects read HF_MODEL_REPO, which would point them at
+    # the same repo here — use these instead (None = each project's default)
+    summarizer_model_dir: str | None = os.environ.get("SUMMARIZER_MODEL_REPO")
+    generator_model_dir: str | None = os.environ.get("GENERATOR_MODEL_REPO")
+
+    # Shared inference pool for both models
+    num_workers: int = 2               # Concurrent jobs across both models
+    torch_threads: int | None = None   # torch.set_num_threads per worker (None = torch default)
+    max_queue_size: int = 16           # Jobs allowed to wait; beyond that → 503
+    retry_after_seconds: int = 1       # Retry-After header on rejection
+
+    # Per-model caps on admitted jobs (running or waiting), so a burst on one
+    # model can't take the whole pool. Pipelines hold a slot of both.
+    summarizer_max_concurrency: int = 12
+    generator_max_concurrency: int = 6
+
+    # Load both models in a background thread so health answers at once
+    background_startup: bool = os.environ.get("BACKGROUND_STARTUP", "1") == "1"
+
+
+config = CombinedConfig()
@@ -0,0 +1,72 @@
+"""
+Per-model admission limits on top of the shared inference pool.
+
+Both models share one InferenceExecutor, so without a cap a burst of
+GPT-2 requests could fill every worker and queue slot and starve the
+summarizer (or the other way round). Each model gets a fixed number of
+slots; a request takes its slots before it is submitted and frees them
+when its job is done. Rejection is immediate, like the executor's.
+"""
+
+import threading
+from contextlib import ExitStack
+
+
+class ModelLimits:
+    """
+    Non-blocking per-model concurrency caps.
+
+    Args:
+        limits: Dict of {model: max admitted jobs (running or waiting)}.
+        error_factory: Called with `retry_after` to build the exception
+            raised when a model is at its cap (the executor's
+            QueueFullError, so the API answers 503 the same way).
+        retry_after: Seconds suggested to rejected clients.
+    """
+
+    def __init__(self, limits, error_factory, retry_after=1):
+        self.limits = dict(limits)
+        self.retry_after = retry_after
+        self._error_factory = error_factory
+        self._slots = {model: threading.BoundedSemaphore(max(1, limit)) for model, limit in self.limits.items()}
+        self._lock = threading.Lock()
+        self._in_flight = {model: 0 for model in self.limits}
+
+    def in_flight(self):
+        """Admitted jobs per model."""
+        with self._lock:
+            return dict(self._in_flight)
+
+    def acquire(self, *models):
+        """
+        Take one slot of every model in `models`, all or nothing.
+
+        Returns:
+            Callable releasing the slots (call it exactly once, e.g. from
+            the job future's done callback).
+        """
+        with ExitStack() as taken:
+            for model in models:
+                if not self._slots[model].acquire(blocking=False):
+                    raise self._error_factory(self.retry_after)
+                taken.callback(self._slots[model].release)
+            # Every slot taken: keep them past the `with`
+            taken.pop_all()
+
+        with self._lock:
+            for model in models:
+                self._in_flight[model] += 1
+
+        released = []
+
+        def release(*_):
+            with self._lock:
+                if released:
+                    return
+                released.append(True)
+                for model in models:
+                    self._in_flight[model] -= 1
+            for model in models:
+                self._slots[model].release()
+
+        return release
@@ -0,0 +1,66 @@
+"""
+Import modules from the summarization and text_generator projects side by side.
+
+Both projects ship a top-level package named `src` (each is its own
+Docker build context), so they can't simply both be on sys.path. For
+each project, `load_project` temporarily makes that project's `src` the
+only one importable, imports the requested modules and then takes every
+`src.*` entry back out of sys.modules. The returned module objects keep
+working: their own imports were bound at import time. A project's
+modules are remembered, so loading more of it later reuses the same
+`src.config`, metrics registry, etc.
+
+Consequence: code in these modules must not import from `src` lazily at
+call time (the serving paths only use top-level imports).
+"""
+
+import importlib
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIRS = {
+    "summarization": os.path.join(ROOT_DIR, "summarization"),
+    "text_generator": os.path.join(ROOT_DIR, "text_generator"),
+}
+
+# sys.path / sys.modules are process-wide; one project import at a time
+_import_lock = threading.Lock()
+_project_modules = {project: {} for project in PROJECT_DIRS}
+
+
+def _is_src(name):
+    return name == "src" or name.startswith("src.")
+
+
+def load_project(project, modules):
+    """
+    Import `modules` (e.g. ["src.config", "src.inference.generate"]) from one project.
+
+    Returns:
+        SimpleNamespace mapping the last dotted component of each module
+        name to the module (e.g. `ns.config`, `ns.generate`).
+    """
+    project_dir = PROJECT_DIRS[project]
+    other_dirs = set(PROJECT_DIRS.values())
+
+    with _import_lock:
+        saved_path = list(sys.path)
+        saved_modules = {name: sys.modules.pop(name) for name in list(sys.modules) if _is_src(name)}
+        sys.modules.update(_project_modules[project])
+        # summarization/src has no __init__.py: with the other project on the path
+        # too, its regular `src` package would shadow this namespace package
+        sys.path[:] = [project_dir] + [
+            p for p in saved_path if os.path.abspath(p or os.getcwd()) not in other_dirs
+        ]
+        try:
+            loaded = {name.rsplit(".", 1)[-1]: importlib.import_module(name) for name in modules}
+        finally:
+            for name in [name for name in sys.modules if _is_src(name)]:
+                _project_modules[project][name] = sys.modules.pop(name)
+            sys.modules.update(saved_modules)
+            sys.path[:] = saved_path
+
+    return SimpleNamespace(**loaded)
@@ -6,14 +6,31 @@ Serves the fine-tuned T5 model for text summarization.
 import sys
 import os
 import time
+import threading
+from functools import partial
+from typing import Optional
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from transformers import T5Tokenizer, T5ForConditionalGeneration
+from fastapi.responses import Response
+from pydantic import BaseModel
 from src.config import config
+from src.inference import service as handlers
+from src.inference.batching import MicroBatcher
+from src.inference.cache import ResultCache
+from src.inference.executor import InferenceExecutor
+from src.inference.service import (
+    BatchSummarizeRequest,
+    BatchSummarizeResponse,
+    SummarizationService,
+    SummarizeRequest,
+    SummarizeResponse,
+)
+from src.monitoring import metrics
+from src.monitoring.http import add_profile_routes, add_queue_full_handler, add_request_metrics
+from src.monitoring.profiling import RequestProfiler
 
 # --- App Setup ---
 app = FastAPI(
@@ -32,94 +49,182 @@ app.add_middleware(
 )
 
 # --- Global Model State ---
-tokenizer = None
-model = None
+summarizer = None
+batcher = None
+executor = None
+cache = None
+profiler = None
+# Handler dependencies; set once the model is ready to serve
+service = None
+# "loading" → "warming" → "healthy" (or "failed"); timings in seconds per phase
+startup_status = "loading"
+startup_timings = {}
+# Set by serve.py in the parent before forking workers (weights shared copy-on-write)
+preloaded = None
+
+
+add_request_metrics(app, lambda path: metrics)
+add_queue_full_handler(app, lambda path: metrics)
+add_profile_routes(app, lambda: profiler)
 
 
 @app.on_event("startup")
+def start_model_loading():
+    """
+    Load the model at startup.
+
+    With `background_startup` the server starts answering right away:
+    health reports "loading" / "warming" (HTTP 503) until the model is
+    loaded and warmed up, and requests get 503 meanwhile.
+    """
+    if config.serving.background_startup:
+        threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+    else:
+        load_model()
+
+
+def load_weights(num_threads=None):
+    """Import the inference stack and load the model, without warmup or threads."""
+    load_start = time.perf_counter()
+    # torch / transformers are imported here rather than at module import,
+    # so uvicorn binds the port (and health answers) within a second
+    from src.inference.generate import Summarizer
+    startup_timings["imports"] = round(time.perf_counter() - load_start, 3)
+
+    # Offline mode (HF_HUB_OFFLINE=1, e.g. production with baked models) is honoured by load()
+    loaded = Summarizer.load(num_threads=num_threads or config.serving.torch_threads)
+    startup_timings.update(loaded.load_timings)
+    metrics.MODEL_LOAD_SECONDS.set(round(time.perf_counter() - load_start, 3))
+    print(f"✅ Model loaded successfully ({loaded.variant}).")
+    return loaded
+
+
 def load_model():
-    """Load the model once at startup."""
-    global tokenizer, model
+    """Load (unless preloaded) and warm up the model, then start serving."""
+    global summarizer, batcher, executor, cache, profiler, service, startup_status
+    startup_start = time.perf_counter()
     try:
-        # Check if we should force offline mode (e.g. in production with baked models)
-        offline_mode = os.environ.get("HF_HUB_OFFLINE") == "1"
-        
-        tokenizer = T5Tokenizer.from_pretrained(config.paths.model_dir, local_files_only=offline_mode)
-        model = T5ForConditionalGeneration.from_pretrained(config.paths.model_dir, local_files_only=offline_mode)
-        print("✅ Model loaded successfully.")
+        loaded = preloaded if preloaded is not None else load_weights()
+
+        startup_status = "warming"
+        phase_start = time.perf_counter()
+        warmup = loaded.warmup()
+        startup_timings["warmup"] = round(time.perf_counter() - phase_start, 3)
+        print(f"   Warmup: {warmup}")
     except Exception as e:
+        startup_status = "failed"
         print(f"❌ Failed to load model: {e}")
+        return
 
+    profiler = RequestProfiler.from_config()
 
-# --- Request / Response Schemas ---
-class SummarizeRequest(BaseModel):
-    text: str = Field(..., min_length=10, description="Text to summarize")
-    max_length: int = Field(default=128, ge=10, le=512, description="Max summary length")
-    num_beams: int = Field(default=4, ge=1, le=10, description="Number of beams for beam search")
+    if config.serving.cache_enabled:
+        cache = ResultCache(
+            max_entries=config.serving.cache_max_entries,
+            ttl_seconds=config.serving.cache_ttl_seconds,
+            shared_path=config.serving.cache_shared_path,
+        )
+
+    executor = InferenceExecutor(
+        num_workers=config.serving.num_workers,
+        torch_threads=config.serving.torch_threads,
+        max_queue_size=config.serving.max_queue_size,
+        retry_after=config.serving.retry_after_seconds,
+    )
+    metrics.QUEUE_DEPTH.set_function(lambda: executor.pending)
+
+    if config.serving.batching_enabled:
+        batcher = MicroBatcher(
+            partial(handlers.run_batch, loaded),
+            max_batch_size=config.serving.max_batch_size,
+            max_wait_ms=config.serving.max_wait_ms,
+            executor=executor,
+            max_pending=config.serving.max_batch_size * (
+                config.serving.num_workers + config.serving.max_queue_size
+            ),
+        )
+        batcher.start()
+
+    # Published last: handlers treat a set `service` as ready to serve
+    summarizer = loaded
+    service = SummarizationService(
+        summarizer=loaded,
+        submit=executor.submit,
+        submit_batched=batcher.submit if batcher is not None else None,
+        cache=cache,
+        profiler=profiler,
+    )
+    startup_timings["total"] = round(time.perf_counter() - startup_start, 3)
+    for phase, seconds in startup_timings.items():
+        metrics.STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+    startup_status = "healthy"
+    print(f"✅ Ready in {startup_timings['total']}s: {startup_timings}")
 
 
-class SummarizeResponse(BaseModel):
-    summary: str
-    input_length: int
-    output_length: int
-    processing_time: float
+@app.on_event("shutdown")
+def stop_workers():
+    """Drain the micro-batching thread and the inference workers."""
+    if batcher is not None:
+        batcher.stop()
+    if executor is not None:
+        executor.shutdown()
 
 
+# --- Request / Response Schemas ---
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     model_name: str
+    cache: Optional[dict] = None
+    startup: Optional[dict] = None
+
+
+def _raise_not_ready():
+    metrics.ERRORS.inc(type="ModelNotLoaded")
+    if startup_status in ("loading", "warming"):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is {startup_status}. Please try again shortly.",
+            headers={"Retry-After": str(config.serving.retry_after_seconds)},
+        )
+    raise HTTPException(status_code=503, detail="Model not loaded. Please try again later.")
 
 
 # --- Endpoints ---
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (per-stage latency, tokens, errors, queue)."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/health", response_model=HealthResponse)
-def health_check():
-    """Check API and model status."""
+def health_check(response: Response):
+    """Check API and model status (503 until the model is loaded and warmed up)."""
+    if startup_status != "healthy":
+        response.status_code = 503
     return HealthResponse(
-        status="healthy",
-        model_loaded=model is not None,
+        status=startup_status,
+        model_loaded=summarizer is not None,
         model_name=config.model.model_name,
+        cache=cache.stats() if cache is not None else None,
+        startup=startup_timings or None,
     )
 
 
 @app.post("/api/summarize", response_model=SummarizeResponse)
-def summarize(request: SummarizeRequest):
+async def summarize(request: SummarizeRequest, http_request: Request):
     """Generate a summary for the provided text."""
-    if tokenizer is None or model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded. Please try again later.")
+    if service is None:
+        _raise_not_ready()
+    return await handlers.summarize(service, request, http_request.headers)
 
-    start_time = time.time()
 
-    try:
-        input_text = "summarize: " + request.text
-        input_ids = tokenizer.encode(
-            input_text,
-            return_tensors="pt",
-            max_length=config.model.max_input_length,
-            truncation=True,
-        )
-
-        import torch
-        with torch.no_grad():
-            summary_ids = model.generate(
-                input_ids,
-                max_length=request.max_length,
-                num_beams=request.num_beams,
-                early_stopping=config.model.early_stopping,
-            )
-
-        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        processing_time = round(time.time() - start_time, 3)
-
-        return SummarizeResponse(
-            summary=summary,
-            input_length=len(request.text.split()),
-            output_length=len(summary.split()),
-            processing_time=processing_time,
-        )
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+@app.post("/api/summarize/batch", response_model=BatchSummarizeResponse)
+async def summarize_many(request: BatchSummarizeRequest):
+    """Summarize a list of texts with shared generation settings."""
+    if service is None:
+        _raise_not_ready()
+    return await handlers.summarize_many(service, request)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,12 @@
 import streamlit as st
 import sys
 import os
-from transformers import T5Tokenizer, T5ForConditionalGeneration
 
 # Ensure the project root is in the python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.config import config
+from src.inference.generate import Summarizer
 
 # Page config
 st.set_page_config(
@@ -17,33 +17,12 @@ st.set_page_config(
 
 @st.cache_resource
 def load_model():
-    """Load model and tokenizer only once to improve performance."""
+    """Load the summarizer only once to improve performance."""
     try:
-        tokenizer = T5Tokenizer.from_pretrained(config.paths.model_dir)
-        model = T5ForConditionalGeneration.from_pretrained(config.paths.model_dir)
-        return tokenizer, model
+        return Summarizer.load()
     except Exception as e:
         st.error(f"Error loading model: {e}")
-        return None, None
-
-def generate_summary(text, tokenizer, model):
-    """Generate summary for the given text."""
-    input_text = "summarize: " + text
-    input_ids = tokenizer.encode(
-        input_text, 
-        return_tensors="pt", 
-        max_length=config.model.max_input_length, 
-        truncation=True
-    )
-
-    summary_ids = model.generate(
-        input_ids,
-        max_length=config.model.max_target_length,
-        num_beams=config.model.num_beams,
-        early_stopping=config.model.early_stopping
-    )
-
-    return tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+        return None
 
 # --- UI Layout ---
 st.title("🤖 AI Text Summarizer")
@@ -54,18 +33,18 @@ text_input = st.text_area("Input Text", height=200, placeholder="Paste your text
 
 # Load Model
 with st.spinner("Loading model..."):
-    tokenizer, model = load_model()
+    summarizer = load_model()
 
 # Summarize Button
 if st.button("Summarize", type="primary"):
     if not text_input:
         st.warning("Please enter some text first.")
-    elif tokenizer is None or model is None:
+    elif summarizer is None:
         st.error("Model failed to load.")
     else:
         with st.spinner("Generating summary..."):
             try:
-                summary = generate_summary(text_input, tokenizer, model)
+                summary = summarizer.summarize(text_input)
                 st.subheader("Summary")
                 st.success(summary)
             except Exception as e:
@@ -1,57 +1,68 @@
+import random
+import time
+
 import numpy as np
-import evaluate
-from transformers import T5Tokenizer
+from transformers import T5TokenizerFast
 from src.config import config
+from src.evaluation.rouge_eval import rouge_scores, rouge_scores_text, tokenize_texts
+from src.training.trainer_utils import build_compute_metrics
+
+WORDS = (
+    "the coffee tea dog food great taste bad price value fresh box arrived "
+    "smell flavor sweet bitter love hate order again never best worst my cat"
+).split()
+
+
+def _random_text(rng, max_sentences=3):
+    sentences = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))).capitalize() + "."
+        for _ in range(rng.randint(1, max_sentences))
+    ]
+    return "\n".join(sentences)
+
 
 def test_metrics():
     print("Loading tokenizer...")
-    tokenizer = T5Tokenizer.from_pretrained(config.model.model_name)
-    
-    print("Loading rouge metric...")
-    try:
-        rouge = evaluate.load("rouge")
-    except Exception as e:
-        print(f"Failed to load rouge: {e}")
-        return
+    tokenizer = T5TokenizerFast.from_pretrained(config.model.model_name)
 
     print("Generating dummy predictions and labels...")
     # Simulate a batch of 2 examples
-    # Preds: "hello world", "failed summary"
-    # Labels: "hello world", "summary"
-    
     preds_text = ["hello world", "failed summary"]
     labels_text = ["hello world", "summary"]
-    
+
     preds = tokenizer(preds_text, padding="max_length", max_length=128, return_tensors="np")["input_ids"]
     labels = tokenizer(labels_text, padding="max_length", max_length=128, return_tensors="np")["input_ids"]
-    
+
     # Replace padding with -100 in labels as per Trainer standard
     labels = np.where(labels == tokenizer.pad_token_id, -100, labels)
-    
-    # Mock eval_preds
-    eval_preds = (preds, labels)
-    
-    print("Running compute_metrics logic...")
-    
+
+    print("Running compute_metrics...")
     try:
-        # Simplified logic from trainer_utils.py
-        decoded_preds = tokenizer.batch_decode(preds, skip_special_tokens=True)
-        
-        # Restore labels from -100
-        labels = np.where(labels != -100, labels, tokenizer.pad_token_id)
-        decoded_labels = tokenizer.batch_decode(labels, skip_special_tokens=True)
-        
-        print(f"Decoded Preds: {decoded_preds}")
-        print(f"Decoded Labels: {decoded_labels}")
-        
-        result = rouge.compute(predictions=decoded_preds, references=decoded_labels)
+        result = build_compute_metrics(tokenizer)((preds, labels))
         print("Metrics computed successfully:")
         print(result)
-        
     except Exception as e:
         print(f"CRASHED in compute_metrics logic: {e}")
         import traceback
         traceback.print_exc()
 
+
+def test_speed(num_pairs=5000, seed=0):
+    rng = random.Random(seed)
+    preds = [_random_text(rng, 1) for _ in range(num_pairs)]
+    refs = [_random_text(rng, 1) for _ in range(num_pairs)]
+
+    start = time.perf_counter()
+    result = rouge_scores_text(preds, refs)
+    print(f"{num_pairs} pairs scored in {time.perf_counter() - start:.2f}s: {result}")
+
+    pred_ids, vocab = tokenize_texts(preds)
+    ref_ids, _ = tokenize_texts(refs, vocab)
+    start = time.perf_counter()
+    rouge_scores(pred_ids, ref_ids, num_workers=1)
+    print(f"  single process: {time.perf_counter() - start:.2f}s")
+
+
 if __name__ == "__main__":
     test_metrics()
+    test_speed()
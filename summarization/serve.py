@@ -0,0 +1,71 @@
+"""
+Multi-worker launcher for the Summarization API with shared model weights.
+
+Loads the T5 weights once in this process, then forks the uvicorn
+workers so they share one copy of the weights (see
+src/inference/prefork.py). Use instead of `uvicorn api:app --workers N`:
+
+    python serve.py --workers 4
+    python serve.py --workers 4 --threads 2 --memory-report 60
+
+Workers default to $WEB_CONCURRENCY (1). With CUDA or the ONNX backend
+every worker loads its own copy, since neither survives a fork.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import api
+from src.config import config
+from src.inference.prefork import run_prefork
+
+
+def can_share_weights():
+    """Fork-after-load only works for PyTorch on CPU."""
+    if config.model.backend == "onnx":
+        return False
+    import torch
+    return not torch.cuda.is_available()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Summarization API from forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--threads", type=int, default=config.serving.torch_threads,
+                        help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--memory-report", type=float, default=None,
+                        help="Seconds between per-worker memory reports (default: once)")
+    parser.add_argument("--no-share", action="store_true", help="Load the weights in every worker")
+    args = parser.parse_args()
+
+    preload = None
+    if not args.no_share:
+        if can_share_weights():
+            def preload():
+                # One thread: no OpenMP pool may exist when the workers are forked
+                api.preloaded = api.load_weights(num_threads=1)
+        else:
+            print("⚠️ CUDA / ONNX Runtime can't be shared across a fork; each worker loads its own model.")
+
+    run_prefork(
+        api.app,
+        preload=preload,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads=args.threads,
+        memory_report_interval=args.memory_report,
+        restart_backoff=config.serving.worker_restart_backoff,
+        max_restart_backoff=config.serving.worker_restart_backoff_max,
+        max_failures=config.serving.worker_max_failures,
+        failure_window=config.serving.worker_failure_window,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,17 @@ class ModelConfig:
     num_beams: int = 4
     early_stopping: bool = True
 
+    # Long-document map-reduce (token windows over the input)
+    long_doc_chunk_size: int = 480      # Tokens per window (fits max_input_length with prefix)
+    long_doc_chunk_overlap: int = 64    # Tokens shared by neighbouring windows
+    long_doc_max_depth: int = 3         # Max reduce rounds before truncating
+
+    # Inference-time quantization: None (fp32) or "int8-dynamic"
+    quantization: str | None = os.environ.get("MODEL_QUANTIZATION") or None
+
+    # Inference backend: "pytorch" (eager) or "onnx" (ONNX Runtime, see paths.onnx_dir)
+    backend: str = os.environ.get("MODEL_BACKEND", "pytorch")
+
 
 @dataclass
 class TrainingConfig:
@@ -36,6 +47,7 @@ class TrainingConfig:
 
     # Validation
     validation_split: float = 0.1
+    split_seed: int = 42            # Same split for training and offline evaluation
 
     # Logging
     logging_steps: int = 50
@@ -55,6 +67,70 @@ class DataConfig:
     # Optional dataset limit 
     max_samples: int | None = 5000
 
+    # Streaming CSV reader (see src/data/load_data.py)
+    read_chunk_size: int = 50_000   # Rows per chunk (pandas engine)
+    csv_engine: str = "auto"        # "auto" (pyarrow if installed), "pyarrow" or "pandas"
+    sampling: str = "head"          # "head" (first rows) or "reservoir" (uniform sample)
+    sample_seed: int = 42
+
+    # Cleaning / deduplication (see src/data/preprocess.py)
+    dedupe_exact: bool = True
+    dedupe_near: bool = True
+    near_dup_threshold: float = 0.8   # Estimated Jaccard similarity of word 5-grams
+    minhash_num_perm: int = 64
+    minhash_bands: int = 16           # LSH bands (num_perm / bands rows each)
+    dedupe_max_entries: int | None = 100_000  # Texts remembered (~1 KB each); oldest forgotten first
+
+    # Tokenization processes for Dataset.map (None = single process)
+    num_proc: int | None = None
+
+
+@dataclass
+class ServingConfig:
+    # Dynamic micro-batching for /api/summarize
+    batching_enabled: bool = True
+    max_batch_size: int = 8        # Max requests gathered into one generate call
+    max_wait_ms: float = 10.0      # How long the first request waits for company
+
+    # /api/summarize/batch
+    max_batch_items: int = 64      # Max texts accepted per batch request
+    batch_chunk_size: int = 16     # Texts per generate call (sorted by length)
+
+    # Inference executor / backpressure
+    num_workers: int = 1           # Concurrent generate calls
+    torch_threads: int | None = None  # torch.set_num_threads per worker (None = torch default)
+
+    # serve.py: re-fork exited workers after a backoff doubling per recent exit;
+    # exit 1 once one worker slot fails worker_max_failures times in the window
+    worker_restart_backoff: float = 1.0       # Seconds before the first restart
+    worker_restart_backoff_max: float = 30.0
+    worker_max_failures: int = 5
+    worker_failure_window: float = 300.0      # Seconds
+    max_queue_size: int = 16       # Requests allowed to wait; beyond that → 503
+    retry_after_seconds: int = 1   # Retry-After header on rejection
+
+    # Result cache (in-process LRU + optional shared SQLite tier)
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 3600
+    # Set SUMMARY_CACHE_PATH to share entries across uvicorn workers
+    cache_shared_path: str | None = os.environ.get("SUMMARY_CACHE_PATH")
+
+    # Cold start: load in a background thread so health checks answer at once
+    # ("loading" → "warming" → "healthy"); off = load before serving
+    background_startup: bool = os.environ.get("BACKGROUND_STARTUP", "1") == "1"
+    warmup_input_lengths: tuple = (64, 256, 512)  # Input tokens per warmup generate
+    warmup_max_length: int = 32                    # Summary tokens per warmup generate
+
+    # Opt-in request profiling (disabled = no per-request hooks at all)
+    profiling_enabled: bool = os.environ.get("PROFILING_ENABLED") == "1"
+    profile_mode: str = os.environ.get("PROFILE_MODE", "stack")  # "stack" (py-spy style) or "torch"
+    profile_sample_every: int = 0          # Profile 1 in N requests (0 = off)
+    profile_slow_ms: float | None = None   # Profile all, keep traces slower than this
+    profile_header: str = "X-Profile"      # "X-Profile: 1" forces a trace for one request
+    profile_buffer_size: int = 20          # Traces kept in memory (oldest dropped)
+    profile_interval_ms: float = 5.0       # Stack sampling interval
+
 
 @dataclass
 class PathConfig:
@@ -65,6 +141,12 @@ class PathConfig:
         os.path.join(_SUMMARIZATION_DIR, "models", "t5-small")
     )
 
+    # Exported ONNX model (used when model.backend == "onnx")
+    onnx_dir: str = os.environ.get(
+        "ONNX_MODEL_DIR",
+        os.path.join(_SUMMARIZATION_DIR, "models", "t5-small-onnx")
+    )
+
     # HuggingFace Hub repo ID (for reference / upload scripts)
     hf_repo_id: str = _HF_REPO_ID
 
@@ -82,6 +164,7 @@ class Config:
     model: ModelConfig = field(default_factory=ModelConfig)
     training: TrainingConfig = field(default_factory=TrainingConfig)
     data: DataConfig = field(default_factory=DataConfig)
+    serving: ServingConfig = field(default_factory=ServingConfig)
     paths: PathConfig = field(default_factory=PathConfig)
 
 
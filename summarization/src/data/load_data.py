@@ -0,0 +1,42 @@
+"""
+Streaming CSV loading for the summarization dataset.
+
+Only the text and summary columns are read, chunk by chunk, keeping the
+first `max_samples` rows ("head") or a uniform sample over the whole
+file ("reservoir"); see src/data/csv_stream.py. Memory stays flat
+regardless of the file size.
+"""
+
+from datasets import Dataset
+
+from src.config import config
+from src.data.csv_stream import stream_csv
+
+
+def load_dataset_from_csv(data_path=None, max_samples=None, sampling=None, transform=None):
+    """
+    Load the text/summary columns of the raw CSV as a HuggingFace Dataset.
+
+    `transform` is applied to each chunk before sampling (see stream_csv),
+    so `max_samples` counts rows that survive it.
+
+    Returns a Dataset with the configured text and summary columns.
+    """
+    data_path = data_path or config.data.raw_data_path
+    max_samples = max_samples or config.data.max_samples
+    columns = [config.data.text_column, config.data.summary_column]
+
+    print(f"Loading data from: {data_path}")
+    df = stream_csv(
+        data_path,
+        columns,
+        max_samples=max_samples,
+        sampling=sampling or config.data.sampling,
+        seed=config.data.sample_seed,
+        transform=transform,
+        chunk_size=config.data.read_chunk_size,
+        engine=config.data.csv_engine,
+    )
+    print(f"Loaded samples: {len(df)}")
+
+    return Dataset.from_pandas(df, preserve_index=False)
@@ -0,0 +1,342 @@
+"""
+Cleaning, deduplication and tokenization for the summarization dataset.
+
+Pipeline (applied chunk by chunk while the raw CSV is streamed):
+  1. normalize_text: strip HTML remnants (Amazon reviews contain <br />),
+     unify unicode and collapse whitespace.
+  2. Drop degenerate pairs: empty / letter-free summaries, summaries that
+     repeat the text, and summaries that are not shorter than the text.
+  3. Deduplicator: drop exact duplicates (same normalized, lower-cased
+     text) and near duplicates (MinHash over word shingles with LSH
+     banding, confirmed by the estimated Jaccard similarity). It
+     remembers at most `dedupe_max_entries` kept texts, so memory stays
+     bounded when "reservoir" sampling scans the whole file; a duplicate
+     further apart than that is not caught.
+  4. Tokenize with `Dataset.map(num_proc=...)`.
+
+The result is saved with `save_to_disk` under
+`{config.data.processed_data_path}/tokenized-{fingerprint}`. The
+fingerprint covers the raw file (path, size, mtime), the cleaning and
+deduplication settings and the tokenizer, so later runs reuse the cache
+and any change rebuilds it. If the raw file is gone, the newest cache
+built from that path with the same settings is used.
+
+Usage (from summarization/):
+    python -m src.data.preprocess            # build (or reuse) the cache
+    python -m src.data.preprocess --force    # rebuild
+"""
+
+import sys
+import os
+
+# Ensure the project root is in the python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+import argparse
+import glob
+import hashlib
+import html
+import json
+import re
+import shutil
+import unicodedata
+import zlib
+
+import numpy as np
+from datasets import load_from_disk
+
+from src.config import config
+from src.data.load_data import load_dataset_from_csv
+from src.training.trainer_utils import build_preprocess_function
+
+# Bump when the cleaning logic changes so old caches are not reused
+PREPROCESS_VERSION = 1
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\w+")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+# MinHash hashing: h(x) = (a * x + b) mod p over 32-bit shingle hashes
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def normalize_text(text):
+    """Unescape HTML, drop tags, apply NFKC and collapse whitespace."""
+    text = html.unescape(str(text))
+    text = _TAG_RE.sub(" ", text)
+    text = unicodedata.normalize("NFKC", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def is_degenerate(text, summary):
+    """True for summaries that teach the model nothing useful."""
+    if not _LETTER_RE.search(summary):
+        return True
+    text_key, summary_key = text.lower(), summary.lower()
+    if summary_key == text_key:
+        return True
+    return len(_WORD_RE.findall(summary_key)) >= len(_WORD_RE.findall(text_key))
+
+
+class Deduplicator:
+    """
+    Stateful exact + near-duplicate filter over a stream of chunks.
+
+    Exact duplicates are detected with a set of text digests. Near
+    duplicates use MinHash signatures (`num_perm` hash functions over
+    word `shingle_size`-grams) split into `bands` LSH bands; a text that
+    shares a band with an earlier kept text is dropped when their
+    estimated Jaccard similarity reaches `threshold`. The first
+    occurrence is always kept.
+
+    With `max_entries` set, only that many kept texts are remembered
+    (oldest forgotten first), bounding memory on long streams.
+    """
+
+    def __init__(self, exact=True, near=True, threshold=0.8, num_perm=64, bands=16,
+                 shingle_size=5, seed=42, max_entries=None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.exact = exact
+        self.near = near
+        self.threshold = threshold
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        # Insertion-ordered, so the oldest entries are evicted first
+        self.seen_digests = {}
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+        self._next_id = 0
+        self.exact_removed = 0
+        self.near_removed = 0
+
+    def _signature(self, words):
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature):
+        return [
+            signature[i * self.rows_per_band:(i + 1) * self.rows_per_band].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def _is_near_duplicate(self, signature):
+        band_keys = self._band_keys(signature)
+        candidates = set()
+        for bucket, key in zip(self.buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+
+        for candidate in candidates:
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                return True
+
+        doc_id = self._next_id
+        self._next_id += 1
+        self.signatures[doc_id] = signature
+        for bucket, key in zip(self.buckets, band_keys):
+            bucket.setdefault(key, []).append(doc_id)
+
+        if self.max_entries is not None and len(self.signatures) > self.max_entries:
+            self._forget_oldest_signature()
+        return False
+
+    def _forget_oldest_signature(self):
+        doc_id = next(iter(self.signatures))
+        signature = self.signatures.pop(doc_id)
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            # Ids are appended in order, so the oldest is first in its bucket
+            doc_ids = bucket[key]
+            doc_ids.pop(0)
+            if not doc_ids:
+                del bucket[key]
+
+    def keep(self, text):
+        """Return True the first time a text (or a close variant) is seen."""
+        key = text.lower()
+        if self.exact:
+            digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+            if digest in self.seen_digests:
+                self.exact_removed += 1
+                return False
+            self.seen_digests[digest] = None
+            if self.max_entries is not None and len(self.seen_digests) > self.max_entries:
+                del self.seen_digests[next(iter(self.seen_digests))]
+
+        if self.near and self._is_near_duplicate(self._signature(_WORD_RE.findall(key))):
+            self.near_removed += 1
+            return False
+        return True
+
+
+def build_cleaner(deduplicator=None):
+    """
+    Return (clean_chunk, stats): a chunk transform for `stream_csv` and
+    the counters it updates.
+    """
+    text_col, summary_col = config.data.text_column, config.data.summary_column
+    stats = {"rows": 0, "degenerate": 0}
+
+    def clean_chunk(chunk):
+        stats["rows"] += len(chunk)
+        chunk = chunk.assign(**{
+            text_col: chunk[text_col].map(normalize_text),
+            summary_col: chunk[summary_col].map(normalize_text),
+        })
+
+        keep = np.array([
+            not is_degenerate(text, summary)
+            for text, summary in zip(chunk[text_col], chunk[summary_col])
+        ], dtype=bool)
+        stats["degenerate"] += int((~keep).sum())
+        chunk = chunk[keep]
+
+        if deduplicator is not None:
+            keep = np.array([deduplicator.keep(text) for text in chunk[text_col]], dtype=bool)
+            chunk = chunk[keep]
+        return chunk
+
+    return clean_chunk, stats
+
+
+def _cache_settings(tokenizer, data_path):
+    """Raw file identity, cleaning settings and tokenizer that a cache was built from."""
+    # size / mtime are None when the raw file is missing (see _find_cache_without_raw)
+    stat = os.stat(data_path) if os.path.exists(data_path) else None
+    return {
+        "version": PREPROCESS_VERSION,
+        "raw": [
+            os.path.abspath(data_path),
+            stat.st_size if stat else None,
+            stat.st_mtime_ns if stat else None,
+        ],
+        "columns": [config.data.text_column, config.data.summary_column],
+        "sampling": [config.data.max_samples, config.data.sampling, config.data.sample_seed],
+        "dedupe": [
+            config.data.dedupe_exact,
+            config.data.dedupe_near,
+            config.data.near_dup_threshold,
+            config.data.minhash_num_perm,
+            config.data.minhash_bands,
+            config.data.dedupe_max_entries,
+        ],
+        "lengths": [config.model.max_input_length, config.model.max_target_length],
+        # The class is part of it: slow and fast T5 tokenizers can split some
+        # whitespace differently, so switching between them rebuilds the cache
+        "tokenizer": [type(tokenizer).__name__, tokenizer.name_or_path, len(tokenizer)],
+    }
+
+
+def _fingerprint(settings):
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()[:16]
+
+
+def _find_cache_without_raw(settings):
+    """Newest cache built from the same raw path with the same settings, or None."""
+    matches = []
+    for settings_path in glob.glob(os.path.join(config.data.processed_data_path, "tokenized-*.json")):
+        try:
+            with open(settings_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if cached.get("raw", [None])[0] != settings["raw"][0]:
+            continue
+        if {**cached, "raw": None} == {**settings, "raw": None} and os.path.isdir(settings_path[:-5]):
+            matches.append(settings_path[:-5])
+    return max(matches, key=os.path.getmtime, default=None)
+
+
+def load_processed_dataset(tokenizer, data_path=None, force=False):
+    """
+    Load the cleaned, deduplicated and tokenized dataset, building it if needed.
+
+    Returns:
+        HuggingFace Dataset with the text/summary columns plus
+        input_ids, attention_mask and labels.
+    """
+    data_path = data_path or config.data.raw_data_path
+    settings = _cache_settings(tokenizer, data_path)
+    cache_path = os.path.join(config.data.processed_data_path, f"tokenized-{_fingerprint(settings)}")
+
+    if os.path.isdir(cache_path) and not force:
+        print(f"Using processed dataset cache: {cache_path}")
+        return load_from_disk(cache_path)
+
+    if not os.path.exists(data_path):
+        cached = None if force else _find_cache_without_raw(settings)
+        if cached is None:
+            raise FileNotFoundError(
+                f"Raw data not found: {data_path} (and no processed cache was built from it)."
+            )
+        print(f"⚠️ Raw data not found: {data_path}; using processed dataset cache: {cached}")
+        return load_from_disk(cached)
+
+    deduplicator = None
+    if config.data.dedupe_exact or config.data.dedupe_near:
+        deduplicator = Deduplicator(
+            exact=config.data.dedupe_exact,
+            near=config.data.dedupe_near,
+            threshold=config.data.near_dup_threshold,
+            num_perm=config.data.minhash_num_perm,
+            bands=config.data.minhash_bands,
+            max_entries=config.data.dedupe_max_entries,
+        )
+    clean_chunk, stats = build_cleaner(deduplicator)
+
+    dataset = load_dataset_from_csv(data_path, transform=clean_chunk)
+    print(f"Rows cleaned: {stats['rows']}")
+    print(f"  Degenerate summaries removed: {stats['degenerate']}")
+    if deduplicator is not None:
+        print(f"  Exact duplicates removed: {deduplicator.exact_removed}")
+        print(f"  Near duplicates removed: {deduplicator.near_removed}")
+
+    dataset = dataset.map(
+        build_preprocess_function(tokenizer, config),
+        batched=True,
+        num_proc=config.data.num_proc,
+        desc="Tokenizing",
+    )
+
+    # Write to a temp dir and rename, so an interrupted run leaves no partial cache
+    tmp_path = cache_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    dataset.save_to_disk(tmp_path)
+    shutil.rmtree(cache_path, ignore_errors=True)
+    os.replace(tmp_path, cache_path)
+    # Lets the cache be found by its settings if the raw file goes away
+    with open(cache_path + ".json", "w") as f:
+        json.dump(settings, f, indent=2)
+    print(f"✅ Processed dataset saved to: {cache_path}")
+
+    return load_from_disk(cache_path)
+
+
+def main():
+    from transformers import T5TokenizerFast
+
+    parser = argparse.ArgumentParser(description="Clean, deduplicate and tokenize the dataset")
+    parser.add_argument("--data-path", default=None)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if a cache exists")
+    args = parser.parse_args()
+
+    tokenizer = T5TokenizerFast.from_pretrained(config.model.model_name)
+    dataset = load_processed_dataset(tokenizer, args.data_path, force=args.force)
+    print(f"Samples: {len(dataset)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Compare quantized and fp32 T5 inference.
+
+Each variant is loaded in a fresh process so RSS numbers are not skewed
+by the other model. Both summarize the same validation texts; the report
+gives load time, RSS, per-request latency and ROUGE for each variant,
+plus the deltas against fp32.
+
+Usage (from summarization/):
+    python -m src.evaluation.quantization_report --samples 50 --output quant.json
+"""
+
+import sys
+import os
+
+# Ensure the project root is in the python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+import argparse
+import json
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from src.config import config
+from src.data.csv_stream import iter_csv_chunks
+from src.evaluation.rouge_eval import rouge_scores_text
+from src.inference.quantization import SUPPORTED_QUANTIZATION
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run_variant(mode, texts, threads):
+    """Load the model with the given quantization mode and time summarization."""
+    from src.inference.generate import Summarizer
+    from src.monitoring.memory import rss_mb
+
+    rss_before = rss_mb()
+    load_start = time.perf_counter()
+    summarizer = Summarizer.load(
+        backend="pytorch", quantization=mode or "fp32", device="cpu", num_threads=threads
+    )
+    load_time = time.perf_counter() - load_start
+
+    # Warm up once so lazy initialization doesn't land in the first sample
+    summarizer.warmup()
+
+    predictions, latencies = [], []
+    for text in texts:
+        start = time.perf_counter()
+        predictions.append(summarizer.summarize(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "mode": mode or "fp32",
+        "load_time_s": round(load_time, 3),
+        "model_rss_mb": round(rss_mb() - rss_before, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 1),
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+        },
+        "predictions": predictions,
+    }
+
+
+def _load_samples(num_samples):
+    """Last `num_samples` rows of the raw CSV, streamed so only one chunk is in memory."""
+    # Take from the end so samples are unlikely to have been trained on
+    columns = [config.data.text_column, config.data.summary_column]
+    tail = pd.DataFrame(columns=columns)
+    for chunk in iter_csv_chunks(
+        config.data.raw_data_path, columns, config.data.read_chunk_size, config.data.csv_engine
+    ):
+        tail = pd.concat([tail, chunk] if len(tail) else [chunk]).tail(num_samples)
+    return tail[config.data.text_column].tolist(), tail[config.data.summary_column].tolist()
+
+
+def compare(mode="int8-dynamic", num_samples=50, threads=None):
+    """Run fp32 and `mode` side by side and return the report dict."""
+    texts, references = _load_samples(num_samples)
+
+    variants = []
+    for variant_mode in (None, mode):
+        # A fresh spawned process per variant keeps RSS measurements clean
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            result = pool.submit(_run_variant, variant_mode, texts, threads).result()
+
+        scores = rouge_scores_text(result.pop("predictions"), references)
+        result["rouge"] = {k: round(scores[k], 4) for k in ("rouge1", "rouge2", "rougeL")}
+        variants.append(result)
+
+    baseline, quantized = variants
+    return {
+        "num_samples": len(texts),
+        "variants": variants,
+        "delta": {
+            "model_rss_mb": round(quantized["model_rss_mb"] - baseline["model_rss_mb"], 1),
+            "latency_p50_ms": round(quantized["latency_ms"]["p50"] - baseline["latency_ms"]["p50"], 1),
+            "latency_speedup": round(baseline["latency_ms"]["mean"] / quantized["latency_ms"]["mean"], 2),
+            **{
+                k: round(quantized["rouge"][k] - baseline["rouge"][k], 4)
+                for k in baseline["rouge"]
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quantized vs fp32 T5 inference")
+    parser.add_argument("--mode", default="int8-dynamic", choices=SUPPORTED_QUANTIZATION)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads value")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = compare(args.mode, args.samples, args.threads)
+
+    print("=" * 60)
+    print(f"{'variant':<14}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'rougeL':>9}")
+    for v in report["variants"]:
+        print(
+            f"{v['mode']:<14}{v['load_time_s']:>8}{v['model_rss_mb']:>9}"
+            f"{v['latency_ms']['p50']:>9}{v['latency_ms']['p95']:>9}{v['rouge']['rougeL']:>9}"
+        )
+    print("-" * 60)
+    print(f"Delta vs fp32: {report['delta']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
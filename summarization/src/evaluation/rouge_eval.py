@@ -0,0 +1,444 @@
+"""
+Local ROUGE-1/2/L/Lsum scoring on token IDs.
+
+Follows the definitions of Google's `rouge_score` package (the scorer
+behind `evaluate.load("rouge")`) without its network download or its
+per-pair pure-Python loops:
+  - Predictions and references are scored as sequences of integer ids,
+    so Trainer outputs are scored directly without a decode/re-tokenize
+    round trip. Scores on T5 subword ids differ from word-level ROUGE
+    (training reports them as rouge1_tok, ...); `rouge_scores_text`
+    tokenizes text the way `rouge_score` does and matches it exactly
+    (tests/test_rouge_eval.py checks the parity).
+  - ROUGE-N counts n-grams with numpy: each n-gram is packed into one
+    int64 key and overlaps come from np.unique / np.intersect1d.
+  - ROUGE-L uses a bit-parallel LCS (one big-int add/or per token), i.e.
+    O(m·n / word size) instead of the O(m·n) dynamic-programming table.
+  - ROUGE-Lsum splits on sentence separator ids and uses the union-LCS
+    of `rouge_score`; with a single sentence it equals ROUGE-L.
+  - Large evaluation sets are split across a process pool.
+
+Scores are F-measures averaged over pairs, like `evaluate`'s aggregated
+output.
+
+Run as a script it evaluates a checkpoint offline: summaries for the
+validation split are generated in length-sorted batches, scored, and
+written with throughput numbers to JSON.
+
+Usage (from summarization/):
+    python -m src.evaluation.rouge_eval --output eval.json
+    python -m src.evaluation.rouge_eval --model-dir models/t5-small-finetuned/checkpoint-500
+    python -m src.evaluation.rouge_eval --all-checkpoints --num-beams 1
+"""
+
+import sys
+import os
+
+# Ensure the project root is in the python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from src.config import config
+
+ROUGE_TYPES = ("rouge1", "rouge2", "rougeL", "rougeLsum")
+
+# Pairs per process-pool task, and the set size from which a pool is used
+_CHUNK_SIZE = 512
+_PARALLEL_THRESHOLD = 2000
+
+# n-gram keys pack ids in base 2^31, so ROUGE-2 keys fit in int64
+_KEY_BASE = 1 << 31
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _fmeasure(hits, pred_count, ref_count):
+    precision = hits / max(pred_count, 1)
+    recall = hits / max(ref_count, 1)
+    if precision + recall == 0:
+        return 0.0
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngram_keys(ids, n):
+    if len(ids) < n:
+        return np.empty(0, dtype=np.int64)
+    keys = ids[:len(ids) - n + 1].copy()
+    for k in range(1, n):
+        keys = keys * _KEY_BASE + ids[k:len(ids) - n + 1 + k]
+    return keys
+
+
+def _ngram_overlap(pred_keys, ref_keys):
+    pred_unique, pred_counts = np.unique(pred_keys, return_counts=True)
+    ref_unique, ref_counts = np.unique(ref_keys, return_counts=True)
+    _, pred_idx, ref_idx = np.intersect1d(
+        pred_unique, ref_unique, assume_unique=True, return_indices=True
+    )
+    return int(np.minimum(pred_counts[pred_idx], ref_counts[ref_idx]).sum())
+
+
+def _rouge_n(pred, ref, n):
+    pred_keys, ref_keys = _ngram_keys(pred, n), _ngram_keys(ref, n)
+    hits = _ngram_overlap(pred_keys, ref_keys)
+    return _fmeasure(hits, len(pred_keys), len(ref_keys))
+
+
+def lcs_length(a, b):
+    """
+    Length of the longest common subsequence, bit-parallel.
+
+    Bit i of `v` tracks row i of the DP table for `a`; each token of `b`
+    updates all rows at once with one addition (Hyyrö's formulation).
+    """
+    if not a or not b:
+        return 0
+    match = {}
+    for i, token in enumerate(a):
+        match[token] = match.get(token, 0) | (1 << i)
+
+    full = (1 << len(a)) - 1
+    v = full
+    for token in b:
+        u = v & match.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def _lcs_positions(ref, pred):
+    """Indices of `ref` on one LCS with `pred` (same backtracking as rouge_score)."""
+    rows, cols = len(ref), len(pred)
+    table = [[0] * (cols + 1) for _ in range(rows + 1)]
+    for i in range(1, rows + 1):
+        row, prev = table[i], table[i - 1]
+        for j in range(1, cols + 1):
+            if ref[i - 1] == pred[j - 1]:
+                row[j] = prev[j - 1] + 1
+            else:
+                row[j] = max(prev[j], row[j - 1])
+
+    positions = []
+    i, j = rows, cols
+    while i > 0 and j > 0:
+        if ref[i - 1] == pred[j - 1]:
+            positions.append(i - 1)
+            i -= 1
+            j -= 1
+        elif table[i][j - 1] > table[i - 1][j]:
+            j -= 1
+        else:
+            i -= 1
+    return positions
+
+
+def _rouge_lsum(pred_sents, ref_sents):
+    pred_count = sum(map(len, pred_sents))
+    ref_count = sum(map(len, ref_sents))
+    if not pred_count or not ref_count:
+        return 0.0
+
+    pred_tokens = Counter(t for sent in pred_sents for t in sent)
+    ref_tokens = Counter(t for sent in ref_sents for t in sent)
+    hits = 0
+    for ref in ref_sents:
+        union = set()
+        for pred in pred_sents:
+            union.update(_lcs_positions(ref, pred))
+        for token in (ref[i] for i in sorted(union)):
+            if pred_tokens[token] > 0 and ref_tokens[token] > 0:
+                hits += 1
+                pred_tokens[token] -= 1
+                ref_tokens[token] -= 1
+    return _fmeasure(hits, pred_count, ref_count)
+
+
+def _split_sentences(ids, sentence_sep_ids):
+    sentences, current = [], []
+    for token in ids:
+        if token in sentence_sep_ids:
+            sentences.append(current)
+            current = []
+        else:
+            current.append(token)
+    sentences.append(current)
+    return sentences
+
+
+def _clean(ids, ignore_ids):
+    """Flatten to a list of ints, dropping negatives (-100) and ignored ids."""
+    ids = np.asarray(ids, dtype=np.int64).ravel()
+    keep = ids >= 0
+    if ignore_ids:
+        keep &= ~np.isin(ids, list(ignore_ids))
+    return ids[keep].tolist()
+
+
+def score_pair(pred_ids, ref_ids, ignore_ids=frozenset(), sentence_sep_ids=frozenset()):
+    """ROUGE F-measures for one prediction / reference pair of token ids."""
+    pred = _clean(pred_ids, ignore_ids)
+    ref = _clean(ref_ids, ignore_ids)
+
+    pred_sents = _split_sentences(pred, sentence_sep_ids)
+    ref_sents = _split_sentences(ref, sentence_sep_ids)
+    pred_flat = [t for sent in pred_sents for t in sent]
+    ref_flat = [t for sent in ref_sents for t in sent]
+
+    pred_arr = np.asarray(pred_flat, dtype=np.int64)
+    ref_arr = np.asarray(ref_flat, dtype=np.int64)
+    lcs = lcs_length(ref_flat, pred_flat)
+    rouge_l = _fmeasure(lcs, len(pred_flat), len(ref_flat)) if pred_flat and ref_flat else 0.0
+
+    if len(pred_sents) == 1 and len(ref_sents) == 1:
+        rouge_lsum = rouge_l
+    else:
+        rouge_lsum = _rouge_lsum(pred_sents, ref_sents)
+
+    return {
+        "rouge1": _rouge_n(pred_arr, ref_arr, 1),
+        "rouge2": _rouge_n(pred_arr, ref_arr, 2),
+        "rougeL": rouge_l,
+        "rougeLsum": rouge_lsum,
+    }
+
+
+def _score_chunk(pairs, ignore_ids, sentence_sep_ids):
+    return [score_pair(p, r, ignore_ids, sentence_sep_ids) for p, r in pairs]
+
+
+def rouge_scores(predictions, references, ignore_ids=(), sentence_sep_ids=(),
+                 num_workers=None, return_per_pair=False):
+    """
+    Mean ROUGE F-measures over pairs of token-id sequences.
+
+    Args:
+        predictions, references: Sequences of id lists or 2D arrays
+            (e.g. Trainer outputs); -100 and `ignore_ids` (pad, eos, ...)
+            are dropped before scoring.
+        sentence_sep_ids: Ids that separate sentences for ROUGE-Lsum.
+        num_workers: Processes for large sets (default: CPU count);
+            1 scores in-process.
+        return_per_pair: Also return the list of per-pair scores.
+
+    Returns:
+        Dict of mean F-measures keyed by ROUGE_TYPES (and the per-pair
+        list under "per_pair" when requested).
+    """
+    if len(predictions) != len(references):
+        raise ValueError(
+            f"Got {len(predictions)} predictions but {len(references)} references"
+        )
+
+    ignore_ids = frozenset(int(i) for i in ignore_ids)
+    sentence_sep_ids = frozenset(int(i) for i in sentence_sep_ids)
+    pairs = list(zip(predictions, references))
+    num_workers = num_workers or mp.cpu_count()
+
+    if num_workers > 1 and len(pairs) >= _PARALLEL_THRESHOLD:
+        chunks = [pairs[i:i + _CHUNK_SIZE] for i in range(0, len(pairs), _CHUNK_SIZE)]
+        with ProcessPoolExecutor(
+            max_workers=min(num_workers, len(chunks)), mp_context=mp.get_context("spawn")
+        ) as pool:
+            results = pool.map(
+                _score_chunk, chunks,
+                [ignore_ids] * len(chunks), [sentence_sep_ids] * len(chunks),
+            )
+            per_pair = [score for chunk in results for score in chunk]
+    else:
+        per_pair = _score_chunk(pairs, ignore_ids, sentence_sep_ids)
+
+    means = {
+        key: float(np.mean([s[key] for s in per_pair])) if per_pair else 0.0
+        for key in ROUGE_TYPES
+    }
+    if return_per_pair:
+        means["per_pair"] = per_pair
+    return means
+
+
+def tokenize_texts(texts, vocab=None):
+    """
+    Map texts to id sequences with `rouge_score`'s default tokenization.
+
+    Lower-cases, splits on non-alphanumerics and maps each word to an id
+    from `vocab` (extended in place). Newlines become id 0, the sentence
+    separator for ROUGE-Lsum.
+
+    Returns:
+        (list of id lists, vocab)
+    """
+    vocab = {} if vocab is None else vocab
+    sequences = []
+    for text in texts:
+        ids = []
+        for i, line in enumerate(text.split("\n")):
+            if i:
+                ids.append(0)
+            for word in _NON_ALNUM_RE.sub(" ", line.lower()).split():
+                ids.append(vocab.setdefault(word, len(vocab) + 1))
+        sequences.append(ids)
+    return sequences, vocab
+
+
+def rouge_scores_text(predictions, references, num_workers=None):
+    """Mean ROUGE F-measures for strings, matching `evaluate.load("rouge")`."""
+    pred_ids, vocab = tokenize_texts(predictions)
+    ref_ids, _ = tokenize_texts(references, vocab)
+    return rouge_scores(pred_ids, ref_ids, sentence_sep_ids=(0,), num_workers=num_workers)
+
+
+def load_validation_split(max_samples=None):
+    """
+    The validation split used by src/training/train.py (same cache, same seed).
+
+    Returns:
+        HuggingFace Dataset with text/summary columns, input_ids and labels.
+    """
+    from transformers import T5TokenizerFast
+    from src.data.preprocess import load_processed_dataset
+
+    # Same tokenizer as training so the processed-data cache is reused
+    tokenizer = T5TokenizerFast.from_pretrained(config.model.model_name)
+    dataset = load_processed_dataset(tokenizer).train_test_split(
+        test_size=config.training.validation_split, seed=config.training.split_seed
+    )["test"]
+    if max_samples:
+        dataset = dataset.select(range(min(max_samples, len(dataset))))
+    return dataset
+
+
+def evaluate_checkpoint(model_dir=None, dataset=None, batch_size=32, num_beams=None,
+                        max_length=None, device=None):
+    """
+    Generate summaries for `dataset` with the model in `model_dir` and score them.
+
+    Returns:
+        Report dict with `metrics` (ROUGE on token ids and on words),
+        `throughput` and per-example `examples`.
+    """
+    import torch
+    from transformers import T5ForConditionalGeneration
+    from src.inference.generate import generate_sorted_ids, load_tokenizer
+
+    model_dir = model_dir or config.paths.model_dir
+    dataset = dataset if dataset is not None else load_validation_split()
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+    tokenizer = load_tokenizer(model_dir)
+    model = T5ForConditionalGeneration.from_pretrained(model_dir).to(device).eval()
+
+    input_ids = dataset["input_ids"]
+    start = time.perf_counter()
+    generated = generate_sorted_ids(
+        input_ids, tokenizer, model,
+        batch_size=batch_size, num_beams=num_beams, max_length=max_length,
+    )
+    elapsed = time.perf_counter() - start
+
+    ignore_ids = set(tokenizer.all_special_ids)
+    id_scores = rouge_scores(generated, dataset["labels"], ignore_ids=ignore_ids, return_per_pair=True)
+    predictions = tokenizer.batch_decode(generated, skip_special_tokens=True)
+    references = dataset[config.data.summary_column]
+    text_scores = rouge_scores_text(predictions, references)
+
+    input_tokens = sum(len(ids) for ids in input_ids)
+    output_tokens = sum(len(ids) for ids in generated)
+    examples = [
+        {
+            "index": i,
+            "reference": reference,
+            "prediction": prediction,
+            "generated_tokens": len(ids),
+            **{key: round(value, 4) for key, value in scores.items()},
+        }
+        for i, (reference, prediction, ids, scores) in enumerate(
+            zip(references, predictions, generated, id_scores["per_pair"])
+        )
+    ]
+
+    return {
+        "model_dir": model_dir,
+        "num_examples": len(examples),
+        "generation": {
+            "num_beams": num_beams or config.model.num_beams,
+            "max_length": max_length or config.model.max_target_length,
+            "batch_size": batch_size,
+            "device": str(device),
+        },
+        "metrics": {
+            "token_ids": {key: round(id_scores[key], 4) for key in ROUGE_TYPES},
+            "words": {key: round(text_scores[key], 4) for key in ROUGE_TYPES},
+        },
+        "throughput": {
+            "generation_time_s": round(elapsed, 3),
+            "examples_per_s": round(len(examples) / elapsed, 2),
+            "input_tokens_per_s": round(input_tokens / elapsed, 1),
+            "output_tokens_per_s": round(output_tokens / elapsed, 1),
+        },
+        "examples": examples,
+    }
+
+
+def _checkpoint_dirs(model_dir):
+    """checkpoint-* directories under `model_dir`, oldest step first."""
+    def step(directory):
+        suffix = directory.rsplit("-", 1)[-1]
+        return int(suffix) if suffix.isdigit() else -1
+
+    return sorted(glob.glob(os.path.join(model_dir, "checkpoint-*")), key=step)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ROUGE evaluation of T5 checkpoints")
+    parser.add_argument("--model-dir", default=None, help="Checkpoint or model directory")
+    parser.add_argument("--all-checkpoints", action="store_true",
+                        help="Evaluate every checkpoint-* under --model-dir (or paths.model_dir)")
+    parser.add_argument("--samples", type=int, default=None, help="Limit validation examples")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--num-beams", type=int, default=None)
+    parser.add_argument("--max-length", type=int, default=None)
+    parser.add_argument("--output", default=None,
+                        help="JSON report path (with --all-checkpoints: a directory)")
+    args = parser.parse_args()
+
+    model_dir = args.model_dir or config.paths.model_dir
+    model_dirs = _checkpoint_dirs(model_dir) if args.all_checkpoints else [model_dir]
+    if not model_dirs:
+        print(f"❌ No checkpoints found under: {model_dir}")
+        sys.exit(1)
+
+    # Tokenized once, shared by every checkpoint
+    dataset = load_validation_split(args.samples)
+
+    for directory in model_dirs:
+        report = evaluate_checkpoint(
+            directory, dataset,
+            batch_size=args.batch_size, num_beams=args.num_beams, max_length=args.max_length,
+        )
+        words, throughput = report["metrics"]["words"], report["throughput"]
+        print(f"{directory}: rouge1={words['rouge1']} rouge2={words['rouge2']} "
+              f"rougeL={words['rougeL']} | {throughput['examples_per_s']} ex/s, "
+              f"{throughput['output_tokens_per_s']} tok/s")
+
+        output = args.output
+        if args.all_checkpoints:
+            output_dir = args.output or model_dir
+            os.makedirs(output_dir, exist_ok=True)
+            output = os.path.join(output_dir, f"eval_{os.path.basename(directory)}.json")
+        if output:
+            with open(output, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Dynamic micro-batching for concurrent summarization requests.
+
+Requests are queued and a single background thread drains the queue:
+the first request opens a window of `max_wait_ms`, during which up to
+`max_batch_size` requests are collected. The window is then split into
+groups with identical generation settings and each group is served by
+one batched `generate` call. Every caller receives its own result via a
+`concurrent.futures.Future`.
+
+When an InferenceExecutor is given, batches are handed to its workers so
+several groups can run at once, and `max_pending` bounds the number of
+requests waiting or running (beyond it `submit` raises QueueFullError).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+
+from src.inference.executor import QueueFullError
+from src.monitoring import metrics
+
+
+@dataclass
+class _PendingRequest:
+    payload: object
+    key: tuple
+    wrap: object = None
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and runs them as batches.
+
+    Args:
+        run_batch: Callable `run_batch(key, payloads) -> results` returning
+            one result per payload, in order.
+        max_batch_size: Max requests collected in one window.
+        max_wait_ms: Max time the first request in a window waits for
+            others to arrive.
+        executor: Optional InferenceExecutor that runs the batches. Without
+            one, batches run on the batcher thread itself.
+        max_pending: Optional cap on requests waiting or running.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10.0, executor=None, max_pending=None):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.max_pending = max_pending
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Requests currently queued or being generated."""
+        return self._pending
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, payload, key, wrap=None):
+        """
+        Queue a payload for batched processing.
+
+        Payloads only share a batch with others submitted under the same
+        `key` (e.g. identical generation settings). `wrap(fn) -> fn` is
+        optionally applied to the batch call the payload ends up in (e.g.
+        to profile it); if several payloads of a batch have one, the
+        first is used.
+
+        Returns:
+            A Future resolving to this payload's result.
+
+        Raises:
+            QueueFullError: If `max_pending` requests are already in flight.
+        """
+        with self._lock:
+            if self.max_pending is not None and self._pending >= self.max_pending:
+                retry_after = self.executor.retry_after if self.executor else 1
+                raise QueueFullError(retry_after)
+            self._pending += 1
+
+        pending = _PendingRequest(payload=payload, key=key, wrap=wrap)
+        pending.future.add_done_callback(self._release)
+        self._queue.put(pending)
+        return pending.future
+
+    # --- Internals ---
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+
+        window = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(window) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Serve what we have, then stop on the next iteration
+                self._queue.put(_STOP)
+                break
+            window.append(item)
+        return window
+
+    def _loop(self):
+        while True:
+            window = self._collect()
+            if window is None:
+                break
+
+            groups = {}
+            for pending in window:
+                groups.setdefault(pending.key, []).append(pending)
+
+            for key, group in groups.items():
+                if self.executor is not None:
+                    # Blocks while the executor is at capacity; new requests
+                    # keep queueing meanwhile and form a larger next window
+                    self.executor.submit_blocking(self._run_group, key, group)
+                else:
+                    self._run_group(key, group)
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run_group(self, key, group):
+        # Claim the futures; requests cancelled while queued (client gone) are dropped
+        group = [pending for pending in group if pending.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+
+        started = time.monotonic()
+        for pending in group:
+            metrics.QUEUE_WAIT_SECONDS.observe(started - pending.enqueued_at, queue="batcher")
+        run_batch = self.run_batch
+        wrap = next((pending.wrap for pending in group if pending.wrap is not None), None)
+        if wrap is not None:
+            run_batch = wrap(run_batch)
+        try:
+            results = list(run_batch(key, [pending.payload for pending in group]))
+        except Exception as e:
+            for pending in group:
+                _resolve(pending.future, exception=e)
+            return
+
+        for pending, result in zip(group, results):
+            _resolve(pending.future, result=result)
+        if len(results) < len(group):
+            error = RuntimeError(f"Batch returned {len(results)} results for {len(group)} requests.")
+            for pending in group[len(results):]:
+                _resolve(pending.future, exception=error)
+
+
+def _resolve(future, result=None, exception=None):
+    """Set a future's outcome; one future in a bad state must not stop the rest of the batch."""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
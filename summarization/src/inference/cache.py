@@ -0,0 +1,198 @@
+"""
+Content-addressed result cache for generation requests.
+
+Keys are SHA-256 hashes of the normalized input plus every setting that
+affects the output (generation parameters, model revision). Entries live
+in an in-process LRU bounded by size and TTL. An optional SQLite file
+acts as a shared second tier, so several uvicorn workers on one box can
+reuse each other's results.
+
+SQLite calls can wait up to a second on a locked file, so async
+handlers use `aget` / `aset`, which keep the in-process tier inline and
+run the shared tier in a worker thread, off the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies share a key."""
+    return " ".join(text.split())
+
+
+def make_cache_key(*parts):
+    """Hash JSON-serializable parts into a stable hex key."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _SharedTier:
+    """SQLite-backed cache tier shared by processes on the same host."""
+
+    def __init__(self, path, max_entries, ttl_seconds):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + self.ttl_seconds),
+        )
+        self._writes += 1
+        # Evict periodically rather than on every write
+        if self._writes % 100 == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        conn.commit()
+
+
+class ResultCache:
+    """
+    In-process LRU + TTL cache with an optional shared SQLite tier.
+
+    Args:
+        max_entries: Max entries kept in process memory.
+        ttl_seconds: Lifetime of an entry in both tiers.
+        shared_path: Optional SQLite file for the shared tier.
+        shared_max_entries: Max entries kept in the shared tier.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600, shared_path=None, shared_max_entries=100_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+        self._shared = None
+        if shared_path:
+            try:
+                self._shared = _SharedTier(shared_path, shared_max_entries, ttl_seconds)
+            except sqlite3.Error as e:
+                print(f"⚠️ Shared cache disabled ({shared_path}): {e}")
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss."""
+        value = self._get_local(key)
+        if value is None:
+            value = self._admit_shared(key, self._get_shared(key))
+        return value
+
+    async def aget(self, key):
+        """Like `get`, with the shared-tier lookup run in a worker thread."""
+        value = self._get_local(key)
+        if value is None:
+            shared_value = await asyncio.to_thread(self._get_shared, key) if self._shared is not None else None
+            value = self._admit_shared(key, shared_value)
+        return value
+
+    def set(self, key, value):
+        """Store a JSON-serializable value in both tiers."""
+        with self._lock:
+            self._store(key, value)
+        self._set_shared(key, value)
+
+    async def aset(self, key, value):
+        """Like `set`; the shared-tier write runs in a worker thread without being awaited."""
+        with self._lock:
+            self._store(key, value)
+        if self._shared is not None:
+            asyncio.get_running_loop().run_in_executor(None, self._set_shared, key, value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "shared": self._shared is not None,
+            }
+
+    # --- Internals ---
+    def _get_local(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+        return None
+
+    def _get_shared(self, key):
+        if self._shared is None:
+            return None
+        try:
+            return self._shared.get(key)
+        except sqlite3.Error:
+            return None
+
+    def _admit_shared(self, key, value):
+        """Count the lookup that missed in process and copy a shared hit into the LRU."""
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store(key, value)
+        return value
+
+    def _set_shared(self, key, value):
+        if self._shared is None:
+            return
+        try:
+            self._shared.set(key, value)
+        except sqlite3.Error:
+            pass
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
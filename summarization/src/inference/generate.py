@@ -0,0 +1,485 @@
+"""
+Batched generation helpers and the shared Summarizer engine for T5.
+
+All inputs in a batch are tokenized together and padded to the longest
+sequence, so a single `model.generate` call serves many texts.
+
+`Summarizer` loads the tokenizer and model once (PyTorch or ONNX Runtime,
+optionally quantized) and is what the API, the Streamlit app and
+`predict.py` use; the module-level functions are the building blocks it
+is made of.
+"""
+
+import os
+import time
+
+import torch
+from transformers import T5ForConditionalGeneration, T5Tokenizer, T5TokenizerFast
+from src.config import config
+from src.monitoring import metrics
+from src.inference.onnx_backend import load_onnx_model
+from src.inference.quantization import quantize_model
+
+WARMUP_TEXT = (
+    "This is a short review used to warm up the model. The coffee arrived "
+    "quickly and tastes great."
+)
+
+
+def load_tokenizer(model_dir=None, local_files_only=False):
+    """
+    Load the Rust-backed fast T5 tokenizer, falling back to sentencepiece.
+
+    Checkpoints saved with the slow tokenizer only ship spiece.model; the
+    fast tokenizer is converted from it on first load.
+    """
+    model_dir = model_dir or config.paths.model_dir
+    try:
+        return T5TokenizerFast.from_pretrained(model_dir, local_files_only=local_files_only)
+    except Exception as e:
+        print(f"⚠️ Fast tokenizer unavailable ({e}); using the slow T5Tokenizer.")
+        return T5Tokenizer.from_pretrained(model_dir, local_files_only=local_files_only)
+
+
+def encode_texts(texts, tokenizer):
+    """Tokenize texts with the task prefix, truncated to max_input_length (unpadded)."""
+    max_length = config.model.max_input_length
+    with metrics.STAGE_SECONDS.time(stage="tokenize"):
+        # One spare token tells truncated inputs apart from ones that fit exactly
+        input_ids = tokenizer(
+            ["summarize: " + text for text in texts],
+            max_length=max_length + 1,
+            truncation=True,
+        )["input_ids"]
+
+    truncated = 0
+    for i, ids in enumerate(input_ids):
+        if len(ids) > max_length:
+            # Same result as truncating to max_length: keep the closing </s>
+            input_ids[i] = ids[:max_length - 1] + ids[-1:]
+            truncated += 1
+    if truncated:
+        metrics.INPUT_TRUNCATIONS.inc(truncated)
+    return input_ids
+
+
+def generate_ids(
+    input_ids,
+    tokenizer,
+    model,
+    max_length=None,
+    num_beams=None,
+    early_stopping=None,
+):
+    """
+    Pad pre-tokenized inputs to the longest sequence and run one `generate` call.
+
+    Returns:
+        Tensor of generated token ids (on CPU), one row per input.
+    """
+    max_length = max_length or config.model.max_target_length
+    num_beams = num_beams or config.model.num_beams
+    early_stopping = early_stopping if early_stopping is not None else config.model.early_stopping
+
+    batch = tokenizer.pad({"input_ids": input_ids}, padding=True, return_tensors="pt")
+
+    # `.device` works for both PyTorch and ONNX Runtime models
+    device = model.device
+
+    with metrics.STAGE_SECONDS.time(stage="generate"), torch.no_grad():
+        summary_ids = model.generate(
+            batch["input_ids"].to(device),
+            attention_mask=batch["attention_mask"].to(device),
+            max_length=max_length,
+            num_beams=num_beams,
+            early_stopping=early_stopping,
+        ).cpu()
+
+    metrics.INPUT_TOKENS.inc(int(batch["attention_mask"].sum()))
+    # Everything after the decoder start token that isn't padding
+    metrics.OUTPUT_TOKENS.inc(int((summary_ids[:, 1:] != tokenizer.pad_token_id).sum()))
+    return summary_ids
+
+
+def generate_from_ids(input_ids, tokenizer, model, **gen_kwargs):
+    """
+    Like `generate_ids`, decoded.
+
+    Returns:
+        List of decoded summaries, in the same order as `input_ids`.
+    """
+    summary_ids = generate_ids(input_ids, tokenizer, model, **gen_kwargs)
+    with metrics.STAGE_SECONDS.time(stage="decode"):
+        return tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+
+def generate_sorted_ids(input_ids, tokenizer, model, batch_size=None, **gen_kwargs):
+    """
+    Generate for many pre-tokenized inputs in length-sorted batches.
+
+    Returns:
+        List of generated id lists (padding removed), in the same order
+        as `input_ids`.
+    """
+    batch_size = batch_size or config.serving.batch_chunk_size
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+
+    results = [None] * len(input_ids)
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        summary_ids = generate_ids([input_ids[i] for i in chunk], tokenizer, model, **gen_kwargs)
+        for i, row in zip(chunk, summary_ids.tolist()):
+            # Drop the decoder start token and trailing padding
+            results[i] = [t for t in row[1:] if t != tokenizer.pad_token_id]
+
+    return results
+
+
+def summarize_batch(
+    texts,
+    tokenizer,
+    model,
+    max_length=None,
+    num_beams=None,
+    early_stopping=None,
+):
+    """
+    Summarize a list of texts with one padded `model.generate` call.
+
+    Args:
+        texts: List of raw input texts (without the "summarize: " prefix).
+        tokenizer: T5TokenizerFast (or T5Tokenizer) instance.
+        model: T5ForConditionalGeneration instance.
+        max_length: Max summary length (defaults to config).
+        num_beams: Number of beams for beam search (defaults to config).
+        early_stopping: Stop beam search early (defaults to config).
+
+    Returns:
+        List of summary strings, in the same order as `texts`.
+    """
+    return generate_from_ids(
+        encode_texts(texts, tokenizer),
+        tokenizer,
+        model,
+        max_length=max_length,
+        num_beams=num_beams,
+        early_stopping=early_stopping,
+    )
+
+
+def summarize_sorted(
+    texts,
+    tokenizer,
+    model,
+    batch_size=None,
+    max_length=None,
+    num_beams=None,
+    early_stopping=None,
+):
+    """
+    Summarize many texts in length-sorted chunks to keep padding small.
+
+    Texts are tokenized once, sorted by token count and generated in
+    chunks of `batch_size`. If a chunk fails, its items are retried one by
+    one so a single bad input only fails itself.
+
+    Returns:
+        List of dicts with `summary`, `processing_time` and `error` keys,
+        in the same order as `texts`.
+    """
+    if not texts:
+        return []
+
+    batch_size = batch_size or config.serving.batch_chunk_size
+    gen_kwargs = dict(max_length=max_length, num_beams=num_beams, early_stopping=early_stopping)
+
+    input_ids = encode_texts(texts, tokenizer)
+    order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        chunk_start = time.time()
+        try:
+            summaries = generate_from_ids(
+                [input_ids[i] for i in chunk], tokenizer, model, **gen_kwargs
+            )
+            elapsed = round(time.time() - chunk_start, 3)
+            for i, summary in zip(chunk, summaries):
+                results[i] = {"summary": summary, "processing_time": elapsed, "error": None}
+        except Exception:
+            for i in chunk:
+                item_start = time.time()
+                try:
+                    summary = generate_from_ids([input_ids[i]], tokenizer, model, **gen_kwargs)[0]
+                    error = None
+                except Exception as e:
+                    summary, error = None, str(e)
+                results[i] = {
+                    "summary": summary,
+                    "processing_time": round(time.time() - item_start, 3),
+                    "error": error,
+                }
+
+    return results
+
+
+def _split_windows(token_ids, chunk_size, overlap):
+    """Split token ids into overlapping windows of at most `chunk_size` tokens."""
+    stride = max(1, chunk_size - overlap)
+    windows = []
+    for start in range(0, len(token_ids), stride):
+        windows.append(token_ids[start:start + chunk_size])
+        if start + chunk_size >= len(token_ids):
+            break
+    return windows
+
+
+def summarize_long(
+    text,
+    tokenizer,
+    model,
+    max_length=None,
+    num_beams=None,
+    early_stopping=None,
+    chunk_size=None,
+    chunk_overlap=None,
+    max_depth=None,
+):
+    """
+    Summarize a document of any length with chunked map-reduce.
+
+    Map: the text is split into overlapping token windows and every
+    window is summarized in batched `generate` calls. Reduce: the partial
+    summaries are concatenated and, while they still exceed one input
+    window, split and summarized again. A final pass over the remaining
+    text produces a summary of at most `max_length` tokens. After
+    `max_depth` reduce rounds the remainder is truncated instead.
+
+    Returns:
+        Tuple of (summary, stages), where stages is a list of dicts with
+        `stage`, `depth`, `inputs` and `processing_time` per round.
+    """
+    chunk_size = chunk_size or config.model.long_doc_chunk_size
+    chunk_overlap = chunk_overlap if chunk_overlap is not None else config.model.long_doc_chunk_overlap
+    max_depth = max_depth if max_depth is not None else config.model.long_doc_max_depth
+    gen_kwargs = dict(max_length=max_length, num_beams=num_beams, early_stopping=early_stopping)
+
+    prefix_ids = tokenizer("summarize:", add_special_tokens=False)["input_ids"]
+    # Leave room for the task prefix and the closing </s>
+    chunk_size = min(chunk_size, config.model.max_input_length - len(prefix_ids) - 1)
+    chunk_overlap = min(chunk_overlap, chunk_size // 2)
+
+    stages = []
+    depth = 0
+    while True:
+        token_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        if len(token_ids) <= chunk_size or depth >= max_depth:
+            break
+
+        windows = _split_windows(token_ids, chunk_size, chunk_overlap)
+        stage_start = time.time()
+        partials = []
+        batch_size = config.serving.batch_chunk_size
+        for start in range(0, len(windows), batch_size):
+            batch = [
+                prefix_ids + window + [tokenizer.eos_token_id]
+                for window in windows[start:start + batch_size]
+            ]
+            partials.extend(generate_from_ids(batch, tokenizer, model, **gen_kwargs))
+
+        stages.append({
+            "stage": "map" if depth == 0 else "reduce",
+            "depth": depth,
+            "inputs": len(windows),
+            "processing_time": round(time.time() - stage_start, 3),
+        })
+        text = " ".join(partial.strip() for partial in partials)
+        depth += 1
+
+    # Final pass: whatever is left fits one window (or is truncated to it)
+    stage_start = time.time()
+    summary = summarize_batch([text], tokenizer, model, **gen_kwargs)[0]
+    stages.append({
+        "stage": "final",
+        "depth": depth,
+        "inputs": 1,
+        "processing_time": round(time.time() - stage_start, 3),
+    })
+
+    return summary, stages
+
+
+class Summarizer:
+    """
+    T5 summarization engine, loaded once and shared by every entry point.
+
+    Wraps a tokenizer and a model (PyTorch, optionally quantized, or ONNX
+    Runtime) and exposes single, batched, streaming and long-document
+    summarization. Generation settings default to `config.model`.
+    """
+
+    def __init__(self, tokenizer, model, variant="pytorch-fp32", model_dir=None, load_timings=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.variant = variant
+        self.model_dir = model_dir or config.paths.model_dir
+        # Seconds per loading phase ("tokenizer", "model"), reported at startup
+        self.load_timings = load_timings or {}
+
+    @classmethod
+    def load(
+        cls,
+        model_dir=None,
+        backend=None,
+        quantization=None,
+        device=None,
+        num_threads=None,
+        local_files_only=None,
+    ):
+        """
+        Load the tokenizer and model.
+
+        Args:
+            backend: "pytorch" or "onnx" (defaults to config.model.backend).
+            quantization: "fp32" / "int8-dynamic" for PyTorch on CPU
+                (defaults to config.model.quantization).
+            device: "cpu", "cuda", "cuda:1", ... or None for CUDA when
+                available (ONNX Runtime always runs on CPU).
+            num_threads: torch.set_num_threads / ONNX intra-op threads.
+            local_files_only: Don't contact the Hub (defaults to
+                HF_HUB_OFFLINE=1).
+        """
+        model_dir = model_dir or config.paths.model_dir
+        backend = backend or config.model.backend
+        quantization = quantization or config.model.quantization
+        if quantization == "fp32":
+            quantization = None
+        if local_files_only is None:
+            local_files_only = os.environ.get("HF_HUB_OFFLINE") == "1"
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        timings = {}
+        start = time.perf_counter()
+        tokenizer = load_tokenizer(model_dir, local_files_only=local_files_only)
+        timings["tokenizer"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        if backend == "onnx":
+            model = load_onnx_model(config.paths.onnx_dir, num_threads=num_threads)
+            timings["model"] = round(time.perf_counter() - start, 3)
+            return cls(tokenizer, model, variant="onnx", model_dir=model_dir, load_timings=timings)
+
+        # low_cpu_mem_usage skips the random init and assigns the weights straight
+        # from the (memory-mapped) safetensors file
+        model = T5ForConditionalGeneration.from_pretrained(
+            model_dir, local_files_only=local_files_only, low_cpu_mem_usage=True
+        )
+        model.eval()
+        if quantization:
+            # Dynamic int8 kernels are CPU-only
+            device = "cpu"
+            model = quantize_model(model, quantization)
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        model.to(device)
+        timings["model"] = round(time.perf_counter() - start, 3)
+
+        return cls(
+            tokenizer,
+            model,
+            variant=f"pytorch-{quantization or 'fp32'}",
+            model_dir=model_dir,
+            load_timings=timings,
+        )
+
+    @property
+    def device(self):
+        return self.model.device
+
+    @property
+    def revision(self):
+        """
+        Identifier of the weights and backend, e.g. for cache keys.
+
+        Hub snapshots carry a commit hash; local checkpoints fall back to
+        their path. Backend and quantization change outputs slightly, so
+        they are part of it.
+        """
+        commit = getattr(self.model.config, "_commit_hash", None)
+        return f"{commit or self.model_dir}:{self.variant}"
+
+    def warmup(self, input_lengths=None, max_length=None, num_beams=None):
+        """
+        Run short generations so lazy initialization isn't paid by the first requests.
+
+        One `generate` per input length: kernels, allocator pools and (for
+        ONNX Runtime) per-shape state are initialized for the sizes real
+        traffic will hit, not just for one tiny input.
+
+        Returns:
+            Dict of {input_length: seconds}.
+        """
+        input_lengths = input_lengths or config.serving.warmup_input_lengths
+        max_length = max_length or config.serving.warmup_max_length
+
+        base_ids = self.tokenizer("summarize: " + WARMUP_TEXT, add_special_tokens=False)["input_ids"]
+        timings = {}
+        for length in input_lengths:
+            length = max(2, min(length, config.model.max_input_length))
+            repeated = base_ids * (length // len(base_ids) + 1)
+            input_ids = repeated[:length - 1] + [self.tokenizer.eos_token_id]
+
+            start = time.perf_counter()
+            generate_ids([input_ids], self.tokenizer, self.model, max_length=max_length, num_beams=num_beams)
+            timings[length] = round(time.perf_counter() - start, 3)
+        return timings
+
+    def summarize(self, text, **gen_kwargs):
+        """Summarize one text (truncated to max_input_length)."""
+        return self.summarize_batch([text], **gen_kwargs)[0]
+
+    def summarize_batch(self, texts, **gen_kwargs):
+        """Summarize texts in one padded `generate` call."""
+        return summarize_batch(texts, self.tokenizer, self.model, **gen_kwargs)
+
+    def summarize_many(self, texts, batch_size=None, **gen_kwargs):
+        """
+        Summarize any number of texts in length-sorted batches.
+
+        Returns:
+            List of summaries, in the same order as `texts`.
+        """
+        summaries = [None] * len(texts)
+        for index, summary in self.iter_summaries(texts, batch_size=batch_size, **gen_kwargs):
+            summaries[index] = summary
+        return summaries
+
+    def iter_summaries(self, texts, batch_size=None, **gen_kwargs):
+        """
+        Stream summaries as their batches finish.
+
+        Texts are tokenized once, sorted by length and generated in
+        batches of `batch_size`; after each batch its `(index, summary)`
+        pairs are yielded, so callers can show or write results before the
+        whole input is done.
+        """
+        batch_size = batch_size or config.serving.batch_chunk_size
+        input_ids = encode_texts(texts, self.tokenizer)
+        order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            summaries = generate_from_ids(
+                [input_ids[i] for i in chunk], self.tokenizer, self.model, **gen_kwargs
+            )
+            yield from zip(chunk, summaries)
+
+    def summarize_sorted(self, texts, batch_size=None, **gen_kwargs):
+        """Per-item results with error isolation (see `summarize_sorted`)."""
+        return summarize_sorted(
+            texts, self.tokenizer, self.model, batch_size=batch_size, **gen_kwargs
+        )
+
+    def summarize_long(self, text, **gen_kwargs):
+        """Map-reduce summary of a document of any length; returns (summary, stages)."""
+        return summarize_long(text, self.tokenizer, self.model, **gen_kwargs)
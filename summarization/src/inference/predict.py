@@ -5,30 +5,20 @@ import os
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 
-import torch
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-from src.config import config
+from functools import lru_cache
+
+from src.inference.generate import Summarizer
+
+
+@lru_cache(maxsize=1)
+def get_summarizer():
+    """Load the summarizer on first use and reuse it for every later call."""
+    return Summarizer.load()
+
 
 def predict(text):
-    # Load model and tokenizer
-    tokenizer = T5Tokenizer.from_pretrained(config.paths.model_dir)
-    model = T5ForConditionalGeneration.from_pretrained(config.paths.model_dir)
-    
-    # Prepare input
-    input_text = "summarize: " + text
-    input_ids = tokenizer.encode(input_text, return_tensors="pt", max_length=config.model.max_input_length, truncation=True)
-
-    # Generate summary
-    summary_ids = model.generate(
-        input_ids,
-        max_length=config.model.max_target_length,
-        num_beams=config.model.num_beams,
-        early_stopping=config.model.early_stopping
-    )
-
-    # Decode summary
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-    return summary
+    return get_summarizer().summarize(text)
+
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,214 @@
+"""
+Pre-fork multi-worker serving with weights shared copy-on-write.
+
+`uvicorn --workers N` starts N fresh interpreters and each loads its own
+copy of the model. Here the parent process loads the weights once, then
+forks the workers: every worker maps the same physical pages and, since
+inference never writes to the weights, they stay shared. Only what each
+worker allocates afterwards (activations, KV caches, Python objects) is
+private.
+
+Keeping the pages shared:
+  - The parent loads with a single torch thread and runs no inference,
+    so no OpenMP pool exists at fork time (it does not survive a fork).
+  - `gc.freeze()` moves everything allocated so far into the permanent
+    generation, so the collector in the workers never writes to those
+    object headers.
+  - Threads (executor, micro-batcher) and warmup are started per worker
+    by the app's startup event, after the fork.
+
+CUDA and ONNX Runtime sessions don't survive a fork either; for those the
+caller skips the preload and each worker loads its own copy.
+
+Per-worker RSS / PSS / shared / private memory is logged after startup
+and every `memory_report_interval` seconds. PSS splits shared pages
+between the processes using them, so the sum of the workers' PSS is the
+real footprint of the deployment.
+
+A worker that exits is re-forked after a delay that doubles with each
+recent exit of its slot. When a slot fails `max_failures` times within
+`failure_window` seconds (e.g. it crashes on startup), the parent stops
+the other workers and exits with status 1, so the supervisor sees the
+failure instead of a fork loop.
+"""
+
+import gc
+import os
+from collections import deque
+import signal
+import socket
+import sys
+import time
+
+from src.monitoring.memory import memory_breakdown_mb
+
+
+def _bind(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock, host, port, threads, log_level):
+    """Body of a forked worker: serve `app` on the inherited socket until told to stop."""
+    import uvicorn
+
+    # The parent's handlers must not run here; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level=log_level))
+    server.run(sockets=[sock])
+
+
+def _fork_worker(app, sock, host, port, threads, log_level):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(app, sock, host, port, threads, log_level)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            # Skip the parent's atexit handlers and buffered-IO flushes
+            os._exit(code)
+    return pid
+
+
+def report_memory(pids):
+    """Print RSS / PSS / shared / private MB for the parent and every worker."""
+    rows = [("parent", os.getpid())] + [(f"worker {i}", pid) for i, pid in enumerate(pids)]
+    total_pss = 0.0
+    print(f"{'process':<10}{'pid':>8}{'rss_mb':>10}{'pss_mb':>10}{'shared_mb':>11}{'private_mb':>12}")
+    for name, pid in rows:
+        memory = memory_breakdown_mb(pid)
+        total_pss += memory["pss_mb"] or 0.0
+        print(f"{name:<10}{pid:>8}{memory['rss_mb']:>10}{str(memory['pss_mb']):>10}"
+              f"{str(memory['shared_mb']):>11}{str(memory['private_mb']):>12}")
+    print(f"Total PSS: {total_pss:.1f} MB", flush=True)
+
+
+def run_prefork(
+    app,
+    preload=None,
+    host="0.0.0.0",
+    port=8000,
+    workers=2,
+    threads=None,
+    memory_report_interval=None,
+    first_report_after=30.0,
+    log_level="info",
+    restart_backoff=1.0,
+    max_restart_backoff=30.0,
+    max_failures=5,
+    failure_window=300.0,
+):
+    """
+    Serve `app` from `workers` forked processes sharing preloaded weights.
+
+    Args:
+        app: The ASGI app. Its startup event must reuse what `preload` loaded.
+        preload: Callable run once in the parent before forking (None = each
+            worker loads at startup, as with `uvicorn --workers`).
+        threads: torch.set_num_threads per worker (default: cores / workers).
+        memory_report_interval: Seconds between memory reports (None = only
+            once, `first_report_after` seconds in, once workers are warm).
+        restart_backoff: Seconds before re-forking a worker that exited,
+            doubled for every earlier exit of the same slot within
+            `failure_window`, up to `max_restart_backoff`.
+        max_failures: Exits of one slot within `failure_window` seconds
+            after which all workers are stopped and the process exits 1.
+    """
+    if sys.platform == "win32":
+        raise RuntimeError("Pre-fork serving needs os.fork (Linux / macOS).")
+
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+
+    if preload is not None:
+        start = time.perf_counter()
+        preload()
+        # Objects alive now are never collected; keeps GC writes off their pages
+        gc.collect()
+        gc.freeze()
+        print(f"✅ Weights preloaded in the parent in {time.perf_counter() - start:.1f}s; "
+              f"forking {workers} workers ({threads} threads each).", flush=True)
+
+    sock = _bind(host, port)
+    pids = [_fork_worker(app, sock, host, port, threads, log_level) for _ in range(workers)]
+
+    # Per slot: exit times within failure_window, and when to re-fork it
+    failures = [deque() for _ in range(workers)]
+    restart_at = {}
+    stopping = False
+    failed = False
+
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in pids:
+            if pid is None:
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    next_report = time.monotonic() + first_report_after
+    while any(pid is not None for pid in pids) or (restart_at and not stopping):
+        now = time.monotonic()
+        for index, due in list(restart_at.items()):
+            if not stopping and now >= due:
+                # The new fork still shares the weights
+                del restart_at[index]
+                pids[index] = _fork_worker(app, sock, host, port, threads, log_level)
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            # Every slot is waiting out its backoff
+            pid = 0
+
+        if pid:
+            index = pids.index(pid)
+            pids[index] = None
+            if stopping:
+                continue
+
+            recent = failures[index]
+            recent.append(now)
+            while recent[0] < now - failure_window:
+                recent.popleft()
+            code = os.waitstatus_to_exitcode(status)
+
+            if len(recent) >= max_failures:
+                print(f"❌ Worker {pid} exited ({code}); its slot failed {len(recent)} times "
+                      f"in {failure_window:.0f}s. Shutting down.", flush=True)
+                failed = True
+                stop(None, None)
+                continue
+
+            delay = min(restart_backoff * 2 ** (len(recent) - 1), max_restart_backoff)
+            print(f"⚠️ Worker {pid} exited ({code}); restarting in {delay:.1f}s.", flush=True)
+            restart_at[index] = now + delay
+            continue
+
+        if not stopping and next_report is not None and now >= next_report:
+            report_memory([pid for pid in pids if pid is not None])
+            next_report = now + memory_report_interval if memory_report_interval else None
+        time.sleep(0.5)
+
+    sock.close()
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,35 @@
+"""
+Inference-time quantization for CPU serving.
+
+"int8-dynamic" replaces every nn.Linear with a dynamically quantized
+int8 version: weights are stored as int8 and activations are quantized
+on the fly, which cuts weight memory ~4x and speeds up matmuls on CPU.
+"""
+
+import torch
+
+SUPPORTED_QUANTIZATION = ("int8-dynamic",)
+
+
+def quantize_model(model, mode):
+    """
+    Quantize a loaded model for CPU inference.
+
+    Args:
+        model: Model in eval mode.
+        mode: None (leave fp32) or one of SUPPORTED_QUANTIZATION.
+
+    Returns:
+        The quantized model (or `model` unchanged when mode is None).
+    """
+    if not mode:
+        return model
+    if mode not in SUPPORTED_QUANTIZATION:
+        raise ValueError(
+            f"Unknown quantization mode {mode!r}; expected one of {SUPPORTED_QUANTIZATION}"
+        )
+
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
@@ -0,0 +1,257 @@
+"""
+Summarization request handling, independent of the app serving it.
+
+summarization/api.py and the combined app (combined/api.py) load the
+model their own way and register thin routes around these handlers,
+passing a `SummarizationService`: the loaded Summarizer plus how that
+app submits work (its executor, micro-batcher and admission limits),
+its result cache and its profiler.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+
+from src.config import config
+from src.inference.cache import make_cache_key, normalize_text
+from src.inference.executor import QueueFullError
+from src.monitoring import metrics
+
+
+# --- Request / Response Schemas ---
+class SummarizeRequest(BaseModel):
+    text: str = Field(..., min_length=10, description="Text to summarize")
+    max_length: int = Field(default=128, ge=10, le=512, description="Max summary length")
+    num_beams: int = Field(default=4, ge=1, le=10, description="Number of beams for beam search")
+    long_document: bool = Field(
+        default=False,
+        description="Summarize the whole text with chunked map-reduce instead of truncating it",
+    )
+
+
+class SummarizeResponse(BaseModel):
+    summary: str
+    input_length: int
+    output_length: int
+    processing_time: float
+    stages: Optional[List[dict]] = None
+
+
+class BatchSummarizeRequest(BaseModel):
+    texts: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=config.serving.max_batch_items,
+        description="Texts to summarize",
+    )
+    max_length: int = Field(default=128, ge=10, le=512, description="Max summary length")
+    num_beams: int = Field(default=4, ge=1, le=10, description="Number of beams for beam search")
+
+
+class BatchSummarizeItem(BaseModel):
+    index: int
+    summary: Optional[str] = None
+    input_length: int
+    output_length: int
+    processing_time: float
+    error: Optional[str] = None
+
+
+class BatchSummarizeResponse(BaseModel):
+    results: List[BatchSummarizeItem]
+    processing_time: float
+
+
+@dataclass
+class SummarizationService:
+    """
+    What the handlers need from the serving app.
+
+    Attributes:
+        summarizer: Loaded Summarizer.
+        submit: `submit(fn, *args, **kwargs) -> Future` running a job on the
+            inference pool; raises QueueFullError if it can't take the job.
+        submit_batched: `submit_batched(text, key=..., wrap=...) -> Future`
+            queueing a text for micro-batching (MicroBatcher.submit or a
+            wrapper around it), or None to run each request on its own.
+        cache: ResultCache, or None when caching is disabled.
+        profiler: RequestProfiler, or None when profiling is disabled.
+    """
+
+    summarizer: object
+    submit: Callable
+    submit_batched: Optional[Callable] = None
+    cache: object = None
+    profiler: object = None
+
+    def __post_init__(self):
+        self.revision = self.summarizer.revision
+
+    def cache_key(self, text, max_length, num_beams, long_document=False):
+        """Content-addressed key covering everything that changes the summary."""
+        return make_cache_key(
+            normalize_text(text),
+            max_length,
+            num_beams,
+            config.model.early_stopping,
+            long_document,
+            self.revision,
+        )
+
+
+def run_batch(summarizer, key, texts):
+    """Serve one micro-batch of texts sharing the same generation settings (MicroBatcher's run_batch)."""
+    max_length, num_beams = key
+    return summarizer.summarize_batch(
+        texts,
+        max_length=max_length,
+        num_beams=num_beams,
+        early_stopping=config.model.early_stopping,
+    )
+
+
+async def summarize(service, request, headers):
+    """Generate a summary for the provided text (`headers` may ask for a trace)."""
+    start_time = time.time()
+    summarizer, cache, profiler = service.summarizer, service.cache, service.profiler
+
+    cache_key = service.cache_key(request.text, request.max_length, request.num_beams, request.long_document)
+    summary = await cache.aget(cache_key) if cache is not None else None
+    if summary is not None:
+        return SummarizeResponse(
+            summary=summary,
+            input_length=len(request.text.split()),
+            output_length=len(summary.split()),
+            processing_time=round(time.time() - start_time, 3),
+        )
+
+    capture = profiler.select(headers) if profiler is not None else None
+
+    # Raises QueueFullError (→ 503) before any work is queued
+    key = (request.max_length, request.num_beams)
+    if request.long_document:
+        # Chunks of one document are batched together inside summarize_long
+        def job():
+            return summarizer.summarize_long(
+                request.text,
+                max_length=request.max_length,
+                num_beams=request.num_beams,
+                early_stopping=config.model.early_stopping,
+            )
+    elif service.submit_batched is not None and (capture is None or capture.reason == "slow"):
+        # Slow-request captures stay batched (every request has one when
+        # profile_slow_ms is set); the trace then covers the whole batch
+        job = None
+    else:
+        # Forced and sampled traces skip micro-batching so they only cover this request
+        def job():
+            return run_batch(summarizer, key, [request.text])[0]
+
+    try:
+        if job is None:
+            wrap = (lambda fn: profiler.wrap(capture, fn)) if capture is not None else None
+            future = service.submit_batched(request.text, key=key, wrap=wrap)
+        else:
+            future = service.submit(profiler.wrap(capture, job) if capture is not None else job)
+
+        stages = None
+        summary = await asyncio.wrap_future(future)
+        if request.long_document:
+            summary, stages = summary
+        if cache is not None:
+            await cache.aset(cache_key, summary)
+
+        processing_time = round(time.time() - start_time, 3)
+
+        return SummarizeResponse(
+            summary=summary,
+            input_length=len(request.text.split()),
+            output_length=len(summary.split()),
+            processing_time=processing_time,
+            stages=stages,
+        )
+
+    except QueueFullError:
+        raise
+
+    except Exception as e:
+        metrics.ERRORS.inc(type=type(e).__name__)
+        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+    finally:
+        if capture is not None:
+            profiler.finish(capture, "/api/summarize", time.time() - start_time)
+
+
+async def summarize_many(service, request):
+    """Summarize a list of texts with shared generation settings, in one job."""
+    start_time = time.time()
+    cache = service.cache
+
+    # Validate per item so one bad text doesn't fail the whole batch
+    valid = [i for i, text in enumerate(request.texts) if len(text) >= 10]
+
+    # Serve repeats from the cache and only generate the misses
+    outputs = {}
+    cache_keys = {}
+    if cache is not None:
+        for i in valid:
+            cache_keys[i] = service.cache_key(request.texts[i], request.max_length, request.num_beams)
+            summary = await cache.aget(cache_keys[i])
+            if summary is not None:
+                outputs[i] = {"summary": summary, "processing_time": 0.0, "error": None}
+    misses = [i for i in valid if i not in outputs]
+
+    # All cached or invalid: no model work, so don't take an admission slot
+    generated = []
+    if misses:
+        future = service.submit(
+            service.summarizer.summarize_sorted,
+            [request.texts[i] for i in misses],
+            max_length=request.max_length,
+            num_beams=request.num_beams,
+            early_stopping=config.model.early_stopping,
+        )
+
+        try:
+            generated = await asyncio.wrap_future(future)
+        except Exception as e:
+            metrics.ERRORS.inc(type=type(e).__name__)
+            raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+    for i, output in zip(misses, generated):
+        outputs[i] = output
+        if output["error"] is not None:
+            metrics.ERRORS.inc(type="BatchItemFailed")
+        if cache is not None and output["error"] is None:
+            await cache.aset(cache_keys[i], output["summary"])
+
+    results = [
+        BatchSummarizeItem(
+            index=i,
+            input_length=len(text.split()),
+            output_length=0,
+            processing_time=0.0,
+            error="Text must be at least 10 characters",
+        )
+        for i, text in enumerate(request.texts)
+    ]
+    for i, output in outputs.items():
+        summary = output["summary"]
+        results[i] = BatchSummarizeItem(
+            index=i,
+            summary=summary,
+            input_length=len(request.texts[i].split()),
+            output_length=len(summary.split()) if summary else 0,
+            processing_time=output["processing_time"],
+            error=output["error"],
+        )
+
+    return BatchSummarizeResponse(
+        results=results,
+        processing_time=round(time.time() - start_time, 3),
+    )
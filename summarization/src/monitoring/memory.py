@@ -0,0 +1,51 @@
+"""
+Process memory helpers (Linux /proc with a portable fallback).
+"""
+
+import resource
+import sys
+
+
+def rss_mb(pid="self"):
+    """Current resident set size of a process in MB."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb() if pid == "self" else 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def memory_breakdown_mb(pid="self"):
+    """
+    RSS of a process split into shared and private pages, plus PSS, in MB.
+
+    PSS charges each shared page to its processes in equal parts, so the
+    PSS of all workers adds up to their real footprint. Falls back to RSS
+    only where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    except OSError:
+        return {"rss_mb": round(rss_mb(pid), 1), "pss_mb": None, "shared_mb": None, "private_mb": None}
+
+    return {
+        "rss_mb": round(values.get("Rss", 0.0), 1),
+        "pss_mb": round(values.get("Pss", 0.0), 1),
+        "shared_mb": round(values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0), 1),
+    }
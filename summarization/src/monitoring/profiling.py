@@ -0,0 +1,221 @@
+"""
+Opt-in request profiling with a bounded in-memory trace buffer.
+
+A request is profiled when it carries the profiling header (e.g.
+`X-Profile: 1`), when it is the N-th request (`profile_sample_every`),
+or — with `profile_slow_ms` set — always, keeping the trace only if the
+request turned out slower than the threshold.
+
+Two capture modes, both run in the thread that does the model work:
+
+  - "stack": samples the Python stack every `profile_interval_ms` and
+    stores collapsed stacks (`func (file:line);... count`, the format of
+    `py-spy record --format raw`), ready for flamegraph.pl or speedscope.
+  - "torch": wraps the job in `torch.profiler.profile` and stores the
+    Chrome trace (open in chrome://tracing or Perfetto).
+
+Only one capture runs at a time per process. A selected request whose
+model work starts while another capture is running is served untraced
+and counted in the `profiles_skipped_total` metric (labelled by reason).
+
+When profiling is disabled `RequestProfiler.from_config()` returns None
+and the API skips every hook, so there is no per-request cost.
+"""
+
+import collections
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from src.config import config
+from src.monitoring import metrics
+
+
+class _StackSampler:
+    """Background thread sampling one thread's Python stack into collapsed-stack counts."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class Capture:
+    """Profiling state of one request."""
+
+    def __init__(self, reason):
+        # "header" / "sample" are always kept; "slow" only past the threshold
+        self.reason = reason
+        self.data = None
+        self.job_seconds = None
+
+
+class RequestProfiler:
+    """
+    Selects requests to profile, captures their model work and keeps the
+    most recent traces.
+
+    Args:
+        mode: "stack" (sampled Python stacks) or "torch" (torch.profiler).
+        sample_every: Profile 1 in N requests (0 = never).
+        slow_ms: Profile every request and keep traces slower than this.
+        header: Request header that forces a trace when set to "1".
+        buffer_size: Traces kept; the oldest is dropped first.
+        interval_ms: Stack sampling interval ("stack" mode).
+    """
+
+    def __init__(self, mode="stack", sample_every=0, slow_ms=None, header="X-Profile",
+                 buffer_size=20, interval_ms=5.0):
+        if mode not in ("stack", "torch"):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.sample_every = sample_every
+        self.slow_ms = slow_ms
+        self.header = header.lower()
+        self.interval = interval_ms / 1000.0
+
+        self._traces = collections.deque(maxlen=max(1, buffer_size))
+        self._ids = itertools.count(1)
+        self._requests = itertools.count(1)
+        self._lock = threading.Lock()
+        # Only one capture at a time: torch.profiler can't nest, and
+        # overlapping stack samples would blur each other
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_config(cls):
+        """Profiler configured from `config.serving`, or None when profiling is disabled."""
+        serving = config.serving
+        if not serving.profiling_enabled:
+            return None
+        return cls(
+            mode=serving.profile_mode,
+            sample_every=serving.profile_sample_every,
+            slow_ms=serving.profile_slow_ms,
+            header=serving.profile_header,
+            buffer_size=serving.profile_buffer_size,
+            interval_ms=serving.profile_interval_ms,
+        )
+
+    def select(self, headers):
+        """Return a Capture if this request should be profiled, else None."""
+        if headers.get(self.header) == "1":
+            return Capture("header")
+        if self.sample_every and next(self._requests) % self.sample_every == 0:
+            return Capture("sample")
+        if self.slow_ms is not None:
+            return Capture("slow")
+        return None
+
+    def wrap(self, capture, fn):
+        """
+        Wrap `fn` so it runs under `capture` in whatever thread calls it.
+
+        If another capture is running, `fn` runs untraced (no trace is
+        stored for it) and the skip is counted in PROFILES_SKIPPED.
+        """
+
+        def run(*args, **kwargs):
+            if not self._busy.acquire(blocking=False):
+                metrics.PROFILES_SKIPPED.inc(reason=capture.reason)
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                if self.mode == "torch":
+                    return self._run_torch(capture, fn, args, kwargs)
+                return self._run_stack(capture, fn, args, kwargs)
+            finally:
+                capture.job_seconds = time.perf_counter() - start
+                self._busy.release()
+
+        return run
+
+    def finish(self, capture, endpoint, duration):
+        """Store the trace if it was forced, sampled or slow enough. Returns its id or None."""
+        if capture.data is None:
+            return None
+        if capture.reason == "slow" and duration * 1000 < self.slow_ms:
+            return None
+
+        with self._lock:
+            trace_id = next(self._ids)
+            self._traces.append({
+                "id": trace_id,
+                "endpoint": endpoint,
+                "reason": capture.reason,
+                "mode": self.mode,
+                "duration_ms": round(duration * 1000, 1),
+                "job_ms": round(capture.job_seconds * 1000, 1),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "size_bytes": len(capture.data),
+                "data": capture.data,
+            })
+        return trace_id
+
+    def list(self):
+        """Metadata of the stored traces, newest first."""
+        with self._lock:
+            return [{k: v for k, v in trace.items() if k != "data"} for trace in reversed(self._traces)]
+
+    def get(self, trace_id):
+        with self._lock:
+            return next((trace for trace in self._traces if trace["id"] == trace_id), None)
+
+    # --- Capture modes ---
+    def _run_stack(self, capture, fn, args, kwargs):
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            capture.data = sampler.collapsed().encode()
+
+    def _run_torch(self, capture, fn, args, kwargs):
+        import torch
+        from torch.profiler import ProfilerActivity, profile, record_function
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+
+        with profile(activities=activities) as prof:
+            with record_function(getattr(fn, "__name__", "request")):
+                result = fn(*args, **kwargs)
+
+        # export_chrome_trace only writes to a path
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            prof.export_chrome_trace(path)
+            with open(path, "rb") as f:
+                capture.data = f.read()
+        finally:
+            os.remove(path)
+        return result
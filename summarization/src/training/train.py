@@ -1,15 +1,13 @@
-import pandas as pd
-from datasets import Dataset
 from transformers import (
-    T5Tokenizer,
+    T5TokenizerFast,
     T5ForConditionalGeneration,
     Seq2SeqTrainer,
     Seq2SeqTrainingArguments,
 )
 
 from src.config import config
+from src.data.preprocess import load_processed_dataset
 from src.training.trainer_utils import (
-    build_preprocess_function,
     build_data_collator,
     build_compute_metrics,
 )
@@ -20,29 +18,19 @@ def train():
     # Ensure directories exist
     config.paths.create_dirs()
 
-    # Load data
-    df = pd.read_csv(config.data.raw_data_path)
-
-    df = df[[config.data.text_column, config.data.summary_column]].dropna()
-
-    if config.data.max_samples:
-        df = df.head(config.data.max_samples)
+    # Load pretrained model & tokenizer
+    tokenizer = T5TokenizerFast.from_pretrained(config.model.model_name)
+    model = T5ForConditionalGeneration.from_pretrained(config.model.model_name)
 
-    dataset = Dataset.from_pandas(df)
+    # Cleaned, deduplicated and tokenized data (cached under processed_data_path)
+    dataset = load_processed_dataset(tokenizer)
 
     # Train/Validation split
     dataset = dataset.train_test_split(
-        test_size=config.training.validation_split
+        test_size=config.training.validation_split,
+        seed=config.training.split_seed,
     )
 
-    # Load pretrained model & tokenizer
-    tokenizer = T5Tokenizer.from_pretrained(config.model.model_name)
-    model = T5ForConditionalGeneration.from_pretrained(config.model.model_name)
-
-    # Preprocessing
-    preprocess_function = build_preprocess_function(tokenizer, config)
-    dataset = dataset.map(preprocess_function, batched=True)
-
     # Data collator
     data_collator = build_data_collator(tokenizer, model)
 
@@ -1,7 +1,7 @@
-import numpy as np
-import evaluate
 from transformers import DataCollatorForSeq2Seq
 
+from src.evaluation.rouge_eval import rouge_scores
+
 
 def build_preprocess_function(tokenizer, config):
     """
@@ -37,7 +37,8 @@ def build_data_collator(tokenizer, model):
 
 
 def build_compute_metrics(tokenizer):
-    rouge = evaluate.load("rouge")
+    # Pad / eos / other special tokens are not part of the summary
+    ignore_ids = set(tokenizer.all_special_ids)
 
     def compute_metrics(eval_preds):
         preds, labels = eval_preds
@@ -45,26 +46,15 @@ def build_compute_metrics(tokenizer):
         if isinstance(preds, tuple):
             preds = preds[0]
 
-        decoded_preds = tokenizer.batch_decode(
-            preds,
-            skip_special_tokens=True
-        )
-
-        labels = np.where(labels != -100, labels, tokenizer.pad_token_id)
-        decoded_labels = tokenizer.batch_decode(
-            labels,
-            skip_special_tokens=True
-        )
-
-        result = rouge.compute(
-            predictions=decoded_preds,
-            references=decoded_labels
-        )
+        # Score generated ids against label ids directly (-100 is dropped).
+        # These are ROUGE on T5 subwords, not comparable with word-level
+        # ROUGE (rouge_eval's "words" scores), hence the _tok suffix.
+        result = rouge_scores(preds, labels, ignore_ids=ignore_ids)
 
         return {
-            "rouge1": result["rouge1"],
-            "rouge2": result["rouge2"],
-            "rougeL": result["rougeL"],
+            "rouge1_tok": result["rouge1"],
+            "rouge2_tok": result["rouge2"],
+            "rougeL_tok": result["rougeL"],
         }
 
     return compute_metrics
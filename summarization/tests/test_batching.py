@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from src.inference.batching import MicroBatcher
+
+
+def _batcher(run_batch, **kwargs):
+    batcher = MicroBatcher(run_batch, max_batch_size=2, max_wait_ms=200, **kwargs)
+    batcher.start()
+    return batcher
+
+
+def test_cancelled_request_does_not_block_its_batch():
+    batches = []
+
+    def run_batch(key, payloads):
+        batches.append(payloads)
+        return [payload.upper() for payload in payloads]
+
+    batcher = _batcher(run_batch)
+    try:
+        first = batcher.submit("one", key=(128, 4))
+        second = batcher.submit("two", key=(128, 4))
+        # What asyncio.wrap_future does when the client disconnects
+        assert first.cancel()
+
+        assert second.result(timeout=5) == "TWO"
+        assert batches == [["two"]]
+    finally:
+        batcher.stop()
+    assert batcher.pending == 0
+
+
+def test_cancel_during_generation_still_resolves_the_rest():
+    started = threading.Event()
+    proceed = threading.Event()
+
+    def run_batch(key, payloads):
+        started.set()
+        proceed.wait(5)
+        return [payload.upper() for payload in payloads]
+
+    batcher = _batcher(run_batch)
+    try:
+        first = batcher.submit("one", key=(128, 4))
+        second = batcher.submit("two", key=(128, 4))
+        assert started.wait(5)
+        # Already claimed by the batch: cancelling is refused, not an error later
+        assert not first.cancel()
+        proceed.set()
+
+        assert first.result(timeout=5) == "ONE"
+        assert second.result(timeout=5) == "TWO"
+    finally:
+        batcher.stop()
+
+
+def test_missing_results_fail_the_leftover_requests():
+    batcher = _batcher(lambda key, payloads: payloads[:1])
+    try:
+        first = batcher.submit("one", key=(128, 4))
+        second = batcher.submit("two", key=(128, 4))
+
+        assert first.result(timeout=5) == "one"
+        with pytest.raises(RuntimeError, match="1 results for 2 requests"):
+            second.result(timeout=5)
+    finally:
+        batcher.stop()
+
+
+def test_wrap_applies_to_the_whole_batch():
+    wrapped = []
+
+    def wrap(fn):
+        def run(key, payloads):
+            wrapped.append(list(payloads))
+            return fn(key, payloads)
+        return run
+
+    batcher = _batcher(lambda key, payloads: [payload.upper() for payload in payloads])
+    try:
+        first = batcher.submit("one", key=(128, 4), wrap=wrap)
+        second = batcher.submit("two", key=(128, 4))
+
+        assert (first.result(timeout=5), second.result(timeout=5)) == ("ONE", "TWO")
+        assert wrapped == [["one", "two"]]
+    finally:
+        batcher.stop()
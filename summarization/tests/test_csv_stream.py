@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.data.csv_stream import stream_csv
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLUMNS = ["Text", "Summary"]
+
+CSV = (
+    "Id,Text,Summary\n"
+    "1,First review text,First summary\n"
+    "2,,Summary without text\n"
+    "3,Text without summary,\n"
+    '4,"Quoted text, with a comma\nand a line break",Fourth summary\n'
+    "5,Fifth review text,Fifth summary\n"
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_engines_drop_the_same_blank_rows(csv_path):
+    pytest.importorskip("pyarrow")
+    by_pandas = stream_csv(csv_path, COLUMNS, engine="pandas")
+    by_arrow = stream_csv(csv_path, COLUMNS, engine="pyarrow")
+
+    assert by_pandas["Summary"].tolist() == ["First summary", "Fourth summary", "Fifth summary"]
+    pd.testing.assert_frame_equal(by_arrow, by_pandas)
+
+
+def test_reservoir_sampling_is_bounded_and_reproducible(csv_path):
+    first = stream_csv(csv_path, COLUMNS, max_samples=2, sampling="reservoir", seed=0, engine="pandas")
+    second = stream_csv(csv_path, COLUMNS, max_samples=2, sampling="reservoir", seed=0, engine="pandas")
+
+    assert len(first) == 2
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_copy_in_text_generator_is_identical():
+    # Both projects are separate Docker contexts, so each ships this module
+    other = os.path.join(os.path.dirname(PROJECT_DIR), "text_generator", "src", "data", "csv_stream.py")
+    if not os.path.exists(other):
+        pytest.skip("text_generator project not checked out")
+    with open(os.path.join(PROJECT_DIR, "src", "data", "csv_stream.py")) as f, open(other) as g:
+        assert f.read() == g.read(), "src/data/csv_stream.py differs between the two projects"
@@ -0,0 +1,75 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+
+from src.inference.executor import QueueFullError
+from src.monitoring import metrics
+from src.monitoring.http import add_profile_routes, add_queue_full_handler, add_request_metrics
+from src.monitoring.profiling import RequestProfiler
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_app(profiler=None):
+    app = FastAPI()
+    add_request_metrics(app, lambda path: metrics)
+    add_queue_full_handler(app, lambda path: metrics)
+    add_profile_routes(app, lambda: profiler)
+
+    @app.post("/api/full")
+    def full():
+        raise QueueFullError(retry_after=3)
+
+    return app
+
+
+def request(app, method, path, client=("127.0.0.1", 1234)):
+    transport = httpx.ASGITransport(app=app, client=client)
+
+    async def send():
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.request(method, path)
+
+    return asyncio.run(send())
+
+
+def test_queue_full_answers_503_with_retry_after():
+    response = request(make_app(), "POST", "/api/full")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    rendered = metrics.REGISTRY.render()
+    assert 'endpoint="/api/full",status="503"' in rendered
+
+
+def test_unknown_paths_share_one_label():
+    request(make_app(), "GET", "/api/does-not-exist-123")
+
+    rendered = metrics.REGISTRY.render()
+    assert "does-not-exist-123" not in rendered
+    assert 'endpoint="other",status="404"' in rendered
+
+
+def test_profiles_are_local_only_and_404_when_disabled():
+    assert request(make_app(), "GET", "/debug/profiles").status_code == 404
+
+    profiler = RequestProfiler(mode="stack")
+    app = make_app(profiler)
+    assert request(app, "GET", "/debug/profiles").json() == {"mode": "stack", "traces": []}
+    assert request(app, "GET", "/debug/profiles", client=("10.0.0.5", 1234)).status_code == 403
+    assert request(app, "GET", "/debug/profiles/1").status_code == 404
+
+
+def test_copy_in_text_generator_is_identical():
+    # Both projects are separate Docker contexts, so each ships this module
+    other = os.path.join(os.path.dirname(PROJECT_DIR), "text_generator", "src", "monitoring", "http.py")
+    if not os.path.exists(other):
+        pytest.skip("text_generator project not checked out")
+    with open(os.path.join(PROJECT_DIR, "src", "monitoring", "http.py")) as f, open(other) as g:
+        assert f.read() == g.read(), "src/monitoring/http.py differs between the two projects"
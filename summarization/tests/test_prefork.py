@@ -0,0 +1,56 @@
+import os
+import re
+import signal
+import sys
+
+import pytest
+
+if sys.platform == "win32":
+    pytest.skip("Pre-fork serving needs os.fork", allow_module_level=True)
+
+from src.inference import prefork
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def test_crash_looping_worker_backs_off_then_stops_the_master(monkeypatch, capsys, restore_signals):
+    def crash(*args, **kwargs):
+        raise RuntimeError("worker failed to start")
+
+    monkeypatch.setattr(prefork, "_run_worker", crash)
+
+    with pytest.raises(SystemExit) as exit_info:
+        prefork.run_prefork(
+            app=None,
+            host="127.0.0.1",
+            port=0,
+            workers=1,
+            threads=1,
+            restart_backoff=0.1,
+            max_restart_backoff=0.2,
+            max_failures=4,
+            failure_window=60.0,
+        )
+
+    assert exit_info.value.code == 1
+    out = capsys.readouterr().out
+    # Doubling, capped at max_restart_backoff, then giving up on the 4th exit
+    assert re.findall(r"restarting in ([\d.]+)s", out) == ["0.1", "0.2", "0.2"]
+    assert "failed 4 times" in out
+
+
+def test_copy_in_text_generator_is_identical():
+    # Both projects are separate Docker contexts, so each ships this module
+    other = os.path.join(os.path.dirname(PROJECT_DIR), "text_generator", "src", "inference", "prefork.py")
+    if not os.path.exists(other):
+        pytest.skip("text_generator project not checked out")
+    with open(os.path.join(PROJECT_DIR, "src", "inference", "prefork.py")) as f, open(other) as g:
+        assert f.read() == g.read(), "src/inference/prefork.py differs between the two projects"
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("datasets")
+
+from src.data.preprocess import Deduplicator
+
+
+def test_near_duplicates_are_dropped():
+    dedup = Deduplicator()
+    text = "the coffee arrived fresh and tastes smooth with a rich chocolate finish every morning"
+
+    assert dedup.keep(text)
+    assert not dedup.keep(text.upper())
+    assert not dedup.keep(text + " indeed")
+    assert dedup.keep("terrible packaging, the box was crushed and half the bags were torn open")
+    assert (dedup.exact_removed, dedup.near_removed) == (1, 1)
+
+
+def test_state_is_bounded_by_max_entries():
+    dedup = Deduplicator(max_entries=2)
+    texts = [f"{word} " * 8 for word in ("alpha", "bravo", "charlie", "delta")]
+
+    assert all(dedup.keep(text) for text in texts)
+    assert len(dedup.seen_digests) == len(dedup.signatures) == 2
+    assert sum(len(ids) for bucket in dedup.buckets for ids in bucket.values()) == 2 * dedup.bands
+    # Recent texts are still caught; the oldest ones were forgotten
+    assert not dedup.keep(texts[-1])
+    assert dedup.keep(texts[0])
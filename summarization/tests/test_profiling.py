@@ -0,0 +1,39 @@
+import threading
+
+from src.monitoring import metrics
+from src.monitoring.profiling import Capture, RequestProfiler
+
+
+def _skipped(reason):
+    prefix = f'{metrics.NAMESPACE}_profiles_skipped_total{{reason="{reason}"}} '
+    for line in metrics.REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_overlapping_capture_runs_untraced_and_is_counted():
+    profiler = RequestProfiler(mode="stack", interval_ms=1.0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_job():
+        started.set()
+        release.wait(5)
+        return "first"
+
+    first = Capture("header")
+    thread = threading.Thread(target=profiler.wrap(first, slow_job))
+    thread.start()
+    started.wait(5)
+
+    before = _skipped("sample")
+    second = Capture("sample")
+    assert profiler.wrap(second, lambda: "second")() == "second"
+
+    release.set()
+    thread.join()
+
+    assert second.data is None
+    assert profiler.finish(second, "/api/summarize", 1.0) is None
+    assert first.data is not None
+    assert _skipped("sample") == before + 1
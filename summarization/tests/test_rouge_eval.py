@@ -0,0 +1,96 @@
+import random
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.evaluation.rouge_eval import _rouge_n, lcs_length, score_pair, tokenize_texts
+
+WORDS = (
+    "the coffee tea dog food great taste bad price value fresh box arrived "
+    "smell flavor sweet bitter love hate order again never best worst my cat"
+).split()
+
+
+def _random_text(rng, max_sentences=3):
+    sentences = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12))).capitalize() + "."
+        for _ in range(rng.randint(1, max_sentences))
+    ]
+    return "\n".join(sentences)
+
+
+def _random_ids(rng, max_len=30, vocab=6):
+    return [rng.randint(1, vocab) for _ in range(rng.randint(0, max_len))]
+
+
+def _lcs_dp(a, b):
+    """Textbook O(m·n) dynamic program."""
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                table[i][j] = table[i - 1][j - 1] + 1
+            else:
+                table[i][j] = max(table[i - 1][j], table[i][j - 1])
+    return table[-1][-1]
+
+
+def _rouge_n_counter(pred, ref, n):
+    """ROUGE-N F-measure from Counters of n-gram tuples."""
+    pred_grams = Counter(tuple(pred[i:i + n]) for i in range(len(pred) - n + 1))
+    ref_grams = Counter(tuple(ref[i:i + n]) for i in range(len(ref) - n + 1))
+    hits = sum((pred_grams & ref_grams).values())
+    pred_count, ref_count = sum(pred_grams.values()), sum(ref_grams.values())
+    precision = hits / max(pred_count, 1)
+    recall = hits / max(ref_count, 1)
+    return 0.0 if precision + recall == 0 else 2 * precision * recall / (precision + recall)
+
+
+def test_bit_parallel_lcs_matches_dynamic_programming():
+    rng = random.Random(0)
+    for _ in range(500):
+        a, b = _random_ids(rng), _random_ids(rng)
+        assert lcs_length(a, b) == _lcs_dp(a, b)
+    # Longer than one machine word
+    a, b = _random_ids(rng, 300), _random_ids(rng, 300)
+    assert lcs_length(a, b) == _lcs_dp(a, b)
+
+
+@pytest.mark.parametrize("n", [1, 2])
+def test_rouge_n_matches_counting_ngrams(n):
+    rng = random.Random(n)
+    for _ in range(500):
+        pred, ref = _random_ids(rng), _random_ids(rng)
+        expected = _rouge_n_counter(pred, ref, n)
+        assert _rouge_n(np.asarray(pred, dtype=np.int64), np.asarray(ref, dtype=np.int64), n) == pytest.approx(expected)
+
+
+def test_large_ids_do_not_collide_in_ngram_keys():
+    # T5 ids are far below 2^31; keys must stay distinct at the top of that range
+    big = (1 << 31) - 1
+    pred = np.asarray([big, 1, big], dtype=np.int64)
+    ref = np.asarray([1, big, 1], dtype=np.int64)
+    assert _rouge_n(pred, ref, 2) == pytest.approx(_rouge_n_counter(pred.tolist(), ref.tolist(), 2))
+
+
+def test_matches_rouge_score_package():
+    rouge_scorer = pytest.importorskip("rouge_score.rouge_scorer")
+
+    rng = random.Random(0)
+    preds = [_random_text(rng) for _ in range(300)]
+    refs = [_random_text(rng) for _ in range(300)]
+    # Edge cases: empty, identical, punctuation only, blank lines
+    preds += ["", "same text here", "!!!", "a b\n\nc"]
+    refs += ["something", "same text here", "words", "a\nb c"]
+
+    scorer = rouge_scorer.RougeScorer(["rouge1", "rouge2", "rougeL", "rougeLsum"])
+    pred_ids, vocab = tokenize_texts(preds)
+    ref_ids, _ = tokenize_texts(refs, vocab)
+
+    for p_text, r_text, p_ids, r_ids in zip(preds, refs, pred_ids, ref_ids):
+        expected = scorer.score(r_text, p_text)
+        local = score_pair(p_ids, r_ids, sentence_sep_ids={0})
+        for key, score in expected.items():
+            assert local[key] == pytest.approx(score.fmeasure, abs=1e-9), (key, p_text, r_text)
@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from src.inference.cache import ResultCache
+from src.inference.executor import QueueFullError
+from src.inference.service import BatchSummarizeRequest, SummarizationService, summarize_many
+
+
+class StubSummarizer:
+    revision = "stub"
+
+    def summarize_sorted(self, texts, **kwargs):
+        return [{"summary": text[:5], "processing_time": 0.0, "error": None} for text in texts]
+
+
+def test_batch_of_cache_hits_takes_no_admission_slot():
+    summarizer = StubSummarizer()
+    submitted = []
+
+    def submit(fn, *args, **kwargs):
+        submitted.append(args)
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+    service = SummarizationService(summarizer=summarizer, submit=submit, cache=ResultCache())
+    request = BatchSummarizeRequest(texts=["first long text", "second long text", "short"])
+    asyncio.run(summarize_many(service, request))
+    assert len(submitted) == 1
+
+    def reject(*args, **kwargs):
+        raise QueueFullError()
+
+    # Every text is now a hit or invalid, so a full queue doesn't matter
+    service.submit = reject
+    response = asyncio.run(summarize_many(service, request))
+
+    assert [item.summary for item in response.results] == ["first", "secon", None]
@@ -6,14 +6,23 @@ Serves the fine-tuned GPT-2 model for text generation from summaries.
 import sys
 import os
 import time
+import threading
+from typing import Optional
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import Response
+from pydantic import BaseModel
 from src.config import config
-from src.inference.generate import load_model, generate_text
+from src.inference import service as handlers
+from src.inference.cache import ResultCache
+from src.inference.executor import InferenceExecutor
+from src.inference.service import GenerateRequest, GenerateResponse, GenerationService, model_revision
+from src.monitoring import metrics
+from src.monitoring.http import add_profile_routes, add_queue_full_handler, add_request_metrics
+from src.monitoring.profiling import RequestProfiler
 
 # --- App Setup ---
 app = FastAPI(
@@ -34,82 +43,166 @@ app.add_middleware(
 # --- Global Model State ---
 tokenizer = None
 model = None
+executor = None
+cache = None
+profiler = None
+# Handler dependencies; set once the model is ready to serve
+service = None
+# "loading" → "warming" → "healthy" (or "failed"); timings in seconds per phase
+startup_status = "loading"
+startup_timings = {}
+# Set by serve.py in the parent before forking workers (weights shared copy-on-write)
+preloaded = None
+
+
+add_request_metrics(app, lambda path: metrics)
+add_queue_full_handler(app, lambda path: metrics)
+add_profile_routes(app, lambda: profiler)
 
 
 @app.on_event("startup")
 def startup_load_model():
-    """Load the model once at startup."""
-    global tokenizer, model
+    """
+    Load the model at startup.
+
+    With `background_startup` the server starts answering right away:
+    health reports "loading" / "warming" (HTTP 503) until the model is
+    loaded and warmed up, and requests get 503 meanwhile.
+    """
+    if config.serving.background_startup:
+        threading.Thread(target=_load_and_warm_up, name="model-loader", daemon=True).start()
+    else:
+        _load_and_warm_up()
+
+
+def load_weights():
+    """Import the inference stack and load the tokenizer and model, without warmup or threads."""
+    load_start = time.perf_counter()
+    # torch / transformers are imported here rather than at module import,
+    # so uvicorn binds the port (and health answers) within a second
+    from src.inference.generate import load_model
+    startup_timings["imports"] = round(time.perf_counter() - load_start, 3)
+
+    loaded = load_model(timings=startup_timings)
+    metrics.MODEL_LOAD_SECONDS.set(round(time.perf_counter() - load_start, 3))
+    print("✅ GPT-2 Text Generator model loaded successfully.")
+    return loaded
+
+
+def _load_and_warm_up():
+    """Load (unless preloaded) and warm up the model, then start serving."""
+    global tokenizer, model, executor, cache, profiler, service, startup_status
+    startup_start = time.perf_counter()
     try:
-        tokenizer, model = load_model()
-        print("✅ GPT-2 Text Generator model loaded successfully.")
+        loaded_tokenizer, loaded_model = preloaded if preloaded is not None else load_weights()
+        from src.inference import generate as engine
+
+        startup_status = "warming"
+        phase_start = time.perf_counter()
+        print(f"   Warmup: {engine.warmup(loaded_tokenizer, loaded_model)}")
+        startup_timings["warmup"] = round(time.perf_counter() - phase_start, 3)
     except Exception as e:
+        startup_status = "failed"
         print(f"❌ Failed to load GPT-2 model: {e}")
+        return
 
+    profiler = RequestProfiler.from_config()
 
-# --- Request / Response Schemas ---
-class GenerateRequest(BaseModel):
-    summary: str = Field(..., min_length=5, description="Summary/prompt to expand into full text")
-    max_length: int = Field(default=200, ge=50, le=512, description="Max tokens to generate")
-    temperature: float = Field(default=0.7, ge=0.1, le=2.0, description="Sampling temperature")
-    top_k: int = Field(default=40, ge=1, le=100, description="Top-K filtering")
-    top_p: float = Field(default=0.90, ge=0.1, le=1.0, description="Nucleus sampling probability")
+    if config.serving.cache_enabled:
+        cache = ResultCache(
+            max_entries=config.serving.cache_max_entries,
+            ttl_seconds=config.serving.cache_ttl_seconds,
+            shared_path=config.serving.cache_shared_path,
+        )
+
+    executor = InferenceExecutor(
+        num_workers=config.serving.num_workers,
+        torch_threads=config.serving.torch_threads,
+        max_queue_size=config.serving.max_queue_size,
+        retry_after=config.serving.retry_after_seconds,
+    )
+    metrics.QUEUE_DEPTH.set_function(lambda: executor.pending)
+
+    # Published last: handlers treat a set `service` as ready to serve
+    tokenizer, model = loaded_tokenizer, loaded_model
+    service = GenerationService(
+        tokenizer=loaded_tokenizer,
+        model=loaded_model,
+        engine=engine,
+        submit=executor.submit,
+        revision=model_revision(loaded_model),
+        cache=cache,
+        profiler=profiler,
+    )
+    startup_timings["total"] = round(time.perf_counter() - startup_start, 3)
+    for phase, seconds in startup_timings.items():
+        metrics.STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+    startup_status = "healthy"
+    print(f"✅ Ready in {startup_timings['total']}s: {startup_timings}")
 
 
-class GenerateResponse(BaseModel):
-    generated_text: str
-    input_length: int
-    output_length: int
-    processing_time: float
+@app.on_event("shutdown")
+def stop_workers():
+    """Drain the inference workers."""
+    if executor is not None:
+        executor.shutdown()
 
 
+# --- Request / Response Schemas ---
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     model_name: str
+    cache: Optional[dict] = None
+    startup: Optional[dict] = None
+
+
+def _raise_not_ready():
+    metrics.ERRORS.inc(type="ModelNotLoaded")
+    if startup_status in ("loading", "warming"):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is {startup_status}. Please try again shortly.",
+            headers={"Retry-After": str(config.serving.retry_after_seconds)},
+        )
+    raise HTTPException(status_code=503, detail="Model not loaded. Please try again later.")
 
 
 # --- Endpoints ---
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (per-stage latency, tokens, errors, queue)."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/generate/health", response_model=HealthResponse)
-def health_check():
-    """Check API and model status."""
+def health_check(response: Response):
+    """Check API and model status (503 until the model is loaded and warmed up)."""
+    if startup_status != "healthy":
+        response.status_code = 503
     return HealthResponse(
-        status="healthy",
+        status=startup_status,
         model_loaded=model is not None,
         model_name="gpt2-finetuned",
+        cache=cache.stats() if cache is not None else None,
+        startup=startup_timings or None,
     )
 
 
 @app.post("/api/generate", response_model=GenerateResponse)
-def generate(request: GenerateRequest):
+async def generate(request: GenerateRequest, http_request: Request):
     """Generate expanded text from a summary."""
-    if tokenizer is None or model is None:
-        raise HTTPException(status_code=503, detail="Model not loaded. Please try again later.")
-
-    start_time = time.time()
-
-    try:
-        generated = generate_text(
-            summary=request.summary,
-            tokenizer=tokenizer,
-            model=model,
-            max_length=request.max_length,
-            temperature=request.temperature,
-            top_k=request.top_k,
-            top_p=request.top_p,
-        )
+    if service is None:
+        _raise_not_ready()
+    return await handlers.generate(service, request, http_request.headers)
 
-        processing_time = round(time.time() - start_time, 3)
 
-        return GenerateResponse(
-            generated_text=generated,
-            input_length=len(request.summary.split()),
-            output_length=len(generated.split()),
-            processing_time=processing_time,
-        )
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Text generation failed: {str(e)}")
+@app.post("/api/generate/stream")
+def generate_stream(request: GenerateRequest):
+    """Stream expanded text as newline-delimited JSON while tokens are generated."""
+    if service is None:
+        _raise_not_ready()
+    return handlers.generate_stream(service, request)
 
 
 if __name__ == "__main__":
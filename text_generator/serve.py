@@ -0,0 +1,70 @@
+"""
+Multi-worker launcher for the Text Generator API with shared model weights.
+
+Loads the GPT-2 weights once in this process, then forks the uvicorn
+workers so they share one copy of the weights (see
+src/inference/prefork.py). Use instead of `uvicorn api:app --workers N`:
+
+    python serve.py --workers 4
+    python serve.py --workers 4 --threads 2 --memory-report 60
+
+Workers default to $WEB_CONCURRENCY (1). With the ONNX backend
+every worker loads its own copy, since its sessions don't survive a fork.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import api
+from src.config import config
+from src.inference.prefork import run_prefork
+
+
+def can_share_weights():
+    """Fork-after-load only works for PyTorch (the model is always served on CPU)."""
+    return config.model.backend != "onnx"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Text Generator API from forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--threads", type=int, default=config.serving.torch_threads,
+                        help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--memory-report", type=float, default=None,
+                        help="Seconds between per-worker memory reports (default: once)")
+    parser.add_argument("--no-share", action="store_true", help="Load the weights in every worker")
+    args = parser.parse_args()
+
+    preload = None
+    if not args.no_share:
+        if can_share_weights():
+            def preload():
+                # One thread: no OpenMP pool may exist when the workers are forked
+                import torch
+                torch.set_num_threads(1)
+                api.preloaded = api.load_weights()
+        else:
+            print("⚠️ ONNX Runtime sessions can't be shared across a fork; each worker loads its own model.")
+
+    run_prefork(
+        api.app,
+        preload=preload,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads=args.threads,
+        memory_report_interval=args.memory_report,
+        restart_backoff=config.serving.worker_restart_backoff,
+        max_restart_backoff=config.serving.worker_restart_backoff_max,
+        max_failures=config.serving.worker_max_failures,
+        failure_window=config.serving.worker_failure_window,
+    )
+
+
+if __name__ == "__main__":
+    main()
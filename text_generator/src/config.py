@@ -28,6 +28,12 @@ class ModelConfig:
     repetition_penalty: float = 1.4  # Stronger penalty for repeated tokens
     no_repeat_ngram_size: int = 3    # Prevent any 3-gram from repeating
 
+    # Inference-time quantization: None (fp32) or "int8-dynamic"
+    quantization: str | None = os.environ.get("MODEL_QUANTIZATION") or None
+
+    # Inference backend: "pytorch" (eager) or "onnx" (ONNX Runtime, see paths.onnx_dir)
+    backend: str = os.environ.get("MODEL_BACKEND", "pytorch")
+
 
 @dataclass
 class TrainingConfig:
@@ -39,6 +45,12 @@ class TrainingConfig:
     weight_decay: float = 0.01
     fp16: bool = True
 
+    # Batching — dynamic padding needs data.use_token_cache
+    dynamic_padding: bool = True           # Pad each batch to its longest sequence
+    group_by_length: bool = True           # Batch sequences of similar length together
+    max_tokens_per_batch: int | None = None  # Token budget per batch (overrides batch_size)
+    packing: bool = False                  # Pack several examples per block (needs token cache)
+
     # Scheduler / warmup
     warmup_steps: int = 200
 
@@ -65,11 +77,65 @@ class DataConfig:
     # Dataset limit
     max_samples: int = 2000
 
+    # Streaming CSV reader (see src/data/load_data.py)
+    csv_engine: str = "auto"        # "auto" (pyarrow if installed), "pyarrow" or "pandas"
+    sampling: str = "head"          # "head" (first rows) or "reservoir" (uniform sample)
+    sample_seed: int = 42
+
+    # Token-length filtering (fast tokenizer, batched)
+    tokenize_block_size: int = 4096      # Rows read and tokenized per chunk
+    num_proc: int | None = None          # >1 spreads tokenization over processes
+
+    # Pre-tokenized, memory-mapped training cache
+    use_token_cache: bool = True
+    token_cache_dir: str = os.path.join(_TEXT_GEN_DIR, "data", "token_cache")
+
+    # Sequence packing block size (None = model.max_length)
+    pack_block_size: int | None = None
+
     # Special tokens
     separator: str = " <|sep|> "
     prompt_prefix: str = "Expand: "
 
 
+@dataclass
+class ServingConfig:
+    # Inference executor / backpressure
+    num_workers: int = 1           # Concurrent generate calls
+    torch_threads: int | None = None  # torch.set_num_threads per worker (None = torch default)
+
+    # serve.py: re-fork exited workers after a backoff doubling per recent exit;
+    # exit 1 once one worker slot fails worker_max_failures times in the window
+    worker_restart_backoff: float = 1.0       # Seconds before the first restart
+    worker_restart_backoff_max: float = 30.0
+    worker_max_failures: int = 5
+    worker_failure_window: float = 300.0      # Seconds
+    max_queue_size: int = 8        # Requests allowed to wait; beyond that → 503
+    retry_after_seconds: int = 2   # Retry-After header on rejection
+
+    # Result cache (in-process LRU + optional shared SQLite tier)
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 3600
+    # Set GENERATION_CACHE_PATH to share entries across uvicorn workers
+    cache_shared_path: str | None = os.environ.get("GENERATION_CACHE_PATH")
+
+    # Cold start: load in a background thread so health checks answer at once
+    # ("loading" → "warming" → "healthy"); off = load before serving
+    background_startup: bool = os.environ.get("BACKGROUND_STARTUP", "1") == "1"
+    warmup_input_lengths: tuple = (16, 64, 128)  # Prompt tokens per warmup generate
+    warmup_max_length: int = 32                   # New tokens per warmup generate
+
+    # Opt-in request profiling (disabled = no per-request hooks at all)
+    profiling_enabled: bool = os.environ.get("PROFILING_ENABLED") == "1"
+    profile_mode: str = os.environ.get("PROFILE_MODE", "stack")  # "stack" (py-spy style) or "torch"
+    profile_sample_every: int = 0          # Profile 1 in N requests (0 = off)
+    profile_slow_ms: float | None = None   # Profile all, keep traces slower than this
+    profile_header: str = "X-Profile"      # "X-Profile: 1" forces a trace for one request
+    profile_buffer_size: int = 20          # Traces kept in memory (oldest dropped)
+    profile_interval_ms: float = 5.0       # Stack sampling interval
+
+
 @dataclass
 class PathConfig:
     # Model source: use HuggingFace Hub in production, local path for development
@@ -79,6 +145,12 @@ class PathConfig:
         os.path.join(_TEXT_GEN_DIR, "models", "gpt2-finetuned")
     )
 
+    # Exported ONNX model (used when model.backend == "onnx")
+    onnx_dir: str = os.environ.get(
+        "ONNX_MODEL_DIR",
+        os.path.join(_TEXT_GEN_DIR, "models", "gpt2-finetuned-onnx")
+    )
+
     # HuggingFace Hub repo ID (for reference / upload scripts)
     hf_repo_id: str = _HF_REPO_ID
 
@@ -96,6 +168,7 @@ class Config:
     model: ModelConfig = field(default_factory=ModelConfig)
     training: TrainingConfig = field(default_factory=TrainingConfig)
     data: DataConfig = field(default_factory=DataConfig)
+    serving: ServingConfig = field(default_factory=ServingConfig)
     paths: PathConfig = field(default_factory=PathConfig)
 
 
@@ -0,0 +1,144 @@
+"""
+Streaming CSV reader shared by the summarization and text_generator projects.
+
+Raw CSVs can be far larger than the few thousand rows we train on, so
+they are never loaded whole:
+  - Only the requested columns are read (column projection).
+  - The file is read in chunks — with pyarrow's streaming CSV reader when
+    available, otherwise pandas `chunksize` — and rows with missing
+    values are dropped per chunk.
+  - In "head" mode reading stops as soon as `max_samples` rows are kept.
+  - In "reservoir" mode the whole file is scanned once and a uniform
+    random sample of `max_samples` rows is kept (reservoir sampling).
+
+Either way only one chunk plus the kept rows are in memory at any time.
+
+Each project is its own Docker build context, so this file exists in
+both `src/data/` directories. The copies must stay identical (checked by
+summarization/tests/test_csv_stream.py); settings come from the caller
+rather than `src.config`.
+"""
+
+import numpy as np
+import pandas as pd
+
+# pyarrow reads blocks of bytes rather than rows
+_ARROW_BLOCK_SIZE = 16 << 20
+
+SAMPLING_MODES = ("head", "reservoir")
+
+
+def iter_csv_chunks(path, columns, chunk_size=50_000, engine="auto"):
+    """
+    Yield DataFrames with only `columns`, read from `path` chunk by chunk.
+
+    Args:
+        chunk_size: Rows per chunk (pandas engine; pyarrow reads byte blocks).
+        engine: "pyarrow", "pandas" or "auto" (pyarrow if installed).
+
+    Rows with a missing value in any of the columns are dropped. Both
+    engines treat empty cells (and "NA", "null", ...) as missing.
+    """
+    pa_csv = None
+    if engine in ("auto", "pyarrow"):
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+        except ImportError:
+            if engine == "pyarrow":
+                raise
+
+    if pa_csv is not None:
+        reader = pa_csv.open_csv(
+            path,
+            read_options=pa_csv.ReadOptions(block_size=_ARROW_BLOCK_SIZE),
+            # Reviews can contain line breaks inside quoted fields
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=columns,
+                column_types={column: pa.string() for column in columns},
+                # Empty cells become nulls (and get dropped), as with pandas
+                strings_can_be_null=True,
+            ),
+        )
+        chunks = (batch.to_pandas() for batch in reader)
+    else:
+        chunks = pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunk_size)
+
+    for chunk in chunks:
+        yield chunk[columns].dropna()
+
+
+class ReservoirSampler:
+    """
+    Uniform random sample of at most `k` rows from a stream of DataFrames.
+
+    Algorithm R, vectorized per chunk: row number n (0-based) replaces a
+    random slot with probability k / (n + 1). Memory is bounded by k rows.
+    """
+
+    def __init__(self, k, columns, seed=42):
+        self.k = k
+        self.columns = columns
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self.rows = []
+
+    def add(self, chunk):
+        fill = max(0, min(len(chunk), self.k - self.seen))
+        self.rows.extend(chunk.iloc[:fill].itertuples(index=False, name=None))
+
+        if len(chunk) > fill:
+            positions = np.arange(self.seen + fill, self.seen + len(chunk))
+            slots = self.rng.integers(0, positions + 1)
+            hits = np.flatnonzero(slots < self.k)
+            replacements = chunk.iloc[fill + hits].itertuples(index=False, name=None)
+            for slot, row in zip(slots[hits].tolist(), replacements):
+                self.rows[slot] = row
+
+        self.seen += len(chunk)
+
+    def to_frame(self):
+        return pd.DataFrame(self.rows, columns=self.columns)
+
+
+def stream_csv(path, columns, max_samples=None, sampling="head", seed=42,
+               transform=None, chunk_size=50_000, engine="auto"):
+    """
+    Read up to `max_samples` rows of `columns` from a CSV without loading it whole.
+
+    Args:
+        sampling: "head" (first rows, stops early) or "reservoir"
+            (uniform sample over the whole file).
+        transform: Optional function applied to every chunk before
+            sampling, e.g. to filter rows; it returns the rows to keep.
+
+    Returns:
+        DataFrame with `columns` and a fresh RangeIndex.
+    """
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode '{sampling}', expected one of {SAMPLING_MODES}")
+
+    chunks = iter_csv_chunks(path, columns, chunk_size, engine)
+    if transform is not None:
+        chunks = (transform(chunk) for chunk in chunks)
+
+    if sampling == "reservoir" and max_samples:
+        sampler = ReservoirSampler(max_samples, columns, seed)
+        for chunk in chunks:
+            sampler.add(chunk)
+        print(f"Reservoir-sampled {len(sampler.rows)} of {sampler.seen} rows")
+        return sampler.to_frame()
+
+    kept, total = [], 0
+    for chunk in chunks:
+        if max_samples:
+            chunk = chunk.iloc[:max_samples - total]
+        kept.append(chunk)
+        total += len(chunk)
+        if max_samples and total >= max_samples:
+            break
+
+    if not kept:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(kept, ignore_index=True)
@@ -11,15 +11,40 @@ but we mask the loss on the prompt tokens so it only learns to generate the targ
 
 IMPORTANT: We filter out samples where the full sequence exceeds
 the max token limit, so the model always sees complete articles.
+
+The CSV is streamed in chunks with only the two needed columns (same
+reader as summarization, src/data/csv_stream.py): each chunk is tokenized
+and filtered as it arrives, and reading stops once enough samples fit
+("head" sampling) or a reservoir sample is kept over the whole file
+("reservoir" sampling). Memory stays flat regardless of the file size.
 """
 
-import pandas as pd
+import numpy as np
 from datasets import Dataset
-from transformers import GPT2Tokenizer
+from transformers import GPT2TokenizerFast
 from src.config import config
+from src.data.csv_stream import stream_csv
+
 
+def _token_lengths(texts, tokenizer, num_proc=None):
+    """
+    Token counts for a list of strings, computed in one batched call.
 
-def load_dataset_from_csv(data_path=None, max_samples=None):
+    With num_proc > 1 the work is spread over processes via datasets.map.
+    """
+    if num_proc and num_proc > 1:
+        lengths = Dataset.from_dict({"text": texts}).map(
+            lambda batch: {"length": tokenizer(batch["text"], return_length=True)["length"]},
+            batched=True,
+            num_proc=num_proc,
+            remove_columns=["text"],
+        )
+        return np.asarray(lengths["length"])
+
+    return np.asarray(tokenizer(texts, return_length=True)["length"])
+
+
+def load_dataset_from_csv(data_path=None, max_samples=None, sampling=None):
     """
     Load and prepare the dataset from CSV.
     Filters out samples that would be truncated during training.
@@ -27,45 +52,43 @@ def load_dataset_from_csv(data_path=None, max_samples=None):
     """
     data_path = data_path or config.data.data_path
     max_samples = max_samples or config.data.max_samples
-
-    print(f"Loading data from: {data_path}")
-    df = pd.read_csv(data_path)
-
-    # Select and rename columns (Summary → input, Text → target)
-    df = df[[config.data.input_column, config.data.target_column]].dropna()
-    print(f"Total samples in CSV: {len(df)}")
+    columns = [config.data.input_column, config.data.target_column]
 
     # --- Filter out samples that won't fit in the context window ---
     # This is critical: GPT-2 sees prompt+target as one sequence.
     # If truncated, the model learns incomplete/garbled patterns.
-    tokenizer = GPT2Tokenizer.from_pretrained(config.model.model_name)
+    tokenizer = GPT2TokenizerFast.from_pretrained(config.model.model_name)
     max_tokens = config.model.max_length
-    prefix = config.data.prompt_prefix
-    separator = config.data.separator
-
-    # Estimate token counts and filter
-    print(f"Filtering samples that fit within {max_tokens} tokens...")
-    valid_indices = []
-    for idx in range(len(df)):
-        row = df.iloc[idx]
-        full_text = (
-            prefix + row[config.data.input_column]
-            + separator
-            + row[config.data.target_column]
+    scanned = 0
+
+    def fits_context(chunk):
+        nonlocal scanned
+        scanned += len(chunk)
+        # Build every full sequence with vectorized string ops
+        full_texts = (
+            config.data.prompt_prefix
+            + chunk[config.data.input_column]
+            + config.data.separator
+            + chunk[config.data.target_column]
             + tokenizer.eos_token
         )
-        token_count = len(tokenizer.encode(full_text))
-        if token_count <= max_tokens:
-            valid_indices.append(idx)
-        # Stop early once we have enough candidates
-        if len(valid_indices) >= max_samples * 2:
-            break
-
-    df = df.iloc[valid_indices]
-    print(f"Samples that fit in {max_tokens} tokens: {len(df)}")
+        lengths = _token_lengths(full_texts.tolist(), tokenizer, config.data.num_proc)
+        return chunk[lengths <= max_tokens]
 
-    if max_samples and len(df) > max_samples:
-        df = df.head(max_samples)
+    print(f"Loading data from: {data_path}")
+    print(f"Filtering samples that fit within {max_tokens} tokens...")
+    df = stream_csv(
+        data_path,
+        columns,
+        max_samples=max_samples,
+        sampling=sampling or config.data.sampling,
+        seed=config.data.sample_seed,
+        transform=fits_context,
+        chunk_size=config.data.tokenize_block_size,
+        engine=config.data.csv_engine,
+    )
+    print(f"Rows scanned: {scanned}")
+    print(f"Samples that fit in {max_tokens} tokens: {len(df)}")
 
     df = df.rename(columns={
         config.data.input_column: "input",
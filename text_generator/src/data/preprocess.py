@@ -6,8 +6,21 @@ Key design:
   - The model sees the entire sequence but loss is computed only on the
     target portion (after the separator), so it learns to generate text
     given a summary prompt.
+  - `build_token_cache` tokenizes a split once and stores token ids,
+    offsets and prompt lengths as memory-mapped .npy files, so
+    TokenizedTextGenDataset never re-tokenizes and DataLoader workers
+    share the same pages.
+  - PackedTextGenDataset packs several examples into one block with
+    per-example position ids and segment ids, so examples never attend
+    to each other.
 """
 
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
 import torch
 from torch.utils.data import Dataset as TorchDataset
 
@@ -73,6 +86,236 @@ class TextGenDataset(TorchDataset):
         }
 
 
+def _cache_fingerprint(hf_dataset, tokenizer, config):
+    """Hash of the data, tokenizer vocabulary and formatting settings."""
+    h = hashlib.sha256()
+    settings = [
+        config.model.max_length,
+        config.data.separator,
+        config.data.prompt_prefix,
+        tokenizer.eos_token,
+        sorted(tokenizer.get_vocab().items()),
+    ]
+    h.update(json.dumps(settings).encode("utf-8"))
+    for row in hf_dataset:
+        h.update(row["input"].encode("utf-8") + b"\0" + row["target"].encode("utf-8") + b"\0")
+    return h.hexdigest()[:16]
+
+
+def build_token_cache(hf_dataset, tokenizer, config, batch_size=1000):
+    """
+    Tokenize a dataset split once and save it as memory-mapped arrays.
+
+    Files written to `{config.data.token_cache_dir}/{fingerprint}/`:
+      - input_ids.npy:   all sequences concatenated (uint16 when the vocab fits)
+      - offsets.npy:     start of each sequence in input_ids (len N + 1)
+      - prompt_lens.npy: tokens of "prompt + separator" per sequence
+
+    An existing cache with the same fingerprint is reused as-is.
+
+    Returns:
+        Path of the cache directory.
+    """
+    cache_path = os.path.join(
+        config.data.token_cache_dir, _cache_fingerprint(hf_dataset, tokenizer, config)
+    )
+    if os.path.exists(os.path.join(cache_path, "meta.json")):
+        print(f"Using token cache: {cache_path}")
+        return cache_path
+
+    print(f"Building token cache: {cache_path}")
+    max_length = config.model.max_length
+    dtype = np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max else np.int32
+
+    chunks, lengths, prompt_lens = [], [], []
+    for start in range(0, len(hf_dataset), batch_size):
+        batch = hf_dataset[start:start + batch_size]
+        prompts = [config.data.prompt_prefix + text + config.data.separator for text in batch["input"]]
+        full_texts = [
+            prompt + target + tokenizer.eos_token
+            for prompt, target in zip(prompts, batch["target"])
+        ]
+
+        full_ids = tokenizer(full_texts, max_length=max_length, truncation=True)["input_ids"]
+        prompt_ids = tokenizer(prompts, max_length=max_length, truncation=True)["input_ids"]
+
+        for ids, p_ids in zip(full_ids, prompt_ids):
+            chunks.append(np.asarray(ids, dtype=dtype))
+            lengths.append(len(ids))
+            prompt_lens.append(len(p_ids))
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Write to a temp dir and rename so readers never see a partial cache
+    tmp_path = cache_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, "input_ids.npy"), np.concatenate(chunks) if chunks else np.zeros(0, dtype))
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp_path, "prompt_lens.npy"), np.asarray(prompt_lens, dtype=np.int32))
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({
+            "num_samples": len(lengths),
+            "num_tokens": int(offsets[-1]),
+            "max_length": max_length,
+            "dtype": np.dtype(dtype).name,
+        }, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+    return cache_path
+
+
+class TokenizedTextGenDataset(TorchDataset):
+    """
+    PyTorch Dataset over a token cache written by `build_token_cache`.
+
+    Arrays are opened with mmap_mode="r" on first access in each process,
+    so DataLoader workers share the page cache instead of holding copies.
+
+    By default items have the same fixed-length format as TextGenDataset.
+    With `dynamic_padding=True` items are unpadded
+    {"input_ids", "prompt_len"} dicts, to be padded per batch by
+    DataCollatorForPromptCompletion.
+    """
+
+    def __init__(self, cache_path, pad_token_id, max_length, dynamic_padding=False):
+        self.cache_path = cache_path
+        self.pad_token_id = pad_token_id
+        self.max_length = max_length
+        self.dynamic_padding = dynamic_padding
+        self._arrays = None
+
+        with open(os.path.join(cache_path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+    @classmethod
+    def from_hf_dataset(cls, hf_dataset, tokenizer, config, dynamic_padding=False):
+        cache_path = build_token_cache(hf_dataset, tokenizer, config)
+        return cls(cache_path, tokenizer.pad_token_id, config.model.max_length, dynamic_padding)
+
+    @property
+    def lengths(self):
+        """Token count of every sequence, without touching the token array."""
+        return np.diff(self._load()["offsets"])
+
+    def _load(self):
+        # Opened lazily so the dataset pickles cheaply into worker processes
+        if self._arrays is None:
+            self._arrays = {
+                name: np.load(os.path.join(self.cache_path, f"{name}.npy"), mmap_mode="r")
+                for name in ("input_ids", "offsets", "prompt_lens")
+            }
+        return self._arrays
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_arrays"] = None
+        return state
+
+    def __len__(self):
+        return self.meta["num_samples"]
+
+    def sequence(self, idx):
+        """Unpadded token ids (a view into the memory map) and prompt length."""
+        arrays = self._load()
+        start, end = arrays["offsets"][idx], arrays["offsets"][idx + 1]
+        return arrays["input_ids"][start:end], int(arrays["prompt_lens"][idx])
+
+    def __getitem__(self, idx):
+        ids, prompt_len = self.sequence(idx)
+        length = len(ids)
+
+        if self.dynamic_padding:
+            return {
+                "input_ids": torch.from_numpy(ids.astype(np.int64)),
+                "prompt_len": prompt_len,
+            }
+
+        input_ids = torch.full((self.max_length,), self.pad_token_id, dtype=torch.long)
+        input_ids[:length] = torch.from_numpy(ids.astype(np.int64))
+
+        attention_mask = torch.zeros(self.max_length, dtype=torch.long)
+        attention_mask[:length] = 1
+
+        # Mask prompt tokens and padding from the loss
+        labels = torch.full((self.max_length,), -100, dtype=torch.long)
+        labels[prompt_len:length] = input_ids[prompt_len:length]
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
+        }
+
+
+class PackedTextGenDataset(TorchDataset):
+    """
+    Packs cached examples into blocks of up to `block_size` tokens.
+
+    Examples are assigned to blocks with first-fit decreasing, so most
+    blocks are nearly full. Each item carries:
+      - input_ids:    the concatenated examples
+      - position_ids: restarting at 0 for every example
+      - segment_ids:  1..k identifying the example of each token
+      - labels:       target tokens only (prompts masked with -100)
+
+    DataCollatorForPackedSequences turns segment_ids into a block-diagonal
+    causal attention mask.
+    """
+
+    def __init__(self, token_dataset, block_size):
+        self.token_dataset = token_dataset
+        self.block_size = block_size
+        self.blocks = self._pack(token_dataset.lengths, block_size)
+
+    @staticmethod
+    def _pack(lengths, block_size):
+        order = np.argsort(-np.asarray(lengths), kind="stable")
+        blocks, free = [], []
+        for idx in order.tolist():
+            length = int(lengths[idx])
+            for b, space in enumerate(free):
+                if length <= space:
+                    blocks[b].append(idx)
+                    free[b] -= length
+                    break
+            else:
+                blocks.append([idx])
+                free.append(block_size - length)
+        return blocks
+
+    @property
+    def lengths(self):
+        token_lengths = self.token_dataset.lengths
+        return np.asarray([int(token_lengths[block].sum()) for block in self.blocks])
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __getitem__(self, idx):
+        input_ids, position_ids, segment_ids, labels = [], [], [], []
+        for segment, example in enumerate(self.blocks[idx], start=1):
+            ids, prompt_len = self.token_dataset.sequence(example)
+            ids = torch.from_numpy(ids.astype(np.int64))
+            length = len(ids)
+
+            example_labels = ids.clone()
+            example_labels[:prompt_len] = -100
+
+            input_ids.append(ids)
+            position_ids.append(torch.arange(length))
+            segment_ids.append(torch.full((length,), segment, dtype=torch.long))
+            labels.append(example_labels)
+
+        return {
+            "input_ids": torch.cat(input_ids),
+            "position_ids": torch.cat(position_ids),
+            "segment_ids": torch.cat(segment_ids),
+            "labels": torch.cat(labels),
+        }
+
+
 def setup_tokenizer(tokenizer):
     """
     Configure the GPT-2 tokenizer with required special tokens.
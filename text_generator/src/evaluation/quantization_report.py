@@ -0,0 +1,155 @@
+"""
+Compare quantized and fp32 GPT-2 inference.
+
+Each variant is loaded in a fresh process so RSS numbers are not skewed
+by the other model. The report gives load time, RSS, generation latency
+(seeded, so both variants sample the same way) and perplexity on the
+target text of held-out samples, plus the deltas against fp32.
+
+Usage (from text_generator/):
+    python -m src.evaluation.quantization_report --samples 30 --output quant.json
+"""
+
+import sys
+import os
+
+# Ensure the project root is in the python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config import config
+from src.inference.quantization import SUPPORTED_QUANTIZATION
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _perplexity(samples, tokenizer, model):
+    """Token-weighted perplexity of the targets given their prompts."""
+    import torch
+
+    total_loss, total_tokens = 0.0, 0
+    for sample in samples:
+        prompt = config.data.prompt_prefix + sample["input"] + config.data.separator
+        prompt_ids = tokenizer.encode(prompt)
+        target_ids = tokenizer.encode(sample["target"] + tokenizer.eos_token)
+        input_ids = torch.tensor([(prompt_ids + target_ids)[:config.model.max_length]])
+
+        labels = input_ids.clone()
+        labels[0, :len(prompt_ids)] = -100
+        num_target = int((labels != -100).sum())
+        if num_target == 0:
+            continue
+
+        with torch.no_grad():
+            loss = model(input_ids, labels=labels).loss
+        total_loss += loss.item() * num_target
+        total_tokens += num_target
+
+    return math.exp(total_loss / max(total_tokens, 1))
+
+
+def _run_variant(mode, samples, max_new_tokens, threads):
+    """Load the model with the given quantization mode, then time and score it."""
+    import torch
+    from src.inference.generate import load_model, generate_text
+    from src.monitoring.memory import rss_mb
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    rss_before = rss_mb()
+    load_start = time.perf_counter()
+    tokenizer, model = load_model(quantization=mode or "fp32")
+    load_time = time.perf_counter() - load_start
+
+    # Warm up once so lazy initialization doesn't land in the first sample
+    generate_text(samples[0]["input"], tokenizer, model, seed=0, max_length=8)
+
+    latencies = []
+    for i, sample in enumerate(samples):
+        start = time.perf_counter()
+        generate_text(sample["input"], tokenizer, model, seed=i, max_length=max_new_tokens)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "mode": mode or "fp32",
+        "load_time_s": round(load_time, 3),
+        "model_rss_mb": round(rss_mb() - rss_before, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 1),
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+        },
+        "perplexity": round(_perplexity(samples, tokenizer, model), 3),
+    }
+
+
+def compare(mode="int8-dynamic", num_samples=30, max_new_tokens=64, threads=None):
+    """Run fp32 and `mode` side by side and return the report dict."""
+    from src.data.load_data import load_dataset_from_csv, build_train_val_split
+
+    dataset = load_dataset_from_csv()
+    samples = build_train_val_split(dataset)["test"].select(range(num_samples)).to_list()
+
+    variants = []
+    for variant_mode in (None, mode):
+        # A fresh spawned process per variant keeps RSS measurements clean
+        with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+            variants.append(
+                pool.submit(_run_variant, variant_mode, samples, max_new_tokens, threads).result()
+            )
+
+    baseline, quantized = variants
+    return {
+        "num_samples": len(samples),
+        "max_new_tokens": max_new_tokens,
+        "variants": variants,
+        "delta": {
+            "model_rss_mb": round(quantized["model_rss_mb"] - baseline["model_rss_mb"], 1),
+            "latency_p50_ms": round(quantized["latency_ms"]["p50"] - baseline["latency_ms"]["p50"], 1),
+            "latency_speedup": round(baseline["latency_ms"]["mean"] / quantized["latency_ms"]["mean"], 2),
+            "perplexity": round(quantized["perplexity"] - baseline["perplexity"], 3),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quantized vs fp32 GPT-2 inference")
+    parser.add_argument("--mode", default="int8-dynamic", choices=SUPPORTED_QUANTIZATION)
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads value")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = compare(args.mode, args.samples, args.max_new_tokens, args.threads)
+
+    print("=" * 60)
+    print(f"{'variant':<14}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'ppl':>9}")
+    for v in report["variants"]:
+        print(
+            f"{v['mode']:<14}{v['load_time_s']:>8}{v['model_rss_mb']:>9}"
+            f"{v['latency_ms']['p50']:>9}{v['latency_ms']['p95']:>9}{v['perplexity']:>9}"
+        )
+    print("-" * 60)
+    print(f"Delta vs fp32: {report['delta']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Bounded inference executor with fast rejection under load.
+
+Model calls run on a small dedicated thread pool instead of Starlette's
+default threadpool. At most `num_workers + max_queue_size` jobs are
+admitted at once; beyond that `submit` raises QueueFullError immediately
+so the API can answer 503 with a Retry-After header instead of queueing
+without bound.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.monitoring import metrics
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the inference queue is at capacity."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Inference queue is full. Please retry later.")
+        self.retry_after = retry_after
+
+
+def _init_worker(torch_threads):
+    """Pin the intra-op thread count for each inference worker."""
+    if torch_threads:
+        import torch
+        torch.set_num_threads(torch_threads)
+
+
+class InferenceExecutor:
+    """
+    Thread pool for model inference with a bounded admission queue.
+
+    Args:
+        num_workers: Number of concurrent inference jobs.
+        torch_threads: `torch.set_num_threads` value applied in each worker
+            (None keeps the torch default). Keep
+            `num_workers * torch_threads` at or below the core count.
+        max_queue_size: Jobs allowed to wait for a free worker.
+        retry_after: Seconds suggested to rejected clients.
+    """
+
+    def __init__(self, num_workers=1, torch_threads=None, max_queue_size=16, retry_after=1):
+        self.num_workers = max(1, num_workers)
+        self.capacity = self.num_workers + max(0, max_queue_size)
+        self.retry_after = retry_after
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.num_workers,
+            thread_name_prefix="inference",
+            initializer=_init_worker,
+            initargs=(torch_threads,),
+        )
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Jobs currently admitted (running or waiting)."""
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a job, raising QueueFullError right away if at capacity."""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(self.retry_after)
+        return self._submit(fn, *args, **kwargs)
+
+    def submit_blocking(self, fn, *args, **kwargs):
+        """Submit a job, waiting for a free slot instead of rejecting."""
+        self._slots.acquire()
+        return self._submit(fn, *args, **kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """Submit a job and await its result from the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    # --- Internals ---
+    def _submit(self, fn, *args, **kwargs):
+        with self._lock:
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def run():
+            metrics.QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, queue="executor")
+            return fn(*args, **kwargs)
+
+        try:
+            future = self._pool.submit(run)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
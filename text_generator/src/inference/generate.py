@@ -14,12 +14,92 @@ sys.path.append(project_root)
 
 import torch
 import re
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
+import threading
+import time
+from contextlib import contextmanager
+from transformers import GPT2LMHeadModel, GPT2TokenizerFast, StoppingCriteria, StoppingCriteriaList
 from src.config import config
+from src.monitoring import metrics
+from src.inference.onnx_backend import load_onnx_model
+from src.inference.quantization import quantize_model
 
+WARMUP_SUMMARY = "Great coffee, arrived fresh and tastes smooth."
 
-def load_model(model_dir=None):
-    """Load the fine-tuned GPT-2 model and tokenizer."""
+
+class _RngLock:
+    """
+    Shared / exclusive access to torch's process-wide RNG.
+
+    `model.generate` samples from the global RNG, and inference workers
+    run concurrently. A seeded request reseeds it and must then be the
+    only one drawing from it, or the same prompt and seed could give
+    different text (and a cached result nobody can reproduce). Unseeded
+    generations only need to keep out of a seeded one's way, so they
+    share the RNG with each other. Waiting seeded requests go first, so
+    a stream of unseeded ones can't starve them.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._waiting_exclusive = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive or self._waiting_exclusive:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._waiting_exclusive += 1
+            while self._exclusive or self._shared:
+                self._cond.wait()
+            self._waiting_exclusive -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+_RNG_LOCK = _RngLock()
+
+
+@contextmanager
+def _seeded(seed):
+    """Seed torch's RNG for one generation, with the access that needs (see _RngLock)."""
+    if seed is None:
+        with _RNG_LOCK.shared():
+            yield
+        return
+    with _RNG_LOCK.exclusive():
+        torch.manual_seed(seed)
+        yield
+
+
+def load_model(model_dir=None, quantization=None, backend=None, timings=None):
+    """
+    Load the fine-tuned GPT-2 model and tokenizer.
+
+    `quantization` overrides config.model.quantization ("fp32" forces
+    full precision) and `backend` overrides config.model.backend
+    ("onnx" loads the ONNX Runtime export from config.paths.onnx_dir).
+    If a `timings` dict is given, seconds spent on the "tokenizer" and
+    "model" phases are recorded in it.
+    """
+    timings = timings if timings is not None else {}
     model_dir = model_dir or config.paths.model_dir
 
     print(f"Loading model from: {model_dir}")
@@ -27,18 +107,63 @@ def load_model(model_dir=None):
     # Check if we should force offline mode (e.g. in production with baked models)
     offline_mode = os.environ.get("HF_HUB_OFFLINE") == "1"
     
-    tokenizer = GPT2Tokenizer.from_pretrained(model_dir, local_files_only=offline_mode)
-    model = GPT2LMHeadModel.from_pretrained(model_dir, local_files_only=offline_mode)
+    start = time.perf_counter()
+    tokenizer = GPT2TokenizerFast.from_pretrained(model_dir, local_files_only=offline_mode)
 
     # Ensure pad token is set
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
+    timings["tokenizer"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    if (backend or config.model.backend) == "onnx":
+        model = load_onnx_model(num_threads=config.serving.torch_threads)
+        timings["model"] = round(time.perf_counter() - start, 3)
+        return tokenizer, model
 
+    # low_cpu_mem_usage skips the random init and assigns the weights straight
+    # from the (memory-mapped) safetensors file
+    model = GPT2LMHeadModel.from_pretrained(model_dir, local_files_only=offline_mode, low_cpu_mem_usage=True)
     model.eval()
+
+    quantization = quantization or config.model.quantization
+    if quantization != "fp32":
+        model = quantize_model(model, quantization)
+    timings["model"] = round(time.perf_counter() - start, 3)
+
     return tokenizer, model
 
 
-def generate_text(
+def warmup(tokenizer, model, input_lengths=None, max_new_tokens=None):
+    """
+    Run short generations so lazy initialization isn't paid by the first requests.
+
+    One sampled `generate` per prompt length, with the serving defaults
+    (repetition penalty, no-repeat n-grams), so the kernels and
+    logits processors real traffic uses are initialized.
+
+    Returns:
+        Dict of {prompt_tokens: seconds}.
+    """
+    input_lengths = input_lengths or config.serving.warmup_input_lengths
+    max_new_tokens = max_new_tokens or config.serving.warmup_max_length
+
+    base_ids = tokenizer.encode(WARMUP_SUMMARY + " ")
+    input_ids, gen_kwargs = _prepare_generation(WARMUP_SUMMARY, tokenizer, model, max_length=max_new_tokens)
+
+    timings = {}
+    for length in input_lengths:
+        repeated = base_ids * (length // len(base_ids) + 1)
+        prompt_ids = torch.tensor([repeated[:length]], device=input_ids.device)
+
+        start = time.perf_counter()
+        with torch.no_grad():
+            model.generate(prompt_ids, attention_mask=torch.ones_like(prompt_ids), **gen_kwargs)
+        timings[length] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+def _prepare_generation(
     summary,
     tokenizer,
     model,
@@ -51,24 +176,7 @@ def generate_text(
     repetition_penalty=None,
     no_repeat_ngram_size=None,
 ):
-    """
-    Generate expanded text from a given summary.
-
-    Args:
-        summary: The summary/prompt to expand into full text.
-        tokenizer: GPT2Tokenizer instance.
-        model: GPT2LMHeadModel instance.
-        max_length: Max tokens to generate (defaults to config).
-        temperature: Sampling temperature.
-        top_k: Top-K filtering value.
-        top_p: Nucleus sampling probability.
-        num_beams: Number of beams for beam search.
-        do_sample: Whether to use sampling.
-        repetition_penalty: Penalty for repeating tokens.
-
-    Returns:
-        Generated text string.
-    """
+    """Build the prompt input_ids and `model.generate` kwargs, filling config defaults."""
     # Use config defaults if not specified
     max_length = max_length or config.model.max_gen_length
     temperature = temperature or config.model.temperature
@@ -83,41 +191,206 @@ def generate_text(
     prompt = config.data.prompt_prefix + summary + config.data.separator
 
     # Tokenize
-    input_ids = tokenizer.encode(prompt, return_tensors="pt")
-
-    # Move to same device as model
-    device = next(model.parameters()).device
+    with metrics.STAGE_SECONDS.time(stage="tokenize"):
+        input_ids = tokenizer.encode(prompt, return_tensors="pt")
+    metrics.INPUT_TOKENS.inc(input_ids.shape[-1])
+    if input_ids.shape[-1] > config.model.max_length:
+        metrics.PROMPTS_OVER_CONTEXT.inc()
+
+    # Move to same device as model (`.device` works for PyTorch and ONNX Runtime models)
+    device = model.device
     input_ids = input_ids.to(device)
 
+    gen_kwargs = dict(
+        max_new_tokens=max_length,
+        temperature=temperature,
+        top_k=top_k,
+        top_p=top_p,
+        num_beams=num_beams,
+        do_sample=do_sample,
+        repetition_penalty=repetition_penalty,
+        no_repeat_ngram_size=no_repeat_ngram_size,
+        pad_token_id=tokenizer.eos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    return input_ids, gen_kwargs
+
+
+def generate_text(summary, tokenizer, model, seed=None, **generation_params):
+    """
+    Generate expanded text from a given summary.
+
+    Args:
+        summary: The summary/prompt to expand into full text.
+        tokenizer: GPT2TokenizerFast instance.
+        model: GPT2LMHeadModel instance.
+        seed: Optional random seed for reproducible sampling.
+        **generation_params: Optional overrides, all defaulting to config:
+            max_length (max tokens to generate), temperature, top_k, top_p,
+            num_beams, do_sample, repetition_penalty, no_repeat_ngram_size.
+
+    Returns:
+        Generated text string.
+    """
+    input_ids, gen_kwargs = _prepare_generation(summary, tokenizer, model, **generation_params)
+
     # Generate
-    with torch.no_grad():
-        output_ids = model.generate(
-            input_ids,
-            max_new_tokens=max_length,
-            temperature=temperature,
-            top_k=top_k,
-            top_p=top_p,
-            num_beams=num_beams,
-            do_sample=do_sample,
-            repetition_penalty=repetition_penalty,
-            no_repeat_ngram_size=no_repeat_ngram_size,
-            pad_token_id=tokenizer.eos_token_id,
-            eos_token_id=tokenizer.eos_token_id,
-        )
+    with _seeded(seed), metrics.STAGE_SECONDS.time(stage="generate"), torch.no_grad():
+        output_ids = model.generate(input_ids, **gen_kwargs)
 
     # Decode only the generated part (skip the prompt tokens)
     generated_ids = output_ids[0][len(input_ids[0]):]
-    generated_text = tokenizer.decode(generated_ids, skip_special_tokens=True)
+    metrics.OUTPUT_TOKENS.inc(len(generated_ids))
+    with metrics.STAGE_SECONDS.time(stage="decode"):
+        generated_text = tokenizer.decode(generated_ids, skip_special_tokens=True)
 
-    # Clean up separator artifacts if any
-    generated_text = generated_text.replace("<|sep|>", "").strip()
+    with metrics.STAGE_SECONDS.time(stage="postprocess"):
+        # Clean up separator artifacts if any
+        generated_text = generated_text.replace("<|sep|>", "").strip()
 
-    # Post-process: remove non-English / garbage characters
-    generated_text = _clean_generated_text(generated_text)
+        # Post-process: remove non-English / garbage characters
+        generated_text = _clean_generated_text(generated_text)
 
     return generated_text
 
 
+def stream_text(summary, tokenizer, model, executor=None, seed=None, **generation_params):
+    """
+    Start generating expanded text and return an iterator over cleaned chunks.
+
+    `model.generate` runs in the background (on `executor` if given,
+    otherwise a dedicated thread) and feeds a TextIteratorStreamer.
+    Generation is started before this function returns, so a full
+    executor raises QueueFullError here rather than mid-stream. Closing
+    the iterator (e.g. the client disconnected) stops generation at the
+    next token and waits for the job to end, so an abandoned stream
+    doesn't hold a worker until `max_length`.
+
+    The raw text is cleaned after every token, but only the part that can
+    no longer change (everything before the last whitespace) is emitted,
+    so cleaned chunks never have to be retracted.
+
+    Returns:
+        Iterator yielding {"text": delta} for each newly stable piece of
+        cleaned text, then a final {"generated_text": full_text} with the
+        same result `generate_text` would produce for this output.
+    """
+    from transformers import TextIteratorStreamer
+
+    input_ids, gen_kwargs = _prepare_generation(summary, tokenizer, model, **generation_params)
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    stop = threading.Event()
+    gen_kwargs["stopping_criteria"] = StoppingCriteriaList([_StopOnEvent(stop)])
+    errors = []
+
+    def _run():
+        if stop.is_set():
+            streamer.end()
+            return
+        try:
+            # Includes the streamer's incremental decoding, which runs inside generate
+            with _seeded(seed), metrics.STAGE_SECONDS.time(stage="generate"), torch.no_grad():
+                output_ids = model.generate(input_ids, streamer=streamer, **gen_kwargs)
+            metrics.OUTPUT_TOKENS.inc(output_ids.shape[-1] - input_ids.shape[-1])
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    if executor is not None:
+        future = executor.submit(_run)
+
+        def wait():
+            # A job still queued when the stream is abandoned never starts
+            if not future.cancel():
+                future.result()
+    else:
+        thread = threading.Thread(target=_run, name="stream-generate", daemon=True)
+        thread.start()
+        wait = thread.join
+
+    return _TextStream(_iter_cleaned(streamer, wait, errors, stop), stop, wait)
+
+
+class _TextStream:
+    """
+    Iterator over a started generation's events.
+
+    Unlike a bare generator, `close()` also stops a stream that was never
+    iterated. A stream dropped without `close()` still tells generation
+    to stop, without waiting for it.
+    """
+
+    def __init__(self, events, stop, wait):
+        self._events = events
+        self._stop = stop
+        self._wait = wait
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        self._stop.set()
+        self._events.close()
+        self._wait()
+
+    def __del__(self):
+        self._stop.set()
+
+
+class _StopOnEvent(StoppingCriteria):
+    """Stops `model.generate` at the next token once `event` is set."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+def _iter_cleaned(streamer, wait, errors, stop):
+    """Turn raw streamer output into stable, cleaned text deltas."""
+    raw = ""
+    emitted = ""
+    # Cleaning runs once per token here; observed as one total per request
+    postprocess = 0.0
+    finished = False
+    try:
+        for piece in streamer:
+            raw += piece
+            clean_start = time.perf_counter()
+            cleaned = _clean_generated_text(raw.replace("<|sep|>", ""))
+            postprocess += time.perf_counter() - clean_start
+
+            # The last word may still grow or lose orphaned punctuation spacing
+            boundary = max(cleaned.rfind(" "), 0)
+            stable = cleaned[:boundary]
+            if len(stable) > len(emitted) and stable.startswith(emitted):
+                yield {"text": stable[len(emitted):]}
+                emitted = stable
+
+        wait()
+        finished = True
+    finally:
+        if not finished:
+            # Closed early (GeneratorExit) or failed: stop generating and free the worker
+            stop.set()
+            wait()
+
+    if errors:
+        raise errors[0]
+
+    clean_start = time.perf_counter()
+    generated_text = _clean_generated_text(raw.replace("<|sep|>", "").strip())
+    metrics.STAGE_SECONDS.observe(postprocess + time.perf_counter() - clean_start, stage="postprocess")
+    if len(generated_text) > len(emitted) and generated_text.startswith(emitted):
+        yield {"text": generated_text[len(emitted):]}
+
+    yield {"generated_text": generated_text}
+
+
 def _clean_generated_text(text):
     """Remove non-English characters and clean up garbled output."""
     # Keep only ASCII printable characters + common punctuation
@@ -0,0 +1,150 @@
+"""
+ONNX Runtime backend for the GPT-2 generator.
+
+The fine-tuned model is exported with past key/values as explicit graph
+inputs and outputs, so every decoding step only processes the new token.
+The exported model is loaded with Optimum's ORTModelForCausalLM, which
+keeps the `generate` API (sampling, repetition penalty, streamers), so
+`generate_text` and `stream_text` work with either backend.
+
+Usage (from text_generator/):
+    python -m src.inference.onnx_backend export    # export + verify
+    python -m src.inference.onnx_backend verify    # re-check an existing export
+
+Requires the optional dependency: pip install "optimum[onnxruntime]"
+"""
+
+import sys
+import os
+
+# Ensure the project root is in the python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(project_root)
+
+import argparse
+
+import torch
+from src.config import config
+
+_OPTIMUM_HINT = 'The ONNX backend needs Optimum: pip install "optimum[onnxruntime]"'
+
+VERIFY_SUMMARIES = [
+    "A new study has found that regular exercise can significantly reduce the "
+    "risk of heart disease in middle-aged adults.",
+    "The city council has approved plans for a new bridge across the river.",
+]
+
+
+def export_onnx(model_dir=None, output_dir=None):
+    """Export the GPT-2 model (with KV-cache inputs/outputs) and tokenizer to ONNX."""
+    try:
+        from optimum.exporters.onnx import main_export
+    except ImportError as e:
+        raise ImportError(_OPTIMUM_HINT) from e
+
+    model_dir = model_dir or config.paths.model_dir
+    output_dir = output_dir or config.paths.onnx_dir
+
+    print(f"Exporting {model_dir} → {output_dir}")
+    main_export(
+        model_name_or_path=model_dir,
+        output=output_dir,
+        task="text-generation-with-past",
+    )
+    print(f"✅ ONNX export written to: {output_dir}")
+    return output_dir
+
+
+def load_onnx_model(onnx_dir=None, num_threads=None):
+    """Load an exported model as a CPU ONNX Runtime session with `generate` support."""
+    try:
+        import onnxruntime as ort
+        from optimum.onnxruntime import ORTModelForCausalLM
+    except ImportError as e:
+        raise ImportError(_OPTIMUM_HINT) from e
+
+    session_options = ort.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+
+    return ORTModelForCausalLM.from_pretrained(
+        onnx_dir or config.paths.onnx_dir,
+        use_cache=True,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+
+
+def verify_onnx(model_dir=None, onnx_dir=None, summaries=None, max_new_tokens=32, atol=1e-3):
+    """
+    Check the ONNX model against PyTorch eager on the same prompts.
+
+    Compares the prompt logits (max absolute difference) and greedy
+    continuations token by token (sampling is disabled so both backends
+    must pick the same tokens).
+
+    Returns:
+        Dict with `max_abs_diff`, `generations_match` and `passed`.
+    """
+    from transformers import GPT2LMHeadModel, GPT2TokenizerFast
+
+    model_dir = model_dir or config.paths.model_dir
+    summaries = summaries or VERIFY_SUMMARIES
+
+    tokenizer = GPT2TokenizerFast.from_pretrained(model_dir)
+    torch_model = GPT2LMHeadModel.from_pretrained(model_dir).eval()
+    ort_model = load_onnx_model(onnx_dir)
+
+    max_abs_diff = 0.0
+    generations_match = True
+    for summary in summaries:
+        prompt = config.data.prompt_prefix + summary + config.data.separator
+        input_ids = tokenizer.encode(prompt, return_tensors="pt")
+        attention_mask = torch.ones_like(input_ids)
+
+        with torch.no_grad():
+            torch_logits = torch_model(input_ids, attention_mask=attention_mask).logits
+            ort_logits = ort_model(input_ids, attention_mask=attention_mask).logits
+            max_abs_diff = max(max_abs_diff, (torch_logits - ort_logits).abs().max().item())
+
+            gen_kwargs = dict(
+                attention_mask=attention_mask,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id,
+            )
+            torch_ids = torch_model.generate(input_ids, **gen_kwargs)
+            ort_ids = ort_model.generate(input_ids, **gen_kwargs)
+
+        if torch_ids.shape != ort_ids.shape or not bool((torch_ids == ort_ids).all()):
+            generations_match = False
+
+    return {
+        "max_abs_diff": max_abs_diff,
+        "generations_match": generations_match,
+        "passed": max_abs_diff <= atol and generations_match,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / verify the GPT-2 ONNX backend")
+    parser.add_argument("command", choices=["export", "verify"])
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--onnx-dir", default=None)
+    parser.add_argument("--atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model_dir, args.onnx_dir)
+
+    result = verify_onnx(args.model_dir, args.onnx_dir, atol=args.atol)
+    print(f"Max |logit diff| (prompt): {result['max_abs_diff']:.2e}")
+    print(f"Greedy generations match: {result['generations_match']}")
+    if not result["passed"]:
+        print("❌ ONNX outputs differ from PyTorch — do not switch backends.")
+        sys.exit(1)
+    print("✅ ONNX backend matches PyTorch.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Text generation request handling, independent of the app serving it.
+
+text_generator/api.py and the combined app (combined/api.py) load the
+model their own way and register thin routes around these handlers,
+passing a `GenerationService`: the loaded model plus how that app
+submits work (its executor and admission limits), its result cache and
+its profiler.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.config import config
+from src.inference.cache import make_cache_key, normalize_text
+from src.inference.executor import QueueFullError
+from src.monitoring import metrics
+
+
+# --- Request / Response Schemas ---
+class GenerateRequest(BaseModel):
+    summary: str = Field(..., min_length=5, description="Summary/prompt to expand into full text")
+    max_length: int = Field(default=200, ge=50, le=512, description="Max tokens to generate")
+    temperature: float = Field(default=0.7, ge=0.1, le=2.0, description="Sampling temperature")
+    top_k: int = Field(default=40, ge=1, le=100, description="Top-K filtering")
+    top_p: float = Field(default=0.90, ge=0.1, le=1.0, description="Nucleus sampling probability")
+    seed: Optional[int] = Field(default=None, ge=0, description="Random seed for reproducible (and cacheable) sampling")
+
+
+class GenerateResponse(BaseModel):
+    generated_text: str
+    input_length: int
+    output_length: int
+    processing_time: float
+
+
+def model_revision(model, model_dir=None, backend=None):
+    """
+    Identifier of the weights and backend, e.g. for cache keys.
+
+    Hub snapshots carry a commit hash; local checkpoints fall back to
+    their path. Backend and quantization change outputs slightly, so
+    they are part of it.
+    """
+    return "{}:{}:{}".format(
+        getattr(model.config, "_commit_hash", None) or model_dir or config.paths.model_dir,
+        backend or config.model.backend,
+        config.model.quantization or "fp32",
+    )
+
+
+@dataclass
+class GenerationService:
+    """
+    What the handlers need from the serving app.
+
+    Attributes:
+        tokenizer, model: Loaded by `engine.load_model`.
+        engine: The src.inference.generate module, passed in so this
+            module can be imported without torch.
+        submit: `submit(fn, *args, **kwargs) -> Future` running a job on the
+            inference pool; raises QueueFullError if it can't take the job.
+        revision: `model_revision(...)` of the served model.
+        cache: ResultCache, or None when caching is disabled.
+        profiler: RequestProfiler, or None when profiling is disabled.
+    """
+
+    tokenizer: object
+    model: object
+    engine: object
+    submit: Callable
+    revision: str
+    cache: object = None
+    profiler: object = None
+
+    def cache_key(self, request):
+        """
+        Content-addressed key for a seeded request, or None if not cacheable.
+
+        Sampling without a seed is non-deterministic, so only seeded
+        requests may be served from the cache. generate_text gives a seeded
+        request the RNG to itself, so its result holds with several workers.
+        """
+        if self.cache is None or request.seed is None:
+            return None
+        return make_cache_key(
+            normalize_text(request.summary),
+            request.max_length,
+            request.temperature,
+            request.top_k,
+            request.top_p,
+            request.seed,
+            self.revision,
+        )
+
+
+async def generate(service, request, headers):
+    """Generate expanded text from a summary (`headers` may ask for a trace)."""
+    start_time = time.time()
+    cache, profiler = service.cache, service.profiler
+
+    cache_key = service.cache_key(request)
+    generated = await cache.aget(cache_key) if cache_key is not None else None
+    if generated is not None:
+        return GenerateResponse(
+            generated_text=generated,
+            input_length=len(request.summary.split()),
+            output_length=len(generated.split()),
+            processing_time=round(time.time() - start_time, 3),
+        )
+
+    generate_text = service.engine.generate_text
+    capture = profiler.select(headers) if profiler is not None else None
+
+    try:
+        # Raises QueueFullError (→ 503) before any work is queued
+        future = service.submit(
+            profiler.wrap(capture, generate_text) if capture is not None else generate_text,
+            summary=request.summary,
+            tokenizer=service.tokenizer,
+            model=service.model,
+            max_length=request.max_length,
+            temperature=request.temperature,
+            top_k=request.top_k,
+            top_p=request.top_p,
+            seed=request.seed,
+        )
+
+        generated = await asyncio.wrap_future(future)
+        if cache_key is not None:
+            await cache.aset(cache_key, generated)
+
+        processing_time = round(time.time() - start_time, 3)
+
+        return GenerateResponse(
+            generated_text=generated,
+            input_length=len(request.summary.split()),
+            output_length=len(generated.split()),
+            processing_time=processing_time,
+        )
+
+    except QueueFullError:
+        raise
+
+    except Exception as e:
+        metrics.ERRORS.inc(type=type(e).__name__)
+        raise HTTPException(status_code=500, detail=f"Text generation failed: {str(e)}")
+
+    finally:
+        if capture is not None:
+            profiler.finish(capture, "/api/generate", time.time() - start_time)
+
+
+def generate_stream(service, request):
+    """
+    Stream expanded text as newline-delimited JSON while tokens are generated.
+
+    Emits {"text": ...} chunks, then a final {"done": true, ...} event with
+    the full text, timings and time_to_first_token. Failures after the
+    stream has started are reported as a final {"error": ...} event.
+    """
+    start_time = time.time()
+
+    # Generation starts here, so a full queue is rejected before streaming
+    events = service.engine.stream_text(
+        summary=request.summary,
+        tokenizer=service.tokenizer,
+        model=service.model,
+        executor=SimpleNamespace(submit=service.submit),
+        max_length=request.max_length,
+        temperature=request.temperature,
+        top_k=request.top_k,
+        top_p=request.top_p,
+        seed=request.seed,
+    )
+
+    def event_stream():
+        time_to_first_token = None
+
+        try:
+            for event in events:
+                if "text" in event:
+                    if time_to_first_token is None:
+                        time_to_first_token = round(time.time() - start_time, 3)
+                    yield json.dumps(event) + "\n"
+                    continue
+
+                generated = event["generated_text"]
+                yield json.dumps({
+                    "done": True,
+                    "generated_text": generated,
+                    "input_length": len(request.summary.split()),
+                    "output_length": len(generated.split()),
+                    "processing_time": round(time.time() - start_time, 3),
+                    "time_to_first_token": time_to_first_token,
+                }) + "\n"
+
+        except Exception as e:
+            metrics.ERRORS.inc(type=type(e).__name__)
+            yield json.dumps({"error": f"Text generation failed: {str(e)}"}) + "\n"
+
+        finally:
+            # Client gone mid-stream: stop generating instead of running to max_length
+            events.close()
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
@@ -0,0 +1,113 @@
+"""
+HTTP plumbing shared by the API apps: request metrics, fast 503s on a
+full queue and the trace download routes.
+
+The project's API and the combined app (combined/api.py) install these
+on their FastAPI app. This file is identical in summarization/ and
+text_generator/ (summarization/tests/test_http.py pins the copies).
+"""
+
+import time
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+from src.inference.executor import QueueFullError
+
+
+def add_request_metrics(app, metrics_for):
+    """
+    Count /api/ requests and time them until the last byte of the body is sent.
+
+    Args:
+        app: FastAPI app.
+        metrics_for: `metrics_for(path)` returning the metrics module to record into.
+    """
+    route_paths = set()
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        if not request.url.path.startswith("/api/"):
+            return await call_next(request)
+
+        if not route_paths:
+            route_paths.update(route.path for route in app.routes)
+        metrics = metrics_for(request.url.path)
+        # Unknown paths share one label so scanners can't blow up cardinality
+        endpoint = request.url.path if request.url.path in route_paths else "other"
+        start = time.perf_counter()
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            metrics.REQUESTS_IN_FLIGHT.dec()
+            metrics.ERRORS.inc(type=type(e).__name__)
+            raise
+
+        body = response.body_iterator
+
+        async def observed_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                metrics.REQUESTS_IN_FLIGHT.dec()
+                metrics.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+                metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+
+        response.body_iterator = observed_body()
+        return response
+
+
+def add_queue_full_handler(app, metrics_for):
+    """Answer QueueFullError with 503 and Retry-After instead of queueing without bound."""
+
+    @app.exception_handler(QueueFullError)
+    def queue_full_handler(request: Request, exc: QueueFullError):
+        metrics_for(request.url.path).ERRORS.inc(type=type(exc).__name__)
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
+
+def add_profile_routes(app, get_profiler):
+    """
+    Serve stored request traces under /debug/profiles (local clients only).
+
+    Args:
+        app: FastAPI app.
+        get_profiler: Returns the RequestProfiler, or None while profiling
+            is disabled or the model is still loading.
+    """
+
+    @app.get("/debug/profiles", include_in_schema=False)
+    def list_profiles(http_request: Request):
+        """Stored request traces, newest first."""
+        profiler = _check_profiles_access(get_profiler(), http_request)
+        return {"mode": profiler.mode, "traces": profiler.list()}
+
+    @app.get("/debug/profiles/{trace_id}", include_in_schema=False)
+    def download_profile(trace_id: int, http_request: Request):
+        """Download one trace: collapsed stacks (.txt) or a Chrome trace (.json)."""
+        profiler = _check_profiles_access(get_profiler(), http_request)
+        trace = profiler.get(trace_id)
+        if trace is None:
+            raise HTTPException(status_code=404, detail="Trace not found (it may have been evicted).")
+        extension, media_type = (".json", "application/json") if trace["mode"] == "torch" else (".txt", "text/plain")
+        # Named after the endpoint, e.g. "summarize-3.txt" or "generate-4.json"
+        name = trace["endpoint"].rsplit("/", 1)[-1]
+        return Response(
+            content=trace["data"],
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{name}-{trace_id}{extension}"'},
+        )
+
+
+def _check_profiles_access(profiler, http_request):
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled.")
+    if http_request.client is None or http_request.client.host not in ("127.0.0.1", "::1"):
+        raise HTTPException(status_code=403, detail="Traces are only served to local clients.")
+    return profiler
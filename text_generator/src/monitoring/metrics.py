@@ -0,0 +1,222 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+A small, dependency-free subset of prometheus_client: counters, gauges
+and fixed-bucket histograms, optionally labelled, rendered by the API's
+`/metrics` endpoint. Every update is a dict lookup and a few additions
+under a lock, so instrumentation stays on in production.
+
+Metrics are per process: with several uvicorn workers each one reports
+its own values (scrape them individually or run one worker per pod).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metric names are prefixed so both services can share one scrape config
+NAMESPACE = "text_generator"
+
+# Seconds; spans tokenizer calls (sub-ms) up to long beam searches
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """Holds metrics and renders them for a scrape."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self):
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = f"{NAMESPACE}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.labelnames and self.type != "histogram":
+            # Unlabelled series are exported as 0 before the first update
+            self._values[()] = 0
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (e.g. tokens, errors)."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """Read the (unlabelled) value from `function()` on every scrape."""
+        self._function = function
+
+    def collect(self):
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        return super().collect()
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, plus sum and count."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts with a final +Inf slot, sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = self._labels(key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+# ─── Service metrics ─────────────────────────────────────────────
+STAGE_SECONDS = Histogram(
+    "stage_seconds",
+    "Time spent per inference stage (tokenize, generate, decode, postprocess).",
+    ["stage"],
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "queue_wait_seconds",
+    "Time from submission until work starts.",
+    ["queue"],
+)
+REQUEST_SECONDS = Histogram(
+    "request_seconds",
+    "End-to-end HTTP request latency, including streamed bodies.",
+    ["endpoint"],
+)
+REQUESTS = Counter("requests_total", "HTTP requests by endpoint and status code.", ["endpoint", "status"])
+REQUESTS_IN_FLIGHT = Gauge("requests_in_flight", "HTTP requests currently being served.")
+QUEUE_DEPTH = Gauge("queue_depth", "Inference jobs admitted to the executor (running or waiting).")
+INPUT_TOKENS = Counter("input_tokens_total", "Tokens fed to the model.")
+OUTPUT_TOKENS = Counter("output_tokens_total", "Tokens generated by the model.")
+# Prompts are not truncated at inference; this flags inputs outside the training distribution
+PROMPTS_OVER_CONTEXT = Counter(
+    "prompts_over_context_total",
+    "Prompts longer than the fine-tuning context (model.max_length tokens).",
+)
+ERRORS = Counter("errors_total", "Failed requests by exception type.", ["type"])
+PROFILES_SKIPPED = Counter(
+    "profiles_skipped_total",
+    "Requests selected for profiling but run untraced because another capture was running.",
+    ["reason"],
+)
+MODEL_LOAD_SECONDS = Gauge("model_load_seconds", "Time taken to load the model at startup.")
+STARTUP_PHASE_SECONDS = Gauge("startup_phase_seconds", "Startup time per phase (imports, tokenizer, model, warmup).", ["phase"])
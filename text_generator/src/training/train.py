@@ -5,18 +5,31 @@ Fine-tunes GPT-2 on Summary -> Text generation task.
 Uses HuggingFace Trainer with causal LM objective.
 """
 
+import numpy as np
 import torch
 from transformers import (
     GPT2LMHeadModel,
-    GPT2Tokenizer,
-    Trainer,
+    GPT2TokenizerFast,
     TrainingArguments,
     DataCollatorForLanguageModeling,
+    default_data_collator,
 )
 
 from src.config import config
 from src.data.load_data import load_dataset_from_csv, build_train_val_split
-from src.data.preprocess import TextGenDataset, setup_tokenizer
+from src.data.preprocess import (
+    PackedTextGenDataset,
+    TextGenDataset,
+    TokenizedTextGenDataset,
+    setup_tokenizer,
+)
+from src.training.trainer_utils import (
+    BucketBatchSampler,
+    BucketedTrainer,
+    DataCollatorForPackedSequences,
+    DataCollatorForPromptCompletion,
+    padding_waste,
+)
 
 
 def train():
@@ -37,7 +50,7 @@ def train():
     print("STEP 2: Loading GPT-2 Model & Tokenizer")
     print("=" * 60)
 
-    tokenizer = GPT2Tokenizer.from_pretrained(config.model.model_name)
+    tokenizer = GPT2TokenizerFast.from_pretrained(config.model.model_name)
     tokenizer = setup_tokenizer(tokenizer)
 
     model = GPT2LMHeadModel.from_pretrained(config.model.model_name)
@@ -54,12 +67,67 @@ def train():
     print("STEP 3: Preparing Datasets")
     print("=" * 60)
 
-    train_dataset = TextGenDataset(splits["train"], tokenizer, config)
-    val_dataset = TextGenDataset(splits["test"], tokenizer, config)
+    dynamic_padding = config.training.dynamic_padding and config.data.use_token_cache
+    packing = config.training.packing and config.data.use_token_cache
+    if config.data.use_token_cache:
+        # Tokenize once into memory-mapped arrays, reused across runs
+        train_dataset = TokenizedTextGenDataset.from_hf_dataset(
+            splits["train"], tokenizer, config, dynamic_padding=dynamic_padding
+        )
+        val_dataset = TokenizedTextGenDataset.from_hf_dataset(
+            splits["test"], tokenizer, config, dynamic_padding=dynamic_padding
+        )
+    else:
+        train_dataset = TextGenDataset(splits["train"], tokenizer, config)
+        val_dataset = TextGenDataset(splits["test"], tokenizer, config)
 
     print(f"Train samples: {len(train_dataset)}")
     print(f"Validation samples: {len(val_dataset)}")
 
+    # Dynamic padding: pad per batch, optionally bucketed by length / token budget
+    data_collator = None
+    eval_collator = None
+    batch_sampler = None
+    if packing:
+        # Several examples per block; eval stays unpacked so eval_loss is comparable
+        block_size = config.data.pack_block_size or config.model.max_length
+        num_examples = len(train_dataset)
+        train_dataset = PackedTextGenDataset(train_dataset, block_size)
+        data_collator = DataCollatorForPackedSequences(tokenizer.pad_token_id)
+        if dynamic_padding:
+            eval_collator = DataCollatorForPromptCompletion(tokenizer.pad_token_id)
+        else:
+            # Eval items are padded to max_length already
+            eval_collator = default_data_collator
+
+        fill = train_dataset.lengths.sum() / (len(train_dataset) * block_size)
+        print(f"Packed {num_examples} examples into {len(train_dataset)} blocks "
+              f"of {block_size} tokens ({fill:.1%} full)")
+    elif dynamic_padding:
+        data_collator = DataCollatorForPromptCompletion(tokenizer.pad_token_id)
+        lengths = train_dataset.lengths
+
+        if config.training.group_by_length or config.training.max_tokens_per_batch:
+            batch_sampler = BucketBatchSampler(
+                lengths,
+                batch_size=config.training.batch_size,
+                max_tokens=config.training.max_tokens_per_batch,
+            )
+            batches = batch_sampler.batches
+        else:
+            order = np.random.default_rng(42).permutation(len(lengths))
+            batches = [
+                order[i:i + config.training.batch_size]
+                for i in range(0, len(order), config.training.batch_size)
+            ]
+
+        waste = padding_waste(lengths, batches, config.model.max_length)
+        print(f"Padding waste: {waste['dynamic']:.1%} "
+              f"(fixed {config.model.max_length}-token padding: {waste['fixed']:.1%})")
+        print(f"Train batches per epoch: {len(batches)}")
+    elif config.training.dynamic_padding or config.training.packing:
+        print("Dynamic padding / packing need data.use_token_cache — padding to max_length.")
+
     # ---- 4. Training Arguments ----
     print("\n" + "=" * 60)
     print("STEP 4: Starting Training")
@@ -84,14 +152,20 @@ def train():
         report_to="none",
         disable_tqdm=False,
         logging_dir=config.paths.log_dir,
+        # The dynamic padding / packing collators read prompt_len and segment_ids,
+        # which aren't GPT2LMHeadModel.forward arguments
+        remove_unused_columns=False,
     )
 
     # ---- 5. Trainer ----
-    trainer = Trainer(
+    trainer = BucketedTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=data_collator,
+        batch_sampler=batch_sampler,
+        eval_data_collator=eval_collator,
     )
 
     # Train
@@ -0,0 +1,231 @@
+"""
+Batching utilities for GPT-2 fine-tuning.
+
+  - DataCollatorForPromptCompletion pads each batch only to its longest
+    sequence and masks prompt and padding tokens out of the loss.
+  - DataCollatorForPackedSequences builds block-diagonal causal attention
+    masks for packed blocks.
+  - BucketBatchSampler groups sequences of similar length, either in
+    fixed-size batches or under a token budget per batch.
+  - BucketedTrainer plugs both into the HuggingFace Trainer.
+"""
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Sampler
+from transformers import Trainer
+
+
+class DataCollatorForPromptCompletion:
+    """
+    Pad unpadded {"input_ids", "prompt_len"} items to the batch maximum.
+
+    Labels equal input_ids except for prompt and padding positions, which
+    are set to -100 so only the target text contributes to the loss.
+    """
+
+    def __init__(self, pad_token_id, pad_to_multiple_of=None):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, features):
+        max_len = max(len(f["input_ids"]) for f in features)
+        if self.pad_to_multiple_of:
+            multiple = self.pad_to_multiple_of
+            max_len = (max_len + multiple - 1) // multiple * multiple
+
+        batch_size = len(features)
+        input_ids = torch.full((batch_size, max_len), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((batch_size, max_len), dtype=torch.long)
+        labels = torch.full((batch_size, max_len), -100, dtype=torch.long)
+
+        for i, feature in enumerate(features):
+            ids = feature["input_ids"]
+            length = len(ids)
+            input_ids[i, :length] = ids
+            attention_mask[i, :length] = 1
+            labels[i, feature["prompt_len"]:length] = ids[feature["prompt_len"]:]
+
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
+        }
+
+
+class DataCollatorForPackedSequences:
+    """
+    Collate PackedTextGenDataset blocks into a padded batch.
+
+    The attention mask is a 4D additive mask (batch, 1, seq, seq): a token
+    may attend to earlier tokens of its own example only. Padding tokens
+    attend to themselves so no softmax row is empty; their labels are
+    -100. GPT-2 only accepts custom 4D masks in transformers releases
+    built on `transformers.masking_utils`, so this is checked up front.
+    """
+
+    def __init__(self, pad_token_id):
+        try:
+            import transformers.masking_utils  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError(
+                "Sequence packing needs a transformers release with custom 4D "
+                "attention mask support (transformers.masking_utils)."
+            ) from e
+        self.pad_token_id = pad_token_id
+
+    def __call__(self, features):
+        max_len = max(len(f["input_ids"]) for f in features)
+        batch_size = len(features)
+
+        input_ids = torch.full((batch_size, max_len), self.pad_token_id, dtype=torch.long)
+        position_ids = torch.zeros((batch_size, max_len), dtype=torch.long)
+        segment_ids = torch.zeros((batch_size, max_len), dtype=torch.long)
+        labels = torch.full((batch_size, max_len), -100, dtype=torch.long)
+
+        for i, feature in enumerate(features):
+            length = len(feature["input_ids"])
+            input_ids[i, :length] = feature["input_ids"]
+            position_ids[i, :length] = feature["position_ids"]
+            segment_ids[i, :length] = feature["segment_ids"]
+            labels[i, :length] = feature["labels"]
+
+        # Same example, not padding, and causal
+        same_segment = segment_ids[:, :, None] == segment_ids[:, None, :]
+        not_padding = (segment_ids != 0)[:, :, None]
+        causal = torch.tril(torch.ones((max_len, max_len), dtype=torch.bool))
+        allowed = same_segment & not_padding & causal
+        allowed |= torch.eye(max_len, dtype=torch.bool)
+
+        # fp16-safe "minus infinity" so the mask also works under autocast
+        attention_mask = torch.zeros((batch_size, 1, max_len, max_len))
+        attention_mask.masked_fill_(~allowed[:, None], torch.finfo(torch.float16).min)
+
+        return {
+            "input_ids": input_ids,
+            "position_ids": position_ids,
+            "attention_mask": attention_mask,
+            "labels": labels,
+        }
+
+
+class BucketBatchSampler(Sampler):
+    """
+    Batch sampler that keeps sequences of similar length together.
+
+    Sequences are sorted by length once and cut into batches of
+    `batch_size`, or, when `max_tokens` is set, into batches whose padded
+    size (longest sequence × batch size) stays within the budget. Batch
+    membership is fixed, so the number of steps per epoch is stable for
+    the LR schedule; the batch order is reshuffled every epoch.
+    """
+
+    def __init__(self, lengths, batch_size=None, max_tokens=None, shuffle=True, seed=42):
+        if batch_size is None and max_tokens is None:
+            raise ValueError("BucketBatchSampler needs batch_size or max_tokens")
+
+        self.lengths = np.asarray(lengths)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self.batches = self._build_batches(batch_size, max_tokens)
+
+    def _build_batches(self, batch_size, max_tokens):
+        # Stable sort so equal lengths keep dataset order
+        order = np.argsort(self.lengths, kind="stable")
+        batches, current, longest = [], [], 0
+        for idx in order.tolist():
+            length = int(self.lengths[idx])
+            if max_tokens is not None:
+                full = current and max(longest, length) * (len(current) + 1) > max_tokens
+            else:
+                full = len(current) >= batch_size
+            if full:
+                batches.append(current)
+                current, longest = [], 0
+            current.append(idx)
+            longest = max(longest, length)
+        if current:
+            batches.append(current)
+        return batches
+
+    def __iter__(self):
+        order = np.arange(len(self.batches))
+        if self.shuffle:
+            np.random.default_rng(self.seed + self.epoch).shuffle(order)
+        self.epoch += 1
+        for i in order:
+            yield self.batches[i]
+
+    def __len__(self):
+        return len(self.batches)
+
+
+def padding_waste(lengths, batches, max_length):
+    """
+    Share of padding tokens for the given batches vs. fixed max_length padding.
+
+    Returns:
+        Dict with `dynamic` and `fixed` padding-waste ratios (0–1).
+    """
+    lengths = np.asarray(lengths)
+    real_tokens = int(lengths.sum())
+    padded = sum(int(lengths[batch].max()) * len(batch) for batch in batches)
+    return {
+        "dynamic": 1 - real_tokens / max(padded, 1),
+        "fixed": 1 - real_tokens / max(len(lengths) * max_length, 1),
+    }
+
+
+# Collators reading fields Trainer would strip as unused columns
+_FIELD_COLLATORS = (DataCollatorForPromptCompletion, DataCollatorForPackedSequences)
+
+
+class BucketedTrainer(Trainer):
+    """
+    Trainer whose training DataLoader can use a BucketBatchSampler.
+
+    `eval_data_collator` lets evaluation batches be collated differently
+    from training ones (e.g. packed training, unpacked evaluation).
+
+    The collators above read fields that are not `forward` arguments
+    (`prompt_len`, `segment_ids`), so they need
+    `TrainingArguments(remove_unused_columns=False)`: otherwise Trainer
+    strips those fields before they reach the collator.
+    """
+
+    def __init__(self, *args, batch_sampler=None, eval_data_collator=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_sampler = batch_sampler
+        self.eval_data_collator = eval_data_collator
+
+        collators = (self.data_collator, eval_data_collator)
+        if self.args.remove_unused_columns and any(isinstance(c, _FIELD_COLLATORS) for c in collators):
+            raise ValueError(
+                "Dynamic padding / packing collators need "
+                "TrainingArguments(remove_unused_columns=False)."
+            )
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        if self.eval_data_collator is None:
+            return super().get_eval_dataloader(eval_dataset)
+
+        train_collator = self.data_collator
+        self.data_collator = self.eval_data_collator
+        try:
+            return super().get_eval_dataloader(eval_dataset)
+        finally:
+            self.data_collator = train_collator
+
+    def get_train_dataloader(self):
+        if self.batch_sampler is None:
+            return super().get_train_dataloader()
+
+        dataloader = DataLoader(
+            self.train_dataset,
+            batch_sampler=self.batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+        return self.accelerator.prepare(dataloader)
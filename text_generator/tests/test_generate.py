@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from src.inference.generate import generate_text, stream_text
+
+VOCAB_SIZE = 64
+EOS_TOKEN_ID = 0
+
+
+class WordTokenizer:
+    """Just enough of a tokenizer for generate_text: one id per word, word ids as text."""
+
+    eos_token_id = EOS_TOKEN_ID
+    pad_token_id = EOS_TOKEN_ID
+
+    def encode(self, text, return_tensors=None):
+        ids = [1 + sum(map(ord, word)) % (VOCAB_SIZE - 1) for word in text.split()]
+        return torch.tensor([ids]) if return_tensors == "pt" else ids
+
+    def decode(self, ids, skip_special_tokens=False, **kwargs):
+        ids = ids.tolist() if hasattr(ids, "tolist") else list(ids)
+        return " ".join(f"w{i}" for i in ids if not (skip_special_tokens and i == EOS_TOKEN_ID))
+
+
+def tiny_gpt2():
+    torch.manual_seed(0)
+    model = transformers.GPT2LMHeadModel(transformers.GPT2Config(
+        vocab_size=VOCAB_SIZE, n_positions=128, n_embd=16, n_layer=1, n_head=2,
+        eos_token_id=EOS_TOKEN_ID, bos_token_id=EOS_TOKEN_ID,
+    ))
+    return model.eval()
+
+
+SAMPLING = dict(max_length=40, temperature=1.5, top_k=VOCAB_SIZE, top_p=1.0, do_sample=True,
+                num_beams=1, repetition_penalty=1.0, no_repeat_ngram_size=0)
+
+
+def test_seeded_generation_is_reproducible_under_concurrency():
+    tokenizer, model = WordTokenizer(), tiny_gpt2()
+    requests = [("a short review of coffee", seed) for seed in (1, 2, 3)] * 4
+    serial = {seed: generate_text(prompt, tokenizer, model, seed=seed, **SAMPLING) for prompt, seed in requests}
+
+    def run(request):
+        prompt, seed = request
+        return seed, generate_text(prompt, tokenizer, model, seed=seed, **SAMPLING)
+
+    def unseeded(_):
+        return generate_text("another prompt", tokenizer, model, **SAMPLING)
+
+    # Unseeded requests draw from the same RNG alongside the seeded ones
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        noise = pool.map(unseeded, range(8))
+        concurrent = list(pool.map(run, requests))
+        list(noise)
+
+    for seed, text in concurrent:
+        assert text == serial[seed]
+
+
+def test_seeded_stream_matches_generate_text():
+    tokenizer, model = WordTokenizer(), tiny_gpt2()
+    expected = generate_text("a short review of coffee", tokenizer, model, seed=7, **SAMPLING)
+
+    events = list(stream_text("a short review of coffee", tokenizer, model, seed=7, **SAMPLING))
+
+    assert events[-1] == {"generated_text": expected}
+
+
+def test_closing_a_stream_stops_generation():
+    tokenizer, model = WordTokenizer(), tiny_gpt2()
+    # End of text can't be sampled, so only the stop event ends generation early
+    tokenizer.eos_token_id = VOCAB_SIZE
+    generated_lengths = []
+    generate = model.generate
+
+    def recording_generate(input_ids, **kwargs):
+        output_ids = generate(input_ids, **kwargs)
+        generated_lengths.append(output_ids.shape[-1] - input_ids.shape[-1])
+        return output_ids
+
+    model.generate = recording_generate
+    params = dict(SAMPLING, max_length=100)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        events = stream_text("a short review of coffee", tokenizer, model, executor=pool, seed=7, **params)
+        next(events)
+        events.close()
+
+        # close() waited for the job: the worker is free and generate stopped early
+        assert pool.submit(lambda: "free").result(timeout=1) == "free"
+    assert generated_lengths and generated_lengths[0] < params["max_length"]
+
+
+def test_closing_a_queued_stream_never_starts_it():
+    tokenizer, model = WordTokenizer(), tiny_gpt2()
+    release = threading.Event()
+    calls = []
+    model.generate = lambda *args, **kwargs: calls.append(args)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(release.wait)
+        events = stream_text("a short review of coffee", tokenizer, model, executor=pool, **SAMPLING)
+        # Abandoned before its job left the queue (and before it was iterated)
+        events.close()
+        release.set()
+
+    assert calls == []